@@ -0,0 +1,134 @@
+import random
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List
+
+import click
+
+from core.codec import get_todo_codec
+from core.entities import DEFAULT_LIST_ID, Todo
+from core.ids import TimeOrderedIdGenerator
+from core.replication import ChangeLog
+from core.transfer import FORMATS, serialize_chunk, todos_to_chunks, write_chunks
+
+# "store" is the file of a JSON repository, "changes" a replica change log; the
+# others are the import/export formats.
+DATASET_FORMATS = ("store", "changes", *FORMATS)
+
+_VERBS = ["Buy", "Call", "Fix", "Write", "Review", "Ship", "Clean", "Book", "Pay", "Plan", "Email", "Read"]
+_OBJECTS = ["milk", "report", "login bug", "car", "dentist", "tickets", "invoice", "garden", "slides", "taxes"]
+_QUALIFIERS = ["", "", "", "today", "before Friday", "for Sam", "again", "(urgent)"]
+_DESCRIPTIONS = [None, None, "See the shared notes.", "Ask the team first.", "Needs the latest numbers, ✔ soon."]
+_EPOCH = datetime(1970, 1, 1)
+
+
+def generate_todos(
+    count: int,
+    seed: int = 0,
+    start: datetime = datetime(2024, 1, 1),
+    span: timedelta = timedelta(days=365),
+    completed_ratio: float = 0.3,
+    list_id: str = DEFAULT_LIST_ID,
+) -> Iterator[Todo]:
+    """Generate reproducible synthetic todo items.
+
+    The same arguments always produce the same items, IDs included. Items
+    are created at evenly spaced moments, so their time-ordered IDs ascend.
+
+    Parameters
+    ----------
+    count : int
+        The number of items.
+    seed : int, optional
+        The random seed, by default 0.
+    start : datetime, optional
+        The creation time of the first item, by default 2024-01-01.
+    span : timedelta, optional
+        The period over which the items are created, by default one year.
+    completed_ratio : float, optional
+        The expected share of completed items, by default 0.3.
+    list_id : str, optional
+        The list of the items, by default `DEFAULT_LIST_ID`.
+
+    Yields
+    ------
+    Todo
+        The generated todo items.
+    """
+    rng = random.Random(seed)
+    step = span / max(count, 1)
+    created_at = start
+    # Naive times are taken as UTC so that IDs do not depend on the local time zone.
+    generate_id = TimeOrderedIdGenerator(
+        clock=lambda: (created_at - _EPOCH) // timedelta(microseconds=1) * 1000, random=rng.randbytes
+    )
+    for i in range(count):
+        created_at = start + step * i
+        title = f"{rng.choice(_VERBS)} {rng.choice(_OBJECTS)} {rng.choice(_QUALIFIERS)}".strip()
+        yield Todo(
+            title=f"{title} #{rng.randrange(10 * count)}",
+            id=generate_id(),
+            description=rng.choice(_DESCRIPTIONS),
+            completed=rng.random() < completed_ratio,
+            created_at=created_at,
+            list_id=list_id,
+        )
+
+
+def write_dataset(path: str, fmt: str, todos: Iterable[Todo]) -> int:
+    """Write todo items to a file in one of the persistence formats.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+    fmt : str
+        One of `DATASET_FORMATS`.
+    todos : Iterable[Todo]
+        The todo items to write.
+
+    Returns
+    -------
+    int
+        The number of items written.
+
+    Raises
+    ------
+    ValueError
+        If the format is unknown.
+    """
+    items: List[Todo] = list(todos)
+    if fmt == "store":
+        with open(path, "wb") as f:
+            f.write(get_todo_codec().encode_todos(items))
+    elif fmt == "changes":
+        ChangeLog(path).reset(items)
+    elif fmt in FORMATS:
+        with open(path, "w", encoding="utf-8") as f:
+            write_chunks(f, fmt, (serialize_chunk(fmt, rows) for rows in todos_to_chunks(items)))
+    else:
+        raise ValueError(f"Unknown dataset format '{fmt}'. Choose one of {', '.join(DATASET_FORMATS)}.")
+    return len(items)
+
+
+@click.command()
+@click.argument("path", type=click.Path(dir_okay=False, writable=True))
+@click.option("--count", "-n", type=click.IntRange(min=0), default=100_000, show_default=True, help="Number of items.")
+@click.option("--seed", type=int, default=0, show_default=True, help="Random seed.")
+@click.option(
+    "--format",
+    "-f",
+    "fmt",
+    type=click.Choice(DATASET_FORMATS),
+    default="store",
+    show_default=True,
+    help="Persistence format.",
+)
+@click.option("--list", "list_id", default=DEFAULT_LIST_ID, show_default=True, help="List ID of the items.")
+def main(path: str, count: int, seed: int, fmt: str, list_id: str):
+    """Write a synthetic todo dataset to PATH."""
+    written = write_dataset(path, fmt, generate_todos(count, seed=seed, list_id=list_id))
+    click.echo(f"Wrote {written} todo items to {path}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+import time
+from typing import Callable, List
+
+import click
+
+from benchmarks.datagen import generate_todos
+from core.codec import CODECS, get_todo_codec, todo_from_dict, todo_to_dict
+from core.entities import Todo
+from core.json_repository import JsonTodoRepository
+
+
+def timed(action: Callable[[], object]) -> float:
+    """Return the wall-clock seconds an action takes.
+
+    Parameters
+    ----------
+    action : Callable[[], object]
+        The action to time.
+
+    Returns
+    -------
+    float
+        The elapsed time in seconds.
+    """
+    started = time.perf_counter()
+    action()
+    return time.perf_counter() - started
+
+
+def _save_legacy(path: str, todos: List[Todo]) -> None:
+    # The format and code path used before the codec layer.
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([todo_to_dict(todo) for todo in todos], f, indent=4, ensure_ascii=False)
+
+
+def _load_legacy(path: str) -> List[Todo]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [todo_from_dict(item) for item in json.load(f)]
+
+
+@click.command()
+@click.option("--count", "-n", type=click.IntRange(min=1), default=100_000, show_default=True, help="Items per file.")
+@click.option("--repeat", type=click.IntRange(min=1), default=3, show_default=True, help="Best of this many runs.")
+def main(count: int, repeat: int):
+    """Measure load and save throughput of the JSON store with every installed codec."""
+    todos = list(generate_todos(count))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "todos.json")
+        rows = [("legacy json, indent=4", lambda: _save_legacy(path, todos), lambda: _load_legacy(path))]
+        for name, codec in CODECS.items():
+            if not codec.available:
+                click.echo(f"{name}: not installed")
+                continue
+            repo = JsonTodoRepository(file_path=path, codec=get_todo_codec(name))
+            repo.todos = {todo.id: todo for todo in todos}
+            rows.append((name, repo._save_todos, repo._load_todos))
+
+        click.echo(f"{'codec':<22} {'save items/s':>14} {'load items/s':>14} {'file MB':>9}")
+        for name, save, load in rows:
+            save_time = min(timed(save) for _ in range(repeat))
+            load_time = min(timed(load) for _ in range(repeat))
+            size = os.path.getsize(path) / 2**20
+            click.echo(f"{name:<22} {count / save_time:>14,.0f} {count / load_time:>14,.0f} {size:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
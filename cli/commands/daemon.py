@@ -0,0 +1,113 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import click
+from rich.console import Console
+
+from cli.dependencies.dependencies import DEFAULT_SOCKET_PATH, DEFAULT_STORE_PATH
+from core.json_repository import JsonTodoRepository
+from core.partitioning import PartitionRegistry, list_file_path
+from core.remote_repository import TodoRepositoryServer, connect_remote_repository
+
+console = Console()
+
+TIMEOUT = 10.0
+# Changes are written to the JSON files at most this many seconds after they
+# are made, so a scripted burst of commands rewrites each file once.
+SAVE_DELAY = 1.0
+
+
+def _is_running() -> bool:
+    repo = connect_remote_repository(DEFAULT_SOCKET_PATH)
+    if repo is None:
+        return False
+    repo.close()
+    return True
+
+
+@click.group()
+def daemon():
+    """Keep the todo store loaded in a background process."""
+    pass
+
+
+@daemon.command()
+def run():
+    """Serve the todo store in the foreground until stopped."""
+    if _is_running():
+        console.print(f"[yellow]The todo daemon is already running on {DEFAULT_SOCKET_PATH}.[/yellow]")
+        return
+    if os.path.exists(DEFAULT_SOCKET_PATH):
+        # Left behind by a daemon that did not shut down cleanly.
+        os.unlink(DEFAULT_SOCKET_PATH)
+
+    def open_list(list_id: str) -> JsonTodoRepository:
+        return JsonTodoRepository(file_path=list_file_path(DEFAULT_STORE_PATH, list_id), save_delay=SAVE_DELAY)
+
+    lists = PartitionRegistry(open_list, idle_timeout=None)
+    server = TodoRepositoryServer(DEFAULT_SOCKET_PATH, lists.get)
+    # The handler runs on this thread, which is busy in `serve_forever`; waiting
+    # for the loop to stop here would never return.
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown, daemon=True).start())
+    console.print(f"[green]Serving todos on {DEFAULT_SOCKET_PATH}.[/green]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for repo in lists.loaded().values():
+            repo.flush()
+
+
+@daemon.command()
+def start():
+    """Start the daemon in the background."""
+    if _is_running():
+        console.print(f"[yellow]The todo daemon is already running on {DEFAULT_SOCKET_PATH}.[/yellow]")
+        return
+    subprocess.Popen(
+        [sys.executable, "-m", "cli.main", "daemon", "run"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        if _is_running():
+            console.print(f"[green]Todo daemon started on {DEFAULT_SOCKET_PATH}.[/green]")
+            return
+        time.sleep(0.05)
+    console.print("[red]Error:[/red] The todo daemon did not start.")
+
+
+@daemon.command()
+def stop():
+    """Stop the background daemon."""
+    repo = connect_remote_repository(DEFAULT_SOCKET_PATH)
+    if repo is None:
+        console.print("[yellow]The todo daemon is not running.[/yellow]")
+        return
+    try:
+        repo.call("shutdown")
+    finally:
+        repo.close()
+    # The daemon removes its socket once it has finished the requests in progress.
+    deadline = time.monotonic() + TIMEOUT
+    while os.path.exists(DEFAULT_SOCKET_PATH) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    console.print("[green]Todo daemon stopped.[/green]")
+
+
+@daemon.command()
+def status():
+    """Show whether the daemon is running."""
+    if _is_running():
+        console.print(f"[green]The todo daemon is running on {DEFAULT_SOCKET_PATH}.[/green]")
+    else:
+        console.print("[yellow]The todo daemon is not running.[/yellow]")
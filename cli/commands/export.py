@@ -0,0 +1,43 @@
+from typing import Optional
+
+import click
+from rich.console import Console
+
+from cli.dependencies.dependencies import CLIDependencies
+from core.transfer import DEFAULT_CHUNK_SIZE, FORMATS, detect_format
+
+console = Console(stderr=True)
+
+
+pass_dependencies = click.make_pass_decorator(CLIDependencies, ensure=True)
+
+
+@click.command()
+@click.argument("destination", type=click.Path(allow_dash=True, dir_okay=False))
+@click.option("--format", "-f", "fmt", type=click.Choice(FORMATS), help="Output format (inferred from the extension).")
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_CHUNK_SIZE,
+    show_default=True,
+    help="Items serialized per worker task.",
+)
+@click.option("--workers", "-w", type=click.IntRange(min=1), help="Worker processes (defaults to one per CPU).")
+@pass_dependencies
+def export(
+    dependencies: CLIDependencies,
+    destination: str,
+    fmt: Optional[str],
+    chunk_size: int,
+    workers: Optional[int],
+):
+    """Export all todo items to a CSV, TSV, NDJSON or JSON file ('-' for stdout)."""
+    try:
+        if fmt is None and destination == "-":
+            fmt = "ndjson"
+        fmt = fmt or detect_format(destination)
+        with click.open_file(destination, "w", encoding="utf-8") as stream:
+            count = dependencies.export_todos.execute(stream, fmt, chunk_size=chunk_size, workers=workers)
+        console.print(f"[green]Exported {count} todo items.[/green]")
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error:[/red] {e}")
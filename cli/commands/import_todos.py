@@ -0,0 +1,43 @@
+from typing import Optional
+
+import click
+from rich.console import Console
+
+from cli.dependencies.dependencies import CLIDependencies
+from core.transfer import DEFAULT_CHUNK_SIZE, FORMATS, detect_format
+
+console = Console(stderr=True)
+
+
+pass_dependencies = click.make_pass_decorator(CLIDependencies, ensure=True)
+
+
+@click.command(name="import")
+@click.argument("source", type=click.Path(allow_dash=True, dir_okay=False))
+@click.option("--format", "-f", "fmt", type=click.Choice(FORMATS), help="Input format (inferred from the extension).")
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_CHUNK_SIZE,
+    show_default=True,
+    help="Records parsed per worker task.",
+)
+@click.option("--workers", "-w", type=click.IntRange(min=1), help="Worker processes (defaults to one per CPU).")
+@pass_dependencies
+def import_todos(
+    dependencies: CLIDependencies,
+    source: str,
+    fmt: Optional[str],
+    chunk_size: int,
+    workers: Optional[int],
+):
+    """Import todo items from a CSV, TSV, NDJSON or JSON file ('-' for stdin)."""
+    try:
+        if fmt is None and source == "-":
+            fmt = "ndjson"
+        fmt = fmt or detect_format(source)
+        with click.open_file(source, "r", encoding="utf-8") as stream:
+            count = dependencies.import_todos.execute(stream, fmt, chunk_size=chunk_size, workers=workers)
+        console.print(f"[green]Imported {count} todo items.[/green]")
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error:[/red] {e}")
@@ -1,38 +1,81 @@
+from itertools import islice
+from typing import List, Optional
+
 import click
-from rich.console import Console
-from rich.table import Table
 
 from cli.dependencies.dependencies import CLIDependencies
+from core.entities import Todo
+from core.transfer import serialize_chunk, todos_to_chunks, write_chunks
 
-console = Console()
+OUTPUT_FORMATS = ("table", "json", "ndjson", "tsv")
 
 
 pass_dependencies = click.make_pass_decorator(CLIDependencies, ensure=True)
 
 
-@click.command()
-@pass_dependencies
-def list(dependencies: CLIDependencies):
-    """List all todo items."""
-    todos = dependencies.get_all_todos.execute()
+def _print_table(todos: List[Todo], page_size: int) -> None:
+    # Rich is only needed for the table, so machine-readable output never pays for importing it.
+    from rich import box
+    from rich.console import Console
+    from rich.table import Table
+    from rich.text import Text
+
+    console = Console()
     if not todos:
         console.print("[yellow]No todo items found.[/yellow]")
         return
 
-    table = Table(title="Todo List")
-    table.add_column("ID", style="cyan", no_wrap=True)
-    table.add_column("Title", style="magenta")
-    table.add_column("Description", style="white", justify="left")
-    table.add_column("Completed", style="green")
-    table.add_column("Created At", style="blue", no_wrap=True)
-
-    for todo in todos:
-        completed_status = "[green]✔[/green]" if todo.completed else "[red]✘[/red]"
-        table.add_row(
-            todo.id,
-            todo.title,
-            todo.description if todo.description else "",
-            completed_status,
-            todo.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+    done, not_done = Text("✔", style="green"), Text("✘", style="red")
+    # Fixed and proportional column widths make every page line up without
+    # measuring the rows of the other pages.
+    for start in range(0, len(todos), page_size):
+        table = Table(
+            title="Todo List" if start == 0 else None,
+            show_header=start == 0,
+            box=box.SIMPLE_HEAD,
+            show_edge=False,
+            expand=True,
         )
-    console.print(table)
+        table.add_column("ID", style="cyan", no_wrap=True, width=36)
+        table.add_column("Title", style="magenta", ratio=1)
+        table.add_column("Description", style="white", justify="left", ratio=2)
+        table.add_column("Completed", style="green", width=9)
+        table.add_column("Created At", style="blue", no_wrap=True, width=19)
+        for todo in todos[start : start + page_size]:
+            table.add_row(
+                todo.id,
+                todo.title,
+                todo.description if todo.description else "",
+                done if todo.completed else not_done,
+                todo.created_at.isoformat(sep=" ", timespec="seconds"),
+            )
+        console.print(table)
+
+
+@click.command()
+@click.option(
+    "--format",
+    "-f",
+    "fmt",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="table",
+    show_default=True,
+    help="Output format.",
+)
+@click.option("--offset", type=click.IntRange(min=0), default=0, help="Skip this many todo items.")
+@click.option("--limit", "-n", type=click.IntRange(min=0), help="Show at most this many todo items.")
+@click.option(
+    "--page-size", type=click.IntRange(min=1), default=100, show_default=True, help="Items rendered or written at once."
+)
+@pass_dependencies
+def list(dependencies: CLIDependencies, fmt: str, offset: int, limit: Optional[int], page_size: int):
+    """List all todo items."""
+    todos = dependencies.get_all_todos.execute()
+    if offset or limit is not None:
+        todos = [*islice(todos, offset, None if limit is None else offset + limit)]
+
+    if fmt == "table":
+        _print_table(todos, page_size)
+        return
+    with click.open_file("-", "w", encoding="utf-8") as stdout:
+        write_chunks(stdout, fmt, (serialize_chunk(fmt, rows) for rows in todos_to_chunks(todos, page_size)))
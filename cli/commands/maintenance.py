@@ -0,0 +1,53 @@
+from typing import Optional
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+from cli.dependencies.dependencies import CLIDependencies
+from core.maintenance import MaintenanceSettings, maintenance_jobs
+from core.scheduler import Scheduler
+
+console = Console()
+
+
+pass_dependencies = click.make_pass_decorator(CLIDependencies, ensure=True)
+
+
+@click.command()
+@click.option("--purge-days", type=click.FloatRange(min=0), help="Purge completed todos older than this many days.")
+@click.option("--snapshot", "snapshot_path", type=click.Path(dir_okay=False), help="Write a snapshot to this file.")
+@click.option("--compact/--no-compact", default=True, show_default=True, help="Compact the todo store.")
+@click.option("--time-budget", type=click.FloatRange(min=0), help="Seconds the purge may take before stopping early.")
+@pass_dependencies
+def maintenance(
+    dependencies: CLIDependencies,
+    purge_days: Optional[float],
+    snapshot_path: Optional[str],
+    compact: bool,
+    time_budget: Optional[float],
+):
+    """Run maintenance jobs (purge, compaction, snapshot) once."""
+    settings = MaintenanceSettings(
+        purge_completed_after_days=purge_days,
+        purge_time_budget=time_budget,
+        compact_interval=MaintenanceSettings.compact_interval if compact else None,
+        snapshot_path=snapshot_path,
+    )
+    scheduler = Scheduler(maintenance_jobs(lambda: {dependencies.list_id: dependencies.repo}, settings))
+    if not scheduler.jobs:
+        console.print("[yellow]No maintenance jobs selected.[/yellow]")
+        return
+    scheduler.run_all()
+
+    table = Table(title="Maintenance")
+    table.add_column("Job", style="cyan")
+    table.add_column("Result", style="magenta")
+    table.add_column("Duration", style="blue", justify="right")
+    for job in scheduler.jobs:
+        if job.metrics.failures:
+            result = f"[red]{job.metrics.last_error}[/red]"
+        else:
+            result = "" if job.metrics.last_result is None else str(job.metrics.last_result)
+        table.add_row(job.name, result, f"{job.metrics.last_duration:.3f}s")
+    console.print(table)
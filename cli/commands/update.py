@@ -25,16 +25,19 @@ def update(
     completed: Optional[bool],
 ):
     """Update an existing todo item."""
-    if not any([title, description, completed]):
+    fields = {
+        name: value
+        for name, value in (("title", title), ("description", description), ("completed", completed))
+        if value is not None
+    }
+    if not fields:
         console.print(
             "[yellow]No update parameters provided. "
             "Use --title, --description, or --completed/--not-completed.[/yellow]"
         )
         return
     try:
-        updated_todo = dependencies.update_todo.execute(
-            todo_id=todo_id, title=title, description=description, completed=completed
-        )
+        updated_todo = dependencies.patch_todo.execute(todo_id, fields)
         console.print(f"[green]Todo updated:[/green] ID=[cyan]{updated_todo.id}[/cyan], Title='{updated_todo.title}'")
     except ValueError as e:
         console.print(f"[red]Error:[/red] {e}")
@@ -1,16 +1,35 @@
-from rich.console import Console
-
+from core.entities import DEFAULT_LIST_ID
 from core.json_repository import JsonTodoRepository
-from core.use_cases import CreateTodo, DeleteTodo, GetAllTodos, GetTodoById, UpdateTodo
+from core.partitioning import list_file_path
+from core.remote_repository import connect_remote_repository
+from core.use_cases import (
+    CreateTodo,
+    DeleteTodo,
+    ExportTodos,
+    GetAllTodos,
+    GetTodoById,
+    ImportTodos,
+    PatchTodo,
+    UpdateTodo,
+)
 
-console = Console()
+DEFAULT_STORE_PATH = "todos.json"
+DEFAULT_SOCKET_PATH = "todos.sock"
 
 
 class CLIDependencies:
-    def __init__(self):
-        self.repo = JsonTodoRepository()
-        self.create_todo = CreateTodo(todo_repo=self.repo)
+    def __init__(self, list_id: str = DEFAULT_LIST_ID):
+        # Each list lives in its own file, so only the selected list is loaded.
+        self.list_id = list_id
+        # A running `todo daemon` already has the store loaded; otherwise read the file directly.
+        self.repo = connect_remote_repository(DEFAULT_SOCKET_PATH, list_id) or JsonTodoRepository(
+            file_path=list_file_path(DEFAULT_STORE_PATH, list_id)
+        )
+        self.create_todo = CreateTodo(todo_repo=self.repo, list_id=list_id)
         self.get_all_todos = GetAllTodos(todo_repo=self.repo)
         self.get_todo_by_id = GetTodoById(todo_repo=self.repo)
         self.update_todo = UpdateTodo(todo_repo=self.repo)
+        self.patch_todo = PatchTodo(todo_repo=self.repo)
         self.delete_todo = DeleteTodo(todo_repo=self.repo)
+        self.import_todos = ImportTodos(todo_repo=self.repo, list_id=list_id)
+        self.export_todos = ExportTodos(todo_repo=self.repo)
@@ -1,30 +1,66 @@
+import importlib
+from typing import Any, List, Mapping, Optional
+
 import click
-from rich.console import Console
 
-from cli.commands.add import add
-from cli.commands.delete import delete
-from cli.commands.get import get
-from cli.commands.list import list
-from cli.commands.update import update
 from cli.dependencies.dependencies import CLIDependencies
+from core.entities import DEFAULT_LIST_ID
+from core.partitioning import validate_list_id
 
-console = Console()
+pass_dependencies = click.make_pass_decorator(CLIDependencies, ensure=True)
 
+# Commands are imported on first use, so e.g. `list --format json` never loads
+# Rich or the modules of the other commands.
+COMMANDS = {
+    "add": "cli.commands.add:add",
+    "list": "cli.commands.list:list",
+    "get": "cli.commands.get:get",
+    "update": "cli.commands.update:update",
+    "delete": "cli.commands.delete:delete",
+    "import": "cli.commands.import_todos:import_todos",
+    "export": "cli.commands.export:export",
+    "maintenance": "cli.commands.maintenance:maintenance",
+    "daemon": "cli.commands.daemon:daemon",
+}
 
-pass_dependencies = click.make_pass_decorator(CLIDependencies, ensure=True)
 
+class LazyGroup(click.Group):
+    def __init__(self, *args: Any, lazy_commands: Mapping[str, str], **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands)
 
-@click.group()
-def cli():
-    """A simple Todo CLI application."""
-    pass
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return [*self.lazy_commands, *super().list_commands(ctx)]
 
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name not in self.lazy_commands:
+            return super().get_command(ctx, cmd_name)
+        module_name, attribute = self.lazy_commands[cmd_name].split(":")
+        return getattr(importlib.import_module(module_name), attribute)
 
-cli.add_command(add)
-cli.add_command(list)
-cli.add_command(get)
-cli.add_command(update)
-cli.add_command(delete)
+
+def _validate_list_id(ctx: click.Context, param: click.Parameter, value: str) -> str:
+    try:
+        return validate_list_id(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+@click.option(
+    "--list",
+    "list_id",
+    default=DEFAULT_LIST_ID,
+    show_default=True,
+    callback=_validate_list_id,
+    help="The todo list to work on.",
+)
+@click.pass_context
+def cli(ctx: click.Context, list_id: str):
+    """A simple Todo CLI application."""
+    # The daemon commands manage the store themselves.
+    if ctx.invoked_subcommand != "daemon":
+        ctx.obj = CLIDependencies(list_id=list_id)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,374 @@
+import gc
+import json
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Type
+
+from core.entities import DEFAULT_LIST_ID, Todo
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+# Every writer stores these; only `list_id` may be missing, in older files.
+_REQUIRED_FIELDS = ("id", "title", "description", "completed", "created_at")
+
+
+def parse_created_at(value: str) -> datetime:
+    """Parse a stored creation time, the same way in every codec.
+
+    Parameters
+    ----------
+    value : str
+        An ISO 8601 date and time, as written by `datetime.isoformat`.
+
+    Returns
+    -------
+    datetime
+        The naive local time. Times with a UTC offset are converted, so that
+        they can be compared with all other stored times.
+
+    Raises
+    ------
+    ValueError
+        If the value is not an ISO 8601 date and time, e.g. a date only.
+    """
+    if len(value) < 16 or value[10] != "T":
+        raise ValueError(f"Invalid created_at {value!r}, expected an ISO 8601 date and time.")
+    created_at = datetime.fromisoformat(value)
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone().replace(tzinfo=None)
+    return created_at
+
+
+def todo_to_dict(todo: Todo) -> Dict[str, Any]:
+    """Convert a todo item to a JSON-serializable dictionary.
+
+    Parameters
+    ----------
+    todo : Todo
+        The todo item to convert.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The todo item's fields, with `created_at` in ISO 8601 format.
+    """
+    return {
+        "id": str(todo.id),
+        "title": todo.title,
+        "description": todo.description,
+        "completed": todo.completed,
+        "created_at": todo.created_at.isoformat(),
+        "list_id": todo.list_id,
+    }
+
+
+def todo_from_dict(item: Mapping[str, Any]) -> Todo:
+    """Convert a dictionary produced by `todo_to_dict` back to a todo item.
+
+    Parameters
+    ----------
+    item : Mapping[str, Any]
+        The todo item's fields. A missing `list_id` means the default list.
+
+    Returns
+    -------
+    Todo
+        The todo item.
+
+    Raises
+    ------
+    ValueError
+        If a field is missing or has the wrong type.
+    """
+    if not isinstance(item, Mapping):
+        raise ValueError(f"Expected a todo item object, got {type(item).__name__}.")
+    missing = [name for name in _REQUIRED_FIELDS if name not in item]
+    if missing:
+        raise ValueError(f"Todo item is missing fields: {', '.join(missing)}.")
+    todo_id, title, description = item["id"], item["title"], item["description"]
+    completed, created_at = item["completed"], item["created_at"]
+    list_id = item.get("list_id", DEFAULT_LIST_ID)
+    if not (
+        isinstance(todo_id, str)
+        and isinstance(title, str)
+        and (description is None or isinstance(description, str))
+        and isinstance(completed, bool)
+        and isinstance(created_at, str)
+        and isinstance(list_id, str)
+    ):
+        raise ValueError(f"Todo item {todo_id!r} has a field of the wrong type.")
+    return Todo(
+        id=todo_id,
+        title=title,
+        description=description,
+        completed=completed,
+        created_at=parse_created_at(created_at),
+        list_id=list_id,
+    )
+
+
+def _todos_from_dicts(items: Any) -> List[Todo]:
+    if not isinstance(items, list):
+        raise ValueError(f"Expected an array of todo items, got {type(items).__name__}.")
+    return [todo_from_dict(item) for item in items]
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    # Decoding allocates many objects but no reference cycles, so the cyclic
+    # garbage collector would only slow it down.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class TodoCodec(ABC):
+    """Encodes todo items as JSON and decodes them again.
+
+    All codecs produce the same documents, with `created_at` in ISO 8601
+    format, so each one reads what the others wrote. They are equally strict:
+    a missing field, other than `list_id`, or a field of the wrong type fails
+    the whole decode.
+    """
+
+    name: str
+    available: bool
+
+    @abstractmethod
+    def encode_todos(self, todos: Iterable[Todo]) -> bytes:
+        """Encode todo items as a JSON array.
+
+        Parameters
+        ----------
+        todos : Iterable[Todo]
+            The todo items to encode.
+
+        Returns
+        -------
+        bytes
+            The UTF-8 encoded array.
+        """
+        pass
+
+    @abstractmethod
+    def decode_todos(self, data: bytes) -> List[Todo]:
+        """Decode a JSON array of todo items.
+
+        Parameters
+        ----------
+        data : bytes
+            The UTF-8 encoded array.
+
+        Returns
+        -------
+        List[Todo]
+            The decoded todo items.
+
+        Raises
+        ------
+        ValueError
+            If the data is not a valid array of todo items.
+        """
+        pass
+
+
+class StdlibTodoCodec(TodoCodec):
+    """A codec based on the standard library's `json` module, always available."""
+
+    name = "json"
+    available = True
+
+    def encode_todos(self, todos: Iterable[Todo]) -> bytes:
+        """Encode todo items as a JSON array.
+
+        Parameters
+        ----------
+        todos : Iterable[Todo]
+            The todo items to encode.
+
+        Returns
+        -------
+        bytes
+            The UTF-8 encoded array.
+        """
+        return json.dumps([todo_to_dict(todo) for todo in todos], ensure_ascii=False).encode("utf-8")
+
+    def decode_todos(self, data: bytes) -> List[Todo]:
+        """Decode a JSON array of todo items.
+
+        Parameters
+        ----------
+        data : bytes
+            The UTF-8 encoded array.
+
+        Returns
+        -------
+        List[Todo]
+            The decoded todo items.
+        """
+        with _gc_paused():
+            return _todos_from_dicts(json.loads(data))
+
+
+class OrjsonTodoCodec(TodoCodec):
+    """A codec based on orjson, which encodes `Todo` dataclasses natively.
+
+    Decoding still goes through one dictionary per item.
+    """
+
+    name = "orjson"
+    available = orjson is not None
+
+    def encode_todos(self, todos: Iterable[Todo]) -> bytes:
+        """Encode todo items as a JSON array.
+
+        Parameters
+        ----------
+        todos : Iterable[Todo]
+            The todo items to encode.
+
+        Returns
+        -------
+        bytes
+            The UTF-8 encoded array.
+        """
+        return orjson.dumps(list(todos))
+
+    def decode_todos(self, data: bytes) -> List[Todo]:
+        """Decode a JSON array of todo items.
+
+        Parameters
+        ----------
+        data : bytes
+            The UTF-8 encoded array.
+
+        Returns
+        -------
+        List[Todo]
+            The decoded todo items.
+        """
+        with _gc_paused():
+            return _todos_from_dicts(orjson.loads(data))
+
+
+if msgspec is not None:
+
+    class _TodoRecord(msgspec.Struct, gc=False):
+        # Decoding into `Todo` itself would fill in missing fields from its
+        # defaults, e.g. a new ID; these fields are required like in `todo_from_dict`.
+        # `created_at` goes through `parse_created_at`, like in the other codecs.
+        id: str
+        title: str
+        description: Optional[str]
+        completed: bool
+        created_at: str
+        list_id: str = DEFAULT_LIST_ID
+
+
+class MsgspecTodoCodec(TodoCodec):
+    """A codec based on msgspec, which decodes into lightweight structs.
+
+    Field types are validated while parsing, without building intermediate
+    dictionaries.
+    """
+
+    name = "msgspec"
+    available = msgspec is not None
+
+    def __init__(self):
+        """Initialize the codec with a reusable encoder and decoder."""
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder(List[_TodoRecord])
+
+    def encode_todos(self, todos: Iterable[Todo]) -> bytes:
+        """Encode todo items as a JSON array.
+
+        Parameters
+        ----------
+        todos : Iterable[Todo]
+            The todo items to encode.
+
+        Returns
+        -------
+        bytes
+            The UTF-8 encoded array.
+        """
+        return self._encoder.encode(list(todos))
+
+    def decode_todos(self, data: bytes) -> List[Todo]:
+        """Decode a JSON array of todo items.
+
+        Parameters
+        ----------
+        data : bytes
+            The UTF-8 encoded array.
+
+        Returns
+        -------
+        List[Todo]
+            The decoded todo items.
+        """
+        with _gc_paused():
+            return [
+                Todo(
+                    id=record.id,
+                    title=record.title,
+                    description=record.description,
+                    completed=record.completed,
+                    created_at=parse_created_at(record.created_at),
+                    list_id=record.list_id,
+                )
+                for record in self._decoder.decode(data)
+            ]
+
+
+# In order of preference.
+CODECS: Dict[str, Type[TodoCodec]] = {
+    codec.name: codec for codec in (MsgspecTodoCodec, OrjsonTodoCodec, StdlibTodoCodec)
+}
+
+_instances: Dict[str, TodoCodec] = {}
+
+
+def get_todo_codec(name: Optional[str] = None) -> TodoCodec:
+    """Return a codec by name, or the fastest one installed.
+
+    Parameters
+    ----------
+    name : Optional[str], optional
+        One of the keys of `CODECS`, by default None for the first available
+        one: msgspec, then orjson, then the standard library.
+
+    Returns
+    -------
+    TodoCodec
+        The codec. Codecs are stateless and shared.
+
+    Raises
+    ------
+    ValueError
+        If the codec is unknown or its library is not installed.
+    """
+    if name is None:
+        name = next(codec.name for codec in CODECS.values() if codec.available)
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON codec '{name}'. Choose one of {', '.join(CODECS)}.")
+    if not CODECS[name].available:
+        raise ValueError(f"The JSON codec '{name}' is not installed.")
+    if name not in _instances:
+        _instances[name] = CODECS[name]()
+    return _instances[name]
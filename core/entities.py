@@ -1,8 +1,11 @@
-import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
 
+from core.ids import new_todo_id
+
+DEFAULT_LIST_ID = "default"
+
 
 @dataclass
 class Todo:
@@ -13,17 +16,25 @@ class Todo:
     title : str
         The title of the todo item.
     id : str
-        A unique identifier for the todo item, generated automatically.
+        A unique identifier for the todo item. Generated IDs are time-ordered
+        UUIDs, so sorting by ID sorts by creation.
     description : Optional[str], optional
         An optional description for the todo item, by default None.
     completed : bool, optional
         Indicates whether the todo item is completed, by default False.
     created_at : datetime, optional
         The timestamp when the todo item was created, generated automatically.
+    list_id : str, optional
+        The ID of the todo list (tenant) the item belongs to, by default
+        `DEFAULT_LIST_ID`.
     """
 
     title: str
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=new_todo_id)
     description: Optional[str] = None
     completed: bool = False
     created_at: datetime = field(default_factory=datetime.now)
+    list_id: str = DEFAULT_LIST_ID
+
+
+PATCHABLE_FIELDS = frozenset({"title", "description", "completed"})
@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Callable, Iterable, List, Optional
+
+_COUNTER_MAX = 0xFFF
+_RANDOM_MASK = (1 << 62) - 1
+
+
+class TimeOrderedIdGenerator:
+    """Generates UUIDv7 strings (RFC 9562) that sort in the order they were generated.
+
+    An ID starts with the Unix time in milliseconds, followed by a 12-bit
+    counter and 62 random bits. The counter starts at a random value below
+    2048 every millisecond and is incremented for every further ID in the same
+    millisecond, so IDs are strictly increasing within a process, even if the
+    clock steps back. Because the hex digits of the canonical string sort like
+    the underlying bytes, the strings themselves sort by creation time.
+    """
+
+    def __init__(self, clock: Callable[[], int] = time.time_ns, random: Callable[[int], bytes] = os.urandom):
+        """Initialize the generator.
+
+        Parameters
+        ----------
+        clock : Callable[[], int], optional
+            Returns the current Unix time in nanoseconds, by default
+            `time.time_ns`.
+        random : Callable[[int], bytes], optional
+            Returns the given number of random bytes, by default `os.urandom`.
+            A seeded source makes the generated IDs reproducible.
+        """
+        self._clock = clock
+        self._random = random
+        self._lock = threading.Lock()
+        self._millis = -1
+        self._counter = 0
+
+    def __call__(self) -> str:
+        """Generate the next ID.
+
+        Returns
+        -------
+        str
+            The ID in canonical UUID format.
+        """
+        random = int.from_bytes(self._random(10), "big")
+        with self._lock:
+            millis = self._clock() // 1_000_000
+            if millis > self._millis:
+                self._millis = millis
+                self._counter = random >> 69
+            elif self._counter < _COUNTER_MAX:
+                self._counter += 1
+            else:
+                # The counter is exhausted; borrow the next millisecond.
+                self._millis += 1
+                self._counter = 0
+            millis, counter = self._millis, self._counter
+        value = millis << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | random & _RANDOM_MASK
+        digits = f"{value:032x}"
+        return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+
+# The process-wide generator of todo IDs, used as the default for `Todo.id`.
+new_todo_id = TimeOrderedIdGenerator()
+
+
+class SortedIdIndex:
+    """The IDs of a repository in sorted order, for range scans by ID.
+
+    With time-ordered IDs, sorted order is creation order and new items are
+    appended at the end in constant time. Other IDs, e.g. imported random
+    UUIDs, are inserted at their position.
+    """
+
+    def __init__(self, ids: Iterable[str] = ()):
+        """Build the index.
+
+        Parameters
+        ----------
+        ids : Iterable[str], optional
+            The IDs to index, by default none.
+        """
+        self._ids: List[str] = sorted(ids)
+
+    def __len__(self) -> int:
+        """Return the number of indexed IDs."""
+        return len(self._ids)
+
+    def add(self, todo_id: str) -> None:
+        """Add an ID unless it is indexed already.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID to add.
+        """
+        ids = self._ids
+        if not ids or todo_id > ids[-1]:
+            ids.append(todo_id)
+            return
+        position = bisect_left(ids, todo_id)
+        if ids[position] != todo_id:
+            ids.insert(position, todo_id)
+
+    def add_many(self, todo_ids: Iterable[str]) -> None:
+        """Add several IDs, skipping those indexed already.
+
+        Parameters
+        ----------
+        todo_ids : Iterable[str]
+            The IDs to add.
+        """
+        added = sorted(todo_ids)
+        if not added:
+            return
+        if not self._ids or added[0] > self._ids[-1]:
+            self._ids.extend(todo_id for i, todo_id in enumerate(added) if i == 0 or todo_id != added[i - 1])
+        elif len(added) <= 64:
+            for todo_id in added:
+                self.add(todo_id)
+        else:
+            # One sort is cheaper than many insertions into the middle.
+            self._ids = sorted({*self._ids, *added})
+
+    def discard(self, todo_id: str) -> None:
+        """Remove an ID if it is indexed.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID to remove.
+        """
+        position = bisect_left(self._ids, todo_id)
+        if position < len(self._ids) and self._ids[position] == todo_id:
+            del self._ids[position]
+
+    def after(self, cursor: Optional[str], limit: int) -> List[str]:
+        """Return the IDs following a cursor.
+
+        Parameters
+        ----------
+        cursor : Optional[str]
+            Return IDs greater than this one, by default from the start.
+        limit : int
+            The maximum number of IDs to return.
+
+        Returns
+        -------
+        List[str]
+            The IDs, in ascending order.
+        """
+        start = 0 if cursor is None else bisect_right(self._ids, cursor)
+        return self._ids[start : start + limit]
@@ -1,7 +1,16 @@
+import os
+import time
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from contextlib import contextmanager
+from dataclasses import replace
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional
 
-from core.entities import Todo
+from core.entities import PATCHABLE_FIELDS, Todo
+from core.transfer import detect_format, serialize_chunk, todos_to_chunks, write_chunks
+
+# Purges check their deadline after deleting this many items.
+PURGE_BATCH_SIZE = 1000
 
 
 class TodoRepository(ABC):
@@ -27,6 +36,25 @@ class TodoRepository(ABC):
         """
         pass
 
+    def create_many(self, todos: Iterable[Todo]) -> List[Todo]:
+        """Create many todo items in a single bulk operation.
+
+        The default implementation calls `create` for every item. Backends
+        that can persist a batch more cheaply than item by item should
+        override it.
+
+        Parameters
+        ----------
+        todos : Iterable[Todo]
+            The todo items to be created. The iterable is consumed lazily.
+
+        Returns
+        -------
+        List[Todo]
+            The created todo items.
+        """
+        return [self.create(todo) for todo in todos]
+
     @abstractmethod
     def get_all(self) -> List[Todo]:
         """Retrieve all todo items from the repository.
@@ -54,6 +82,32 @@ class TodoRepository(ABC):
         """
         pass
 
+    def list_page(self, after: Optional[str] = None, limit: int = 100) -> List[Todo]:
+        """Retrieve a page of todo items in ID order, starting after a cursor.
+
+        Generated IDs are time-ordered, so ID order is creation order and the
+        last ID of a page is the cursor of the next one. The default
+        implementation sorts `get_all`; backends that keep their IDs sorted
+        should override it.
+
+        Parameters
+        ----------
+        after : Optional[str], optional
+            Return items with IDs greater than this one, by default from the
+            first item.
+        limit : int, optional
+            The maximum number of items to return, by default 100.
+
+        Returns
+        -------
+        List[Todo]
+            The todo items, in ascending ID order.
+        """
+        todos = sorted(self.get_all(), key=lambda todo: todo.id)
+        if after is not None:
+            todos = [todo for todo in todos if todo.id > after]
+        return todos[:limit]
+
     @abstractmethod
     def update(self, todo: Todo) -> Todo:
         """Update an existing todo item in the repository.
@@ -70,6 +124,37 @@ class TodoRepository(ABC):
         """
         pass
 
+    def patch(self, todo_id: str, fields: Mapping[str, Any]) -> Todo:
+        """Change selected fields of an existing todo item.
+
+        The default implementation is a read-modify-write through `get_by_id`
+        and `update`. Backends that can change single fields in place should
+        override it.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to change.
+        fields : Mapping[str, Any]
+            The new values, keyed by field name. Only fields listed in
+            `PATCHABLE_FIELDS` may be changed.
+
+        Returns
+        -------
+        Todo
+            The changed todo item.
+
+        Raises
+        ------
+        ValueError
+            If the todo item is not found or a field cannot be patched.
+        """
+        check_patch_fields(fields)
+        todo = self.get_by_id(todo_id)
+        if todo is None:
+            raise ValueError(f"Todo with ID {todo_id} not found.")
+        return self.update(replace(todo, **fields))
+
     @abstractmethod
     def delete(self, todo_id: str) -> None:
         """Delete a todo item from the repository by its ID.
@@ -84,3 +169,336 @@ class TodoRepository(ABC):
         None
         """
         pass
+
+    def purge_completed(
+        self, older_than: datetime, limit: Optional[int] = None, deadline: Optional[float] = None
+    ) -> List[str]:
+        """Delete completed todo items created before a point in time.
+
+        This is a maintenance hook. Matching items are selected with a single
+        scan and deleted in batches of `PURGE_BATCH_SIZE`. The default
+        implementation scans `get_all` and calls `delete` for every match.
+
+        Parameters
+        ----------
+        older_than : datetime
+            Completed todo items created before this moment are deleted.
+        limit : Optional[int], optional
+            The maximum number of items to delete in this call, by default no
+            limit.
+        deadline : Optional[float], optional
+            A `time.monotonic` value after which no further batch is started, by
+            default no deadline.
+
+        Returns
+        -------
+        List[str]
+            The IDs of the deleted todo items.
+        """
+        purged = []
+        for batch in purge_batches(self.get_all(), older_than, limit, deadline):
+            for todo_id in batch:
+                self.delete(todo_id)
+            purged.extend(batch)
+        return purged
+
+    def compact(self) -> None:
+        """Reclaim space left behind by deleted or changed todo items.
+
+        This is a maintenance hook. The default implementation does nothing.
+        """
+        pass
+
+    def snapshot(self, path: str) -> int:
+        """Write a point-in-time copy of all todo items to a file.
+
+        This is a maintenance hook. The file format is chosen from the extension
+        of `path`, so snapshots can be restored with `ImportTodos`. The file is
+        written to a temporary path first and then atomically moved in place.
+
+        Parameters
+        ----------
+        path : str
+            The path of the snapshot file.
+
+        Returns
+        -------
+        int
+            The number of todo items written.
+        """
+        fmt = detect_format(path)
+        todos = self.get_all()
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            write_chunks(f, fmt, (serialize_chunk(fmt, rows) for rows in todos_to_chunks(todos)))
+        os.replace(temporary_path, path)
+        return len(todos)
+
+    @contextmanager
+    def transaction(self) -> Iterator["TodoTransaction"]:
+        """Run several operations as one unit that is committed at the end.
+
+        Reads inside the transaction see each item as it was when the
+        transaction first read it, plus the transaction's own writes. Writes
+        are buffered and committed together when the `with` block exits; if
+        the block raises, they are discarded. The commit fails if another
+        writer changed an item the transaction writes after the transaction
+        read it (first committer wins).
+
+        Stored items must not be mutated in place; use `update` or `patch`.
+
+        Yields
+        ------
+        TodoTransaction
+            The transaction, which is itself a `TodoRepository`.
+
+        Raises
+        ------
+        TransactionConflictError
+            If a written item was changed by another writer in the meantime.
+        """
+        transaction = TodoTransaction(self)
+        yield transaction
+        self._commit_transaction(transaction)
+
+    def _commit_transaction(self, transaction: "TodoTransaction") -> None:
+        # Backends that keep their items in a dict override this to validate
+        # and apply the writes in one step and persist them with one flush.
+        transaction.validate(self.get_by_id)
+        for todo_id, todo in transaction.writes.items():
+            if todo is None:
+                if transaction.base[todo_id] is not None:
+                    self.delete(todo_id)
+            elif transaction.base[todo_id] is None:
+                self.create(todo)
+            else:
+                self.update(todo)
+
+
+class TransactionConflictError(ValueError):
+    """Raised when a transaction writes an item that was changed since the transaction read it."""
+
+
+class TodoTransaction(TodoRepository):
+    """The buffered writes and read versions of a `TodoRepository.transaction`.
+
+    Items are read from the source repository on first access and then kept,
+    so repeated reads are stable. `base` holds the version of every written
+    item as first read (None if it did not exist); the commit checks that the
+    source still holds those versions.
+    """
+
+    def __init__(self, source: TodoRepository):
+        """Initialize the transaction.
+
+        Parameters
+        ----------
+        source : TodoRepository
+            The repository the transaction reads from and commits to.
+        """
+        self.source = source
+        self.base: Dict[str, Optional[Todo]] = {}
+        self._read: Dict[str, Optional[Todo]] = {}
+        self._writes: Dict[str, Optional[Todo]] = {}
+        self._read_all = False
+
+    @property
+    def writes(self) -> Dict[str, Optional[Todo]]:
+        """Return the buffered writes.
+
+        Returns
+        -------
+        Dict[str, Optional[Todo]]
+            The new version of every written item, keyed by ID, or None for
+            deleted items.
+        """
+        return self._writes
+
+    def validate(self, current: Callable[[str], Optional[Todo]]) -> None:
+        """Check that the written items have not been changed by another writer.
+
+        Parameters
+        ----------
+        current : Callable[[str], Optional[Todo]]
+            Returns the committed version of an item.
+
+        Raises
+        ------
+        TransactionConflictError
+            If an item differs from the version the transaction read.
+        """
+        for todo_id, original in self.base.items():
+            if current(todo_id) != original:
+                raise TransactionConflictError(f"Todo with ID {todo_id} was changed by another writer.")
+
+    def apply_to(self, todos: Dict[str, Todo]) -> None:
+        """Validate the writes against a dictionary of items and apply them.
+
+        Parameters
+        ----------
+        todos : Dict[str, Todo]
+            The committed items, keyed by ID. Changed in place.
+
+        Raises
+        ------
+        TransactionConflictError
+            If an item differs from the version the transaction read.
+        """
+        self.validate(todos.get)
+        for todo_id, todo in self._writes.items():
+            if todo is None:
+                todos.pop(todo_id, None)
+            else:
+                todos[todo_id] = todo
+
+    def _lookup(self, todo_id: str) -> Optional[Todo]:
+        if todo_id in self._writes:
+            return self._writes[todo_id]
+        if todo_id not in self._read and not self._read_all:
+            self._read[todo_id] = self.source.get_by_id(todo_id)
+        return self._read.get(todo_id)
+
+    def _write(self, todo_id: str, todo: Optional[Todo]) -> None:
+        if todo_id not in self.base:
+            self.base[todo_id] = self._lookup(todo_id)
+        self._writes[todo_id] = todo
+
+    def create(self, todo: Todo) -> Todo:
+        """Buffer the creation of a todo item.
+
+        Parameters
+        ----------
+        todo : Todo
+            The todo item to be created.
+
+        Returns
+        -------
+        Todo
+            The created todo item.
+        """
+        self._write(todo.id, todo)
+        return todo
+
+    def get_all(self) -> List[Todo]:
+        """Retrieve all todo items as seen by the transaction.
+
+        Returns
+        -------
+        List[Todo]
+            A list of all todo items.
+        """
+        if not self._read_all:
+            for todo in self.source.get_all():
+                self._read.setdefault(todo.id, todo)
+            self._read_all = True
+        todos = {**self._read, **self._writes}
+        return [todo for todo in todos.values() if todo is not None]
+
+    def get_by_id(self, todo_id: str) -> Optional[Todo]:
+        """Retrieve a specific todo item as seen by the transaction.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to retrieve.
+
+        Returns
+        -------
+        Optional[Todo]
+            The retrieved todo item, or None if not found.
+        """
+        return self._lookup(todo_id)
+
+    def update(self, todo: Todo) -> Todo:
+        """Buffer the update of an existing todo item.
+
+        Parameters
+        ----------
+        todo : Todo
+            The todo item with updated information.
+
+        Returns
+        -------
+        Todo
+            The updated todo item.
+
+        Raises
+        ------
+        ValueError
+            If the todo item with the given ID is not found.
+        """
+        if self._lookup(todo.id) is None:
+            raise ValueError(f"Todo with ID {todo.id} not found.")
+        self._write(todo.id, todo)
+        return todo
+
+    def delete(self, todo_id: str) -> None:
+        """Buffer the deletion of a todo item.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to delete.
+
+        Raises
+        ------
+        ValueError
+            If the todo item with the given ID is not found.
+        """
+        if self._lookup(todo_id) is None:
+            raise ValueError(f"Todo with ID {todo_id} not found.")
+        self._write(todo_id, None)
+
+    def _commit_transaction(self, transaction: "TodoTransaction") -> None:
+        # A nested transaction is validated against, and folded into, this one.
+        transaction.validate(self._lookup)
+        for todo_id, todo in transaction.writes.items():
+            self._write(todo_id, todo)
+
+
+def check_patch_fields(fields: Mapping[str, Any]) -> None:
+    """Ensure that only patchable fields are being changed.
+
+    Parameters
+    ----------
+    fields : Mapping[str, Any]
+        The new values, keyed by field name.
+
+    Raises
+    ------
+    ValueError
+        If a field is not listed in `PATCHABLE_FIELDS`.
+    """
+    unknown = set(fields) - PATCHABLE_FIELDS
+    if unknown:
+        raise ValueError(f"Cannot patch fields: {', '.join(sorted(unknown))}.")
+
+
+def purge_batches(
+    todos: Iterable[Todo], older_than: datetime, limit: Optional[int] = None, deadline: Optional[float] = None
+) -> Iterator[List[str]]:
+    """Select the completed todo items to purge and split their IDs into batches.
+
+    Parameters
+    ----------
+    todos : Iterable[Todo]
+        The todo items to select from.
+    older_than : datetime
+        Completed todo items created before this moment are selected.
+    limit : Optional[int], optional
+        The maximum number of selected items, by default no limit.
+    deadline : Optional[float], optional
+        A `time.monotonic` value after which no further batch is yielded, by
+        default no deadline.
+
+    Yields
+    ------
+    List[str]
+        The IDs of up to `PURGE_BATCH_SIZE` items to delete.
+    """
+    selected = [todo.id for todo in todos if todo.completed and todo.created_at < older_than]
+    selected = selected[:limit] if limit is not None else selected
+    for start in range(0, len(selected), PURGE_BATCH_SIZE):
+        if deadline is not None and time.monotonic() >= deadline:
+            return
+        yield selected[start : start + PURGE_BATCH_SIZE]
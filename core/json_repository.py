@@ -1,9 +1,13 @@
-import json
+import os
+import threading
+from dataclasses import replace
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Iterable, List, Mapping, Optional
 
+from core.codec import TodoCodec, get_todo_codec
 from core.entities import Todo
-from core.interfaces import TodoRepository
+from core.ids import SortedIdIndex
+from core.interfaces import TodoRepository, TodoTransaction, check_patch_fields, purge_batches
 
 
 class JsonTodoRepository(TodoRepository):
@@ -13,7 +17,9 @@ class JsonTodoRepository(TodoRepository):
     to and from a specified JSON file, ensuring data persistence.
     """
 
-    def __init__(self, file_path: str = "todos.json"):
+    def __init__(
+        self, file_path: str = "todos.json", codec: Optional[TodoCodec] = None, save_delay: Optional[float] = None
+    ):
         """Initialize the JSON todo repository.
 
         Parameters
@@ -21,9 +27,25 @@ class JsonTodoRepository(TodoRepository):
         file_path : str, optional
             The path to the JSON file where todos will be stored, by default
             "todos.json".
+        codec : Optional[TodoCodec], optional
+            The codec that reads and writes the file, by default the fastest
+            one installed.
+        save_delay : Optional[float], optional
+            Seconds by which writing the file is deferred after a change, so
+            that a burst of changes is saved once, by default None (every
+            change is saved before the call returns). Deferred changes are
+            written by `flush`.
         """
         self.file_path = file_path
+        self.codec = codec or get_todo_codec()
+        self.save_delay = save_delay
+        self._save_timer: Optional[threading.Timer] = None
         self.todos = self._load_todos()
+        # Built by the first `list_page` call and maintained from then on.
+        self._index: Optional[SortedIdIndex] = None
+        # Held by every write, so concurrent writers, and transactions
+        # validated and applied against them, do not interleave.
+        self._lock = threading.RLock()
 
     def _load_todos(self) -> dict[str, Todo]:
         """Load todo items from the JSON file.
@@ -34,42 +56,60 @@ class JsonTodoRepository(TodoRepository):
         -------
         dict[str, Todo]
             A dictionary of todo items, keyed by their IDs.
+
+        Raises
+        ------
+        ValueError
+            If the file cannot be decoded. It is left untouched, rather than
+            being overwritten by the next change.
         """
         try:
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                todos = {
-                    item["id"]: Todo(
-                        id=item["id"],
-                        title=item["title"],
-                        description=item["description"],
-                        completed=item["completed"],
-                        created_at=datetime.fromisoformat(item["created_at"]),
-                    )
-                    for item in data
-                }
-                return todos
-        except (FileNotFoundError, json.JSONDecodeError):
+            with open(self.file_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return {}
+        if not data.strip():
             return {}
+        try:
+            todos = self.codec.decode_todos(data)
+        except ValueError as e:
+            raise ValueError(f"Cannot load todo items from {self.file_path}: {e}") from e
+        return {todo.id: todo for todo in todos}
 
     def _save_todos(self) -> None:
         """Save current todo items to the JSON file.
 
-        This method serializes the dictionary of Todo objects into a JSON
-        array and writes it to the specified file path.
+        This method encodes the Todo objects as a compact JSON array and
+        writes it to the specified file path. With a `save_delay`, the write
+        is scheduled instead, unless one is already pending.
         """
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            data = [
-                {
-                    "id": str(todo.id),
-                    "title": todo.title,
-                    "description": todo.description,
-                    "completed": todo.completed,
-                    "created_at": todo.created_at.isoformat(),
-                }
-                for todo in self.todos.values()
-            ]
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        if self.save_delay is not None:
+            with self._lock:
+                if self._save_timer is None:
+                    self._save_timer = threading.Timer(self.save_delay, self.flush)
+                    self._save_timer.daemon = True
+                    self._save_timer.start()
+            return
+        self._write_file()
+
+    def _write_file(self, data: Optional[bytes] = None) -> None:
+        # Written to a temporary file first, so readers and crashes never see
+        # a partially written store.
+        if data is None:
+            data = self.codec.encode_todos(self.todos.values())
+        temporary_path = f"{self.file_path}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, self.file_path)
+
+    def flush(self) -> None:
+        """Write deferred changes to the JSON file now."""
+        with self._lock:
+            if self._save_timer is None:
+                return
+            self._save_timer.cancel()
+            self._save_timer = None
+            self._write_file()
 
     def create(self, todo: Todo) -> Todo:
         """Create a new todo item in the repository.
@@ -84,10 +124,34 @@ class JsonTodoRepository(TodoRepository):
         Todo
             The created todo item.
         """
-        self.todos[str(todo.id)] = todo
-        self._save_todos()
+        with self._lock:
+            self.todos[str(todo.id)] = todo
+            if self._index is not None:
+                self._index.add(str(todo.id))
+            self._save_todos()
         return todo
 
+    def create_many(self, todos: Iterable[Todo]) -> List[Todo]:
+        """Create many todo items, writing the JSON file only once.
+
+        Parameters
+        ----------
+        todos : Iterable[Todo]
+            The todo items to be created.
+
+        Returns
+        -------
+        List[Todo]
+            The created todo items.
+        """
+        created = list(todos)
+        with self._lock:
+            self.todos.update((str(todo.id), todo) for todo in created)
+            if self._index is not None:
+                self._index.add_many(str(todo.id) for todo in created)
+            self._save_todos()
+        return created
+
     def get_all(self) -> List[Todo]:
         """Retrieve all todo items from the repository.
 
@@ -113,6 +177,28 @@ class JsonTodoRepository(TodoRepository):
         """
         return self.todos.get(todo_id)
 
+    def list_page(self, after: Optional[str] = None, limit: int = 100) -> List[Todo]:
+        """Retrieve a page of todo items in ID order from the sorted ID index.
+
+        Parameters
+        ----------
+        after : Optional[str], optional
+            Return items with IDs greater than this one, by default from the
+            first item.
+        limit : int, optional
+            The maximum number of items to return, by default 100.
+
+        Returns
+        -------
+        List[Todo]
+            The todo items, in ascending ID order.
+        """
+        # Under the write lock, every indexed ID is also in the dictionary.
+        with self._lock:
+            if self._index is None:
+                self._index = SortedIdIndex(self.todos)
+            return [self.todos[todo_id] for todo_id in self._index.after(after, limit)]
+
     def update(self, todo: Todo) -> Todo:
         """Update an existing todo item in the repository.
 
@@ -126,10 +212,42 @@ class JsonTodoRepository(TodoRepository):
         Todo
             The updated todo item.
         """
-        if str(todo.id) not in self.todos:
-            raise ValueError(f"Todo with ID {todo.id} not found.")
-        self.todos[str(todo.id)] = todo
-        self._save_todos()
+        with self._lock:
+            if str(todo.id) not in self.todos:
+                raise ValueError(f"Todo with ID {todo.id} not found.")
+            self.todos[str(todo.id)] = todo
+            self._save_todos()
+        return todo
+
+    def patch(self, todo_id: str, fields: Mapping[str, Any]) -> Todo:
+        """Change selected fields of a todo item in place and persist them.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to change.
+        fields : Mapping[str, Any]
+            The new values, keyed by field name.
+
+        Returns
+        -------
+        Todo
+            The changed todo item.
+
+        Raises
+        ------
+        ValueError
+            If the todo item is not found or a field cannot be patched.
+        """
+        check_patch_fields(fields)
+        with self._lock:
+            todo = self.todos.get(todo_id)
+            if todo is None:
+                raise ValueError(f"Todo with ID {todo_id} not found.")
+            # Items are replaced rather than changed in place, so transactions can
+            # keep the versions they read.
+            todo = self.todos[todo_id] = replace(todo, **fields)
+            self._save_todos()
         return todo
 
     def delete(self, todo_id: str) -> None:
@@ -144,7 +262,65 @@ class JsonTodoRepository(TodoRepository):
         -------
         None
         """
-        if todo_id not in self.todos:
-            raise ValueError(f"Todo with ID {todo_id} not found.")
-        del self.todos[todo_id]
-        self._save_todos()
+        with self._lock:
+            if todo_id not in self.todos:
+                raise ValueError(f"Todo with ID {todo_id} not found.")
+            del self.todos[todo_id]
+            if self._index is not None:
+                self._index.discard(todo_id)
+            self._save_todos()
+
+    def purge_completed(
+        self, older_than: datetime, limit: Optional[int] = None, deadline: Optional[float] = None
+    ) -> List[str]:
+        """Delete completed todo items created before a point in time.
+
+        The items are selected with a single scan, and the JSON file is
+        written once for all deleted items.
+
+        Parameters
+        ----------
+        older_than : datetime
+            Completed todo items created before this moment are deleted.
+        limit : Optional[int], optional
+            The maximum number of items to delete in this call, by default no
+            limit.
+        deadline : Optional[float], optional
+            A `time.monotonic` value after which no further batch is started, by
+            default no deadline.
+
+        Returns
+        -------
+        List[str]
+            The IDs of the deleted todo items.
+        """
+        purged: List[str] = []
+        with self._lock:
+            for batch in purge_batches(self.todos.values(), older_than, limit, deadline):
+                for todo_id in batch:
+                    del self.todos[todo_id]
+                purged.extend(batch)
+            if purged:
+                if self._index is not None:
+                    self._index = SortedIdIndex(self.todos)
+                self._save_todos()
+        return purged
+
+    def compact(self) -> None:
+        """Rewrite the JSON file from the current todo items."""
+        with self._lock:
+            self._save_todos()
+
+    def _commit_transaction(self, transaction: TodoTransaction) -> None:
+        # Validating and applying under the write lock makes the first committer
+        # win; all writes of the transaction are persisted with a single save.
+        with self._lock:
+            transaction.apply_to(self.todos)
+            if self._index is not None:
+                for todo_id, todo in transaction.writes.items():
+                    if todo is None:
+                        self._index.discard(todo_id)
+                    else:
+                        self._index.add(todo_id)
+            if transaction.writes:
+                self._save_todos()
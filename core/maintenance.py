@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from typing import Callable, List, Mapping, Optional
+
+from core.interfaces import TodoRepository
+from core.partitioning import list_file_path
+from core.scheduler import Job
+from core.use_cases import CompactTodoStore, PurgeCompletedTodos, SnapshotTodos
+
+
+@dataclass(frozen=True)
+class MaintenanceSettings:
+    """Configuration of the repository maintenance jobs.
+
+    Attributes
+    ----------
+    purge_completed_after_days : Optional[float], optional
+        Completed todo items older than this many days are purged, by default
+        None, which disables purging.
+    purge_interval : float, optional
+        Seconds between purge runs, by default one hour.
+    purge_time_budget : Optional[float], optional
+        Seconds a purge run may take before it stops early, by default 0.5.
+        None removes the budget.
+    compact_interval : Optional[float], optional
+        Seconds between compactions, by default six hours. None disables
+        compaction.
+    snapshot_path : Optional[str], optional
+        Where to write snapshots of the default list, by default None, which
+        disables snapshots. Other lists are written next to it, see
+        `list_file_path`.
+    snapshot_interval : float, optional
+        Seconds between snapshots, by default one hour.
+    """
+
+    purge_completed_after_days: Optional[float] = None
+    purge_interval: float = 60 * 60
+    purge_time_budget: Optional[float] = 0.5
+    compact_interval: Optional[float] = 6 * 60 * 60
+    snapshot_path: Optional[str] = None
+    snapshot_interval: float = 60 * 60
+
+
+def maintenance_jobs(
+    repositories: Callable[[], Mapping[str, TodoRepository]],
+    settings: MaintenanceSettings,
+) -> List[Job]:
+    """Build the scheduler jobs for the enabled maintenance tasks.
+
+    Parameters
+    ----------
+    repositories : Callable[[], Mapping[str, TodoRepository]]
+        Returns the repositories to maintain, keyed by list ID. It is called on
+        every run, so lists loaded or evicted in the meantime are picked up.
+    settings : MaintenanceSettings
+        Which tasks to run and how often.
+
+    Returns
+    -------
+    List[Job]
+        The jobs, ready to be passed to a `Scheduler`.
+    """
+
+    def purge(deadline: Optional[float]) -> int:
+        return sum(
+            PurgeCompletedTodos(todo_repo=repo).execute(settings.purge_completed_after_days, deadline=deadline)
+            for repo in repositories().values()
+        )
+
+    def compact(deadline: Optional[float]) -> None:
+        for repo in repositories().values():
+            CompactTodoStore(todo_repo=repo).execute()
+
+    def snapshot(deadline: Optional[float]) -> int:
+        return sum(
+            SnapshotTodos(todo_repo=repo).execute(list_file_path(settings.snapshot_path, list_id))
+            for list_id, repo in repositories().items()
+        )
+
+    jobs = []
+    if settings.purge_completed_after_days is not None:
+        jobs.append(
+            Job(
+                name="purge-completed",
+                func=purge,
+                interval=settings.purge_interval,
+                time_budget=settings.purge_time_budget,
+            )
+        )
+    if settings.compact_interval is not None:
+        jobs.append(Job(name="compact", func=compact, interval=settings.compact_interval))
+    if settings.snapshot_path is not None:
+        jobs.append(Job(name="snapshot", func=snapshot, interval=settings.snapshot_interval))
+    return jobs
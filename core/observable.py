@@ -0,0 +1,331 @@
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Iterable, List, Mapping, Optional, Tuple
+
+from core.entities import Todo
+from core.interfaces import TodoRepository, TodoTransaction
+
+
+class TodoRepositoryListener(ABC):
+    """Abstract base class for objects that follow changes to a repository.
+
+    Listeners let derived structures (indexes, caches, aggregates) be kept up to
+    date incrementally instead of being rebuilt from `get_all` on every read.
+    """
+
+    @abstractmethod
+    def rebuild(self, todos: List[Todo]) -> None:
+        """Replace all derived state with state built from the given items.
+
+        Parameters
+        ----------
+        todos : List[Todo]
+            Every todo item currently held by the repository.
+        """
+        pass
+
+    @abstractmethod
+    def todo_saved(self, todo: Todo) -> None:
+        """Handle a todo item that was created or updated.
+
+        Parameters
+        ----------
+        todo : Todo
+            The todo item as stored after the change.
+        """
+        pass
+
+    @abstractmethod
+    def todo_deleted(self, todo_id: str) -> None:
+        """Handle a todo item that was deleted.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the deleted todo item.
+        """
+        pass
+
+    def todos_deleted(self, todo_ids: List[str]) -> None:
+        """Handle many todo items deleted at once, e.g. by a purge.
+
+        By default each deletion is handled by `todo_deleted`. Listeners that
+        can drop many items faster at once override this.
+
+        Parameters
+        ----------
+        todo_ids : List[str]
+            The IDs of the deleted todo items.
+        """
+        for todo_id in todo_ids:
+            self.todo_deleted(todo_id)
+
+
+class _PendingListener(TodoRepositoryListener):
+    # Records the changes made while a new listener rebuilds from a snapshot.
+
+    def __init__(self):
+        self.changes: List[Tuple[str, Any]] = []
+
+    def rebuild(self, todos: List[Todo]) -> None:
+        pass
+
+    def todo_saved(self, todo: Todo) -> None:
+        self.changes.append(("todo_saved", todo))
+
+    def todo_deleted(self, todo_id: str) -> None:
+        self.changes.append(("todo_deleted", todo_id))
+
+
+class ObservableTodoRepository(TodoRepository):
+    """A repository decorator that notifies listeners about every change.
+
+    All operations are delegated to the wrapped repository. Each successful
+    mutation increments `version` and is forwarded to the subscribed listeners.
+    Mutations and their notifications are serialized, so listeners see changes
+    in the order they were applied.
+    """
+
+    def __init__(self, repo: TodoRepository, listeners: Optional[Iterable[TodoRepositoryListener]] = None):
+        """Initialize the observable repository.
+
+        Parameters
+        ----------
+        repo : TodoRepository
+            The repository that actually stores the todo items.
+        listeners : Optional[Iterable[TodoRepositoryListener]], optional
+            Listeners to subscribe immediately, by default None.
+        """
+        self.repo = repo
+        self.listeners: List[TodoRepositoryListener] = []
+        self._lock = threading.RLock()
+        self.version = 0
+        for listener in listeners or ():
+            self.subscribe(listener)
+
+    def subscribe(self, listener: TodoRepositoryListener) -> None:
+        """Subscribe a listener and bring it up to date with the current items.
+
+        The listener is rebuilt without holding up writers. Changes made in the
+        meantime are recorded and replayed to it afterwards, so none is missed.
+
+        Parameters
+        ----------
+        listener : TodoRepositoryListener
+            The listener to notify about subsequent changes.
+        """
+        pending = _PendingListener()
+        with self._lock:
+            todos = self.repo.get_all()
+            self.listeners.append(pending)
+        try:
+            listener.rebuild(todos)
+        except BaseException:
+            with self._lock:
+                self.listeners.remove(pending)
+            raise
+        with self._lock:
+            for method, arg in pending.changes:
+                getattr(listener, method)(arg)
+            self.listeners[self.listeners.index(pending)] = listener
+
+    def _saved(self, todos: Iterable[Todo]) -> None:
+        self.version += 1
+        for todo in todos:
+            for listener in self.listeners:
+                listener.todo_saved(todo)
+
+    def create(self, todo: Todo) -> Todo:
+        """Create a new todo item and notify listeners.
+
+        Parameters
+        ----------
+        todo : Todo
+            The todo item to be created.
+
+        Returns
+        -------
+        Todo
+            The created todo item.
+        """
+        with self._lock:
+            created = self.repo.create(todo)
+            self._saved([created])
+        return created
+
+    def create_many(self, todos: Iterable[Todo]) -> List[Todo]:
+        """Create many todo items through the wrapped bulk path and notify listeners.
+
+        Parameters
+        ----------
+        todos : Iterable[Todo]
+            The todo items to be created.
+
+        Returns
+        -------
+        List[Todo]
+            The created todo items.
+        """
+        with self._lock:
+            created = self.repo.create_many(todos)
+            self._saved(created)
+        return created
+
+    def get_all(self) -> List[Todo]:
+        """Retrieve all todo items from the wrapped repository.
+
+        Returns
+        -------
+        List[Todo]
+            A list of all todo items.
+        """
+        return self.repo.get_all()
+
+    def get_by_id(self, todo_id: str) -> Optional[Todo]:
+        """Retrieve a specific todo item by its ID from the wrapped repository.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to retrieve.
+
+        Returns
+        -------
+        Optional[Todo]
+            The retrieved todo item, or None if not found.
+        """
+        return self.repo.get_by_id(todo_id)
+
+    def list_page(self, after: Optional[str] = None, limit: int = 100) -> List[Todo]:
+        """Retrieve a page of todo items in ID order from the wrapped repository.
+
+        Parameters
+        ----------
+        after : Optional[str], optional
+            Return items with IDs greater than this one, by default from the
+            first item.
+        limit : int, optional
+            The maximum number of items to return, by default 100.
+
+        Returns
+        -------
+        List[Todo]
+            The todo items, in ascending ID order.
+        """
+        return self.repo.list_page(after, limit)
+
+    def update(self, todo: Todo) -> Todo:
+        """Update an existing todo item and notify listeners.
+
+        Parameters
+        ----------
+        todo : Todo
+            The todo item with updated information.
+
+        Returns
+        -------
+        Todo
+            The updated todo item.
+        """
+        with self._lock:
+            updated = self.repo.update(todo)
+            self._saved([updated])
+        return updated
+
+    def patch(self, todo_id: str, fields: Mapping[str, Any]) -> Todo:
+        """Change selected fields through the wrapped repository and notify listeners.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to change.
+        fields : Mapping[str, Any]
+            The new values, keyed by field name.
+
+        Returns
+        -------
+        Todo
+            The changed todo item.
+        """
+        with self._lock:
+            patched = self.repo.patch(todo_id, fields)
+            self._saved([patched])
+        return patched
+
+    def delete(self, todo_id: str) -> None:
+        """Delete a todo item and notify listeners.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to delete.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self.repo.delete(todo_id)
+            self.version += 1
+            for listener in self.listeners:
+                listener.todo_deleted(todo_id)
+
+    def purge_completed(
+        self, older_than: datetime, limit: Optional[int] = None, deadline: Optional[float] = None
+    ) -> List[str]:
+        """Purge completed todo items through the wrapped repository and notify listeners.
+
+        Parameters
+        ----------
+        older_than : datetime
+            Completed todo items created before this moment are deleted.
+        limit : Optional[int], optional
+            The maximum number of items to delete in this call, by default no
+            limit.
+        deadline : Optional[float], optional
+            A `time.monotonic` value after which no further batch is started, by
+            default no deadline.
+
+        Returns
+        -------
+        List[str]
+            The IDs of the deleted todo items.
+        """
+        with self._lock:
+            purged = self.repo.purge_completed(older_than, limit, deadline)
+            if purged:
+                self.version += 1
+                for listener in self.listeners:
+                    listener.todos_deleted(purged)
+        return purged
+
+    def _commit_transaction(self, transaction: TodoTransaction) -> None:
+        with self._lock:
+            self.repo._commit_transaction(transaction)
+            if not transaction.writes:
+                return
+            self._saved(todo for todo in transaction.writes.values() if todo is not None)
+            for todo_id, todo in transaction.writes.items():
+                if todo is None and transaction.base[todo_id] is not None:
+                    for listener in self.listeners:
+                        listener.todo_deleted(todo_id)
+
+    def compact(self) -> None:
+        """Compact the wrapped repository."""
+        self.repo.compact()
+
+    def snapshot(self, path: str) -> int:
+        """Snapshot the wrapped repository.
+
+        Parameters
+        ----------
+        path : str
+            The path of the snapshot file.
+
+        Returns
+        -------
+        int
+            The number of todo items written.
+        """
+        return self.repo.snapshot(path)
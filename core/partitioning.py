@@ -0,0 +1,230 @@
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from core.entities import DEFAULT_LIST_ID
+
+T = TypeVar("T")
+
+_LIST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def validate_list_id(list_id: str) -> str:
+    """Ensure that a list ID is safe to use in file names and URLs.
+
+    Parameters
+    ----------
+    list_id : str
+        The list ID to check.
+
+    Returns
+    -------
+    str
+        The unchanged list ID.
+
+    Raises
+    ------
+    ValueError
+        If the list ID is empty, too long or contains other characters than
+        letters, digits, "-" and "_".
+    """
+    if not _LIST_ID_PATTERN.match(list_id):
+        raise ValueError(f"Invalid list ID '{list_id}'. Use 1-64 letters, digits, '-' or '_'.")
+    return list_id
+
+
+def list_file_path(base_path: str, list_id: str) -> str:
+    """Derive the storage file of a todo list from the default list's file.
+
+    The default list keeps using `base_path` unchanged, so existing stores
+    remain readable. Other lists get the list ID inserted before the extension,
+    e.g. "todos.work.json".
+
+    Parameters
+    ----------
+    base_path : str
+        The file path of the default list.
+    list_id : str
+        The ID of the list.
+
+    Returns
+    -------
+    str
+        The file path of the list.
+    """
+    if validate_list_id(list_id) == DEFAULT_LIST_ID:
+        return base_path
+    root, extension = os.path.splitext(base_path)
+    return f"{root}.{list_id}{extension}"
+
+
+class PartitionLimitError(Exception):
+    """Raised when a new list would exceed the number of lists a registry can hold."""
+
+    pass
+
+
+class PartitionRegistry(Generic[T]):
+    """Per-list partitions of the todo store, loaded lazily and evicted when idle.
+
+    A partition (typically a repository, or a repository bundled with its
+    derived indexes) is created by `factory` the first time its list is
+    accessed. Partitions that have not been accessed for `idle_timeout` seconds
+    are dropped, after being handed to `on_evict`, so that memory is only spent
+    on active tenants. At most `max_partitions` are held at a time.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], T],
+        idle_timeout: Optional[float] = 15 * 60,
+        on_evict: Optional[Callable[[str, T], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        exists: Optional[Callable[[str], bool]] = None,
+        max_partitions: Optional[int] = None,
+    ):
+        """Initialize the registry.
+
+        Parameters
+        ----------
+        factory : Callable[[str], T]
+            Creates the partition of a list ID.
+        idle_timeout : Optional[float], optional
+            Seconds without access after which a partition is evicted, by
+            default 15 minutes. None disables eviction, which is required for
+            partitions that are not backed by durable storage.
+        on_evict : Optional[Callable[[str, T], None]], optional
+            Called with each evicted partition, e.g. to flush it, by default None.
+        clock : Callable[[], float], optional
+            A monotonic clock, by default `time.monotonic`.
+        exists : Optional[Callable[[str], bool]], optional
+            Tells whether a list that is not loaded has stored data, by default
+            None, which means that only loaded lists exist.
+        max_partitions : Optional[int], optional
+            The maximum number of loaded partitions, by default no limit. When
+            partitions can be evicted, the least recently used one makes room
+            for a new one; otherwise new lists are refused.
+        """
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.on_evict = on_evict
+        self.exists = exists
+        self.max_partitions = max_partitions
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._partitions: Dict[str, Tuple[T, float]] = {}
+        # A lock per list that is being loaded.
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def __len__(self) -> int:
+        """Return the number of loaded partitions."""
+        return len(self._partitions)
+
+    def __contains__(self, list_id: str) -> bool:
+        """Return whether the partition of a list is currently loaded."""
+        return list_id in self._partitions
+
+    def get(self, list_id: str, create: bool = True) -> T:
+        """Return the partition of a list, loading it if necessary.
+
+        Parameters
+        ----------
+        list_id : str
+            The ID of the list.
+        create : bool, optional
+            Whether to create the partition of a list that does not exist yet,
+            by default True. Reads pass False, so that they cannot create lists.
+
+        Returns
+        -------
+        T
+            The partition.
+
+        Raises
+        ------
+        ValueError
+            If the list ID is invalid.
+        KeyError
+            If the list does not exist and `create` is False.
+        PartitionLimitError
+            If `max_partitions` are loaded and none of them can be evicted.
+        """
+        validate_list_id(list_id)
+        with self._lock:
+            partition = self._touch(list_id)
+            if partition is not None:
+                return partition
+            loading = self._loading.setdefault(list_id, threading.Lock())
+        # Lists are loaded outside the registry lock, so loading a large list
+        # does not stall requests for the others; concurrent requests for the
+        # same list wait for a single load.
+        with loading:
+            with self._lock:
+                partition = self._touch(list_id)
+            if partition is not None:
+                return partition
+            try:
+                if not create and (self.exists is None or not self.exists(list_id)):
+                    raise KeyError(list_id)
+                limit = self.max_partitions
+                with self._lock:
+                    if limit is not None and len(self._partitions) >= limit and self.idle_timeout is None:
+                        raise PartitionLimitError(f"Cannot hold more than {limit} todo lists.")
+                partition = self.factory(list_id)
+                with self._lock:
+                    self._partitions[list_id] = (partition, self._clock())
+                    evicted = {}
+                    # Only evictable partitions get here when the registry is full.
+                    while limit is not None and len(self._partitions) > limit:
+                        lru = min(self._partitions, key=lambda other: self._partitions[other][1])
+                        evicted[lru] = self._partitions.pop(lru)[0]
+            finally:
+                with self._lock:
+                    self._loading.pop(list_id, None)
+        if self.on_evict is not None:
+            for evicted_id, evicted_partition in evicted.items():
+                self.on_evict(evicted_id, evicted_partition)
+        return partition
+
+    def _touch(self, list_id: str) -> Optional[T]:
+        # Return a loaded partition and record the access; the caller holds the lock.
+        entry = self._partitions.get(list_id)
+        if entry is None:
+            return None
+        self._partitions[list_id] = (entry[0], self._clock())
+        return entry[0]
+
+    def loaded(self) -> Dict[str, T]:
+        """Return the currently loaded partitions.
+
+        Returns
+        -------
+        Dict[str, T]
+            The loaded partitions keyed by list ID, without loading any others.
+        """
+        with self._lock:
+            return {list_id: partition for list_id, (partition, _) in self._partitions.items()}
+
+    def evict_idle(self) -> List[str]:
+        """Evict the partitions that have not been accessed recently.
+
+        Returns
+        -------
+        List[str]
+            The IDs of the evicted lists.
+        """
+        if self.idle_timeout is None:
+            return []
+        with self._lock:
+            cutoff = self._clock() - self.idle_timeout
+            evicted = {
+                list_id: partition for list_id, (partition, last_used) in self._partitions.items() if last_used < cutoff
+            }
+            for list_id in evicted:
+                del self._partitions[list_id]
+        if self.on_evict is not None:
+            for list_id, partition in evicted.items():
+                self.on_evict(list_id, partition)
+        return list(evicted)
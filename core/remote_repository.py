@@ -0,0 +1,443 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+from core.codec import todo_from_dict, todo_to_dict
+from core.entities import DEFAULT_LIST_ID, Todo
+from core.interfaces import TodoRepository, TodoTransaction, TransactionConflictError
+
+
+def _commit(repo: TodoRepository, params: Dict[str, Any]) -> None:
+    # The client's transaction is rebuilt from its read versions and writes and
+    # committed by the served repository, which validates and applies it.
+    transaction = TodoTransaction(repo)
+    for write in params["writes"]:
+        transaction.base[write["id"]] = None if write["base"] is None else todo_from_dict(write["base"])
+        transaction.writes[write["id"]] = None if write["todo"] is None else todo_from_dict(write["todo"])
+    repo._commit_transaction(transaction)
+
+
+# Requests and responses are single lines of JSON. A request names a repository
+# method, the list it applies to and the method's parameters; a response holds
+# either the JSON-encoded result or the message of the error it raised.
+_METHODS: Dict[str, Callable[[TodoRepository, Dict[str, Any]], Any]] = {
+    "create": lambda repo, params: todo_to_dict(repo.create(todo_from_dict(params["todo"]))),
+    "create_many": lambda repo, params: [
+        todo_to_dict(todo) for todo in repo.create_many(todo_from_dict(item) for item in params["todos"])
+    ],
+    "get_all": lambda repo, params: [todo_to_dict(todo) for todo in repo.get_all()],
+    "get_by_id": lambda repo, params: (
+        None if (todo := repo.get_by_id(params["todo_id"])) is None else todo_to_dict(todo)
+    ),
+    "list_page": lambda repo, params: [todo_to_dict(todo) for todo in repo.list_page(params["after"], params["limit"])],
+    "update": lambda repo, params: todo_to_dict(repo.update(todo_from_dict(params["todo"]))),
+    "patch": lambda repo, params: todo_to_dict(repo.patch(params["todo_id"], params["fields"])),
+    "delete": lambda repo, params: repo.delete(params["todo_id"]),
+    "purge_completed": lambda repo, params: repo.purge_completed(
+        datetime.fromisoformat(params["older_than"]),
+        params["limit"],
+        None if params.get("time_budget") is None else time.monotonic() + params["time_budget"],
+    ),
+    "compact": lambda repo, params: repo.compact(),
+    "commit": _commit,
+    "snapshot": lambda repo, params: repo.snapshot(params["path"]),
+}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: "TodoRepositoryServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"error": f"Malformed request: {e}"}
+            else:
+                response = self.server.dispatch(request)
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class TodoRepositoryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves todo repositories to `RemoteTodoRepository` clients over a Unix socket.
+
+    Requests from all connections are executed one at a time, so the served
+    repositories need not be thread-safe. The socket is only accessible to the
+    user running the server.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, repositories: Callable[[str], TodoRepository]):
+        """Bind the server to its socket.
+
+        Parameters
+        ----------
+        socket_path : str
+            The path of the Unix socket. It must not exist yet.
+        repositories : Callable[[str], TodoRepository]
+            Returns the repository of a list ID.
+        """
+        self.socket_path = socket_path
+        self.repositories = repositories
+        self._lock = threading.Lock()
+        previous_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(previous_umask)
+
+    def dispatch(self, request: Mapping[str, Any]) -> Dict[str, Any]:
+        """Execute a single request.
+
+        Parameters
+        ----------
+        request : Mapping[str, Any]
+            The decoded request.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The response, with either a "result" or an "error" key.
+        """
+        if not isinstance(request, Mapping):
+            return {"error": "Malformed request: expected a JSON object."}
+        method = request.get("method")
+        if method == "ping":
+            return {"result": None}
+        if method == "shutdown":
+            # `shutdown` waits for `serve_forever` to return, so it cannot run on a request thread.
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"result": None}
+        if method not in _METHODS:
+            return {"error": f"Unknown method '{method}'."}
+        with self._lock:
+            try:
+                repo = self.repositories(request.get("list_id", DEFAULT_LIST_ID))
+                return {"result": _METHODS[method](repo, request.get("params", {}))}
+            except TransactionConflictError as e:
+                return {"error": str(e), "conflict": True}
+            except ValueError as e:
+                return {"error": str(e)}
+            except Exception as e:
+                # E.g. a KeyError from missing parameters or an OSError from
+                # `snapshot`; the connection stays usable.
+                return {"error": f"{type(e).__name__}: {e}"}
+
+    def server_close(self) -> None:
+        """Close the socket and remove its file."""
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+class RemoteTodoRepository(TodoRepository):
+    """A Todo repository implementation that forwards every call to a `TodoRepositoryServer`.
+
+    The connection is opened once and reused for all calls. Errors raised by
+    the served repository are raised again as ValueError. Transactions are
+    sent to the server as a whole when they commit, so the server validates
+    and applies them in one step.
+    """
+
+    def __init__(self, socket_path: str, list_id: str = DEFAULT_LIST_ID, timeout: Optional[float] = None):
+        """Connect to the server.
+
+        Parameters
+        ----------
+        socket_path : str
+            The path of the server's Unix socket.
+        list_id : str, optional
+            The list to work on, by default `DEFAULT_LIST_ID`.
+        timeout : Optional[float], optional
+            Seconds to wait for the server before giving up, by default no limit.
+
+        Raises
+        ------
+        OSError
+            If no server is listening on the socket.
+        """
+        self.socket_path = socket_path
+        self.list_id = list_id
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        try:
+            self._socket.connect(socket_path)
+        except OSError:
+            self._socket.close()
+            raise
+        self._stream = self._socket.makefile("rwb")
+
+    def close(self) -> None:
+        """Close the connection to the server."""
+        self._stream.close()
+        self._socket.close()
+
+    def call(self, method: str, **params: Any) -> Any:
+        """Send a request to the server and wait for its response.
+
+        Parameters
+        ----------
+        method : str
+            The name of the method to call.
+        **params : Any
+            The JSON-serializable parameters of the method.
+
+        Returns
+        -------
+        Any
+            The JSON-decoded result.
+
+        Raises
+        ------
+        TransactionConflictError
+            If a committed transaction conflicted with another writer.
+        ValueError
+            If the method failed on the server.
+        ConnectionError
+            If the server closed the connection.
+        """
+        request = {"method": method, "list_id": self.list_id, "params": params}
+        self._stream.write(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._stream.flush()
+        line = self._stream.readline()
+        if not line:
+            raise ConnectionError(f"The todo daemon at {self.socket_path} closed the connection.")
+        response = json.loads(line)
+        if response.get("conflict"):
+            raise TransactionConflictError(response["error"])
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["result"]
+
+    def create(self, todo: Todo) -> Todo:
+        """Create a new todo item on the server.
+
+        Parameters
+        ----------
+        todo : Todo
+            The todo item to be created.
+
+        Returns
+        -------
+        Todo
+            The created todo item.
+        """
+        return todo_from_dict(self.call("create", todo=todo_to_dict(todo)))
+
+    def create_many(self, todos: Iterable[Todo]) -> List[Todo]:
+        """Create many todo items on the server with a single request.
+
+        Parameters
+        ----------
+        todos : Iterable[Todo]
+            The todo items to be created.
+
+        Returns
+        -------
+        List[Todo]
+            The created todo items.
+        """
+        return [todo_from_dict(item) for item in self.call("create_many", todos=[todo_to_dict(t) for t in todos])]
+
+    def get_all(self) -> List[Todo]:
+        """Retrieve all todo items from the server.
+
+        Returns
+        -------
+        List[Todo]
+            A list of all todo items.
+        """
+        return [todo_from_dict(item) for item in self.call("get_all")]
+
+    def get_by_id(self, todo_id: str) -> Optional[Todo]:
+        """Retrieve a specific todo item by its ID from the server.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to retrieve.
+
+        Returns
+        -------
+        Optional[Todo]
+            The retrieved todo item, or None if not found.
+        """
+        item = self.call("get_by_id", todo_id=todo_id)
+        return None if item is None else todo_from_dict(item)
+
+    def list_page(self, after: Optional[str] = None, limit: int = 100) -> List[Todo]:
+        """Retrieve a page of todo items in ID order from the server.
+
+        Parameters
+        ----------
+        after : Optional[str], optional
+            Return items with IDs greater than this one, by default from the
+            first item.
+        limit : int, optional
+            The maximum number of items to return, by default 100.
+
+        Returns
+        -------
+        List[Todo]
+            The todo items, in ascending ID order.
+        """
+        return [todo_from_dict(item) for item in self.call("list_page", after=after, limit=limit)]
+
+    def update(self, todo: Todo) -> Todo:
+        """Update an existing todo item on the server.
+
+        Parameters
+        ----------
+        todo : Todo
+            The todo item with updated information.
+
+        Returns
+        -------
+        Todo
+            The updated todo item.
+
+        Raises
+        ------
+        ValueError
+            If the todo item with the given ID is not found.
+        """
+        return todo_from_dict(self.call("update", todo=todo_to_dict(todo)))
+
+    def patch(self, todo_id: str, fields: Mapping[str, Any]) -> Todo:
+        """Change selected fields of a todo item on the server.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to change.
+        fields : Mapping[str, Any]
+            The new values, keyed by field name.
+
+        Returns
+        -------
+        Todo
+            The changed todo item.
+
+        Raises
+        ------
+        ValueError
+            If the todo item is not found or a field cannot be patched.
+        """
+        return todo_from_dict(self.call("patch", todo_id=todo_id, fields=dict(fields)))
+
+    def delete(self, todo_id: str) -> None:
+        """Delete a todo item on the server.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to delete.
+
+        Raises
+        ------
+        ValueError
+            If the todo item with the given ID is not found.
+        """
+        self.call("delete", todo_id=todo_id)
+
+    def purge_completed(
+        self, older_than: datetime, limit: Optional[int] = None, deadline: Optional[float] = None
+    ) -> List[str]:
+        """Delete completed todo items created before a given moment on the server.
+
+        Parameters
+        ----------
+        older_than : datetime
+            Completed todo items created before this moment are deleted.
+        limit : Optional[int], optional
+            The maximum number of items to delete in this call, by default no
+            limit.
+        deadline : Optional[float], optional
+            A `time.monotonic` value after which no further batch is started, by
+            default no deadline.
+
+        Returns
+        -------
+        List[str]
+            The IDs of the deleted todo items.
+        """
+        # Monotonic clocks are not comparable across processes, so the server
+        # gets the time that is left.
+        time_budget = None if deadline is None else max(0.0, deadline - time.monotonic())
+        return self.call("purge_completed", older_than=older_than.isoformat(), limit=limit, time_budget=time_budget)
+
+    def compact(self) -> None:
+        """Compact the repository on the server."""
+        self.call("compact")
+
+    def snapshot(self, path: str) -> int:
+        """Let the server write a snapshot of the repository.
+
+        Parameters
+        ----------
+        path : str
+            The path of the snapshot file. Relative paths are resolved against
+            the client's working directory.
+
+        Returns
+        -------
+        int
+            The number of todo items written.
+        """
+        return self.call("snapshot", path=os.path.abspath(path))
+
+    def _commit_transaction(self, transaction: TodoTransaction) -> None:
+        # Sending the writes with the versions they were based on lets the
+        # server check for conflicts under the same lock that applies them.
+        writes = [
+            {
+                "id": todo_id,
+                "base": None if transaction.base[todo_id] is None else todo_to_dict(transaction.base[todo_id]),
+                "todo": None if todo is None else todo_to_dict(todo),
+            }
+            for todo_id, todo in transaction.writes.items()
+        ]
+        if writes:
+            self.call("commit", writes=writes)
+
+
+def connect_remote_repository(
+    socket_path: str, list_id: str = DEFAULT_LIST_ID, timeout: Optional[float] = 1.0
+) -> Optional[RemoteTodoRepository]:
+    """Connect to a running `TodoRepositoryServer`, if there is one.
+
+    Parameters
+    ----------
+    socket_path : str
+        The path of the server's Unix socket.
+    list_id : str, optional
+        The list to work on, by default `DEFAULT_LIST_ID`.
+    timeout : Optional[float], optional
+        Seconds to wait for the server to answer a ping, by default 1.
+
+    Returns
+    -------
+    Optional[RemoteTodoRepository]
+        The connected repository, or None if no server answers on the socket.
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    try:
+        repo = RemoteTodoRepository(socket_path, list_id, timeout=timeout)
+    except OSError:
+        return None
+    try:
+        repo.call("ping")
+    except (OSError, ValueError):
+        repo.close()
+        return None
+    repo._socket.settimeout(None)
+    return repo
@@ -0,0 +1,316 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional
+
+from core.codec import todo_from_dict, todo_to_dict
+from core.entities import Todo
+from core.interfaces import TodoRepository
+from core.observable import ObservableTodoRepository, TodoRepositoryListener
+from core.repository import InMemoryTodoRepository
+
+# Versions are the last key of appended entries and the second one of resets,
+# so both can be read without decoding the whole, possibly huge, line.
+_APPENDED_VERSION = re.compile(rb'"version": (\d+)\}\n\Z')
+_RESET_VERSION = re.compile(rb'\{"op": "reset", "version": (\d+),')
+
+
+class ChangeLog:
+    """An append-only log of repository changes, stored as NDJSON.
+
+    Every line is one change: ``{"op": "save", "todo": {...}}``,
+    ``{"op": "delete", "id": ...}`` or ``{"op": "reset", "todos": [...]}``,
+    optionally with the "version" of the store after the change. A
+    reset replaces all previous state and is always the first entry of the
+    file, because resetting rewrites the log atomically as a new file. Readers
+    detect the new file by its inode and start over from the beginning.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the change log.
+
+        Parameters
+        ----------
+        path : str
+            The path of the log file.
+        """
+        self.path = path
+        self.entries = 0
+        self._lock = threading.Lock()
+
+    def append(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Append changes to the log.
+
+        Parameters
+        ----------
+        entries : Iterable[Dict[str, Any]]
+            The changes, in the order they were made.
+        """
+        lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self.entries += lines.count("\n")
+
+    def reset(self, todos: Iterable[Todo], version: Optional[int] = None) -> None:
+        """Replace the log with a single entry holding the given items.
+
+        Parameters
+        ----------
+        todos : Iterable[Todo]
+            Every todo item currently held by the repository.
+        version : Optional[int], optional
+            The version of the store these items represent, by default None.
+        """
+        entry: Dict[str, Any] = {"op": "reset"}
+        if version is not None:
+            entry["version"] = version
+        entry["todos"] = [todo_to_dict(todo) for todo in todos]
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+            self.entries = 1
+
+    def last_version(self) -> Optional[int]:
+        """Return the store version of the last entry, reading only the ends of the file.
+
+        Returns
+        -------
+        Optional[int]
+            The version, or None if the log does not exist, its last entry is
+            incomplete or carries no version.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                head = f.read(64)
+                f.seek(max(0, f.seek(0, os.SEEK_END) - 4096))
+                tail = f.read()
+        except FileNotFoundError:
+            return None
+        match = _APPENDED_VERSION.search(tail)
+        if match is None:
+            # Otherwise the last entry can only be the reset the file starts with.
+            match = _RESET_VERSION.match(head) if tail.endswith(b"]}\n") else None
+        return int(match.group(1)) if match is not None else None
+
+
+class ChangeLogWriter(TodoRepositoryListener):
+    """Records the changes of an observable repository in a `ChangeLog`.
+
+    The log is reset with the repository's full contents when the writer is
+    subscribed and whenever it has grown past `max_entries`, which bounds both
+    its size and the work a new replica has to do to catch up.
+    """
+
+    def __init__(self, log: ChangeLog, source: TodoRepository, max_entries: int = 10_000):
+        """Initialize the writer.
+
+        Parameters
+        ----------
+        log : ChangeLog
+            The log to write to.
+        source : TodoRepository
+            The repository being observed, read when the log is compacted.
+        max_entries : int, optional
+            The number of entries after which the log is compacted, by default
+            10,000.
+        """
+        self.log = log
+        self.source = source
+        self.max_entries = max_entries
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        if self.log.entries >= self.max_entries:
+            self.log.reset(self.source.get_all())
+        else:
+            self.log.append([entry])
+
+    def rebuild(self, todos: List[Todo]) -> None:
+        """Reset the log with the given items.
+
+        Parameters
+        ----------
+        todos : List[Todo]
+            Every todo item currently held by the repository.
+        """
+        self.log.reset(todos)
+
+    def todo_saved(self, todo: Todo) -> None:
+        """Log a created or updated todo item.
+
+        Parameters
+        ----------
+        todo : Todo
+            The todo item as stored after the change.
+        """
+        self._append({"op": "save", "todo": todo_to_dict(todo)})
+
+    def todo_deleted(self, todo_id: str) -> None:
+        """Log a deleted todo item.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the deleted todo item.
+        """
+        self._append({"op": "delete", "id": todo_id})
+
+
+class TodoReplica:
+    """An in-memory copy of a repository, kept current by tailing its `ChangeLog`.
+
+    Replicas only read the log file, so they can live in any process that can
+    see it. The copy is exposed as an `ObservableTodoRepository` so that
+    listeners (statistics, caches) can follow the replica like any other
+    repository. It must not be written to directly.
+
+    If the log entries carry store versions, `version` is the version of the
+    last applied entry. Unlike `repo.version`, it is the same in every process
+    that has applied the same changes. A reset at the version the replica
+    already has is skipped without being decoded; other resets are applied as
+    a diff, so listeners only see the items that changed.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.monotonic):
+        """Initialize the replica.
+
+        Parameters
+        ----------
+        path : str
+            The path of the change log to follow.
+        clock : Callable[[], float], optional
+            A monotonic clock, by default `time.monotonic`.
+        """
+        self.path = path
+        self.repo = ObservableTodoRepository(InMemoryTodoRepository())
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._file: Optional[BinaryIO] = None
+        self._reload: Optional[threading.Thread] = None
+        self.version: Optional[int] = None
+        self._synced_at = clock()
+        self.sync()
+
+    def staleness(self) -> float:
+        """Return an upper bound of how far the replica lags behind the log.
+
+        Returns
+        -------
+        float
+            Seconds since the replica last read the log to its end. Every
+            change logged before that moment is visible in the replica.
+        """
+        return max(0.0, self._clock() - self._synced_at)
+
+    def refresh(self, max_staleness: float = 0.0) -> float:
+        """Catch up with the log if the replica is staler than allowed.
+
+        Parameters
+        ----------
+        max_staleness : float, optional
+            The staleness in seconds that is acceptable without reading the
+            log, by default 0, which always checks the log.
+
+        Returns
+        -------
+        float
+            The staleness bound after the refresh, see `staleness`.
+        """
+        if max_staleness <= 0 or self.staleness() > max_staleness:
+            self.sync(wait=False)
+        return self.staleness()
+
+    def sync(self, wait: bool = True) -> int:
+        """Apply all complete entries appended to the log since the last sync.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            Whether to wait for a compacted log to be read again, by default
+            True. Otherwise it is read in the background, while the replica
+            keeps serving its current copy and `staleness` grows.
+
+        Returns
+        -------
+        int
+            The number of applied entries.
+        """
+        reload = self._reload
+        if reload is not None:
+            if not wait:
+                return 0
+            reload.join()
+        with self._lock:
+            started = self._clock()
+            try:
+                inode = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                self._synced_at = started
+                return 0
+            # The open file pins its inode, so a rewritten log always has a
+            # different one and is read again from the start.
+            if self._file is not None and os.fstat(self._file.fileno()).st_ino != inode:
+                self.close()
+                if not wait:
+                    self._reload = threading.Thread(target=self._read_again, name="replica-reload", daemon=True)
+                    self._reload.start()
+                    return 0
+            if self._file is None:
+                self._file = open(self.path, "rb")
+            return self._read(started)
+
+    def _read_again(self) -> None:
+        try:
+            with self._lock:
+                started = self._clock()
+                try:
+                    self._file = open(self.path, "rb")
+                except FileNotFoundError:
+                    return
+                self._read(started)
+        finally:
+            self._reload = None
+
+    def _read(self, started: float) -> int:
+        data = self._file.read()
+        # A writer may be in the middle of a line; leave it for the next sync.
+        complete = data[: data.rfind(b"\n") + 1]
+        self._file.seek(len(complete) - len(data), os.SEEK_CUR)
+        lines = complete.splitlines()
+        for line in lines:
+            reset = _RESET_VERSION.match(line)
+            if reset is not None and self.version is not None and int(reset.group(1)) == self.version:
+                # A compaction of the state this replica already has.
+                continue
+            self._apply(json.loads(line))
+        self._synced_at = started
+        return len(lines)
+
+    def close(self) -> None:
+        """Close the log file. The next sync reopens it."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        self.version = entry.get("version", self.version)
+        if entry["op"] == "save":
+            self.repo.create(todo_from_dict(entry["todo"]))
+        elif entry["op"] == "delete":
+            if self.repo.get_by_id(entry["id"]) is not None:
+                self.repo.delete(entry["id"])
+        elif entry["op"] == "reset":
+            current = {todo.id: todo for todo in self.repo.get_all()}
+            changed = []
+            for item in entry["todos"]:
+                todo = todo_from_dict(item)
+                if current.pop(todo.id, None) != todo:
+                    changed.append(todo)
+            for todo_id in current:
+                self.repo.delete(todo_id)
+            if changed:
+                self.repo.create_many(changed)
@@ -1,7 +1,11 @@
-from typing import Dict, List, Optional
+import threading
+from dataclasses import replace
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional
 
 from core.entities import Todo
-from core.interfaces import TodoRepository
+from core.ids import SortedIdIndex
+from core.interfaces import TodoRepository, TodoTransaction, check_patch_fields, purge_batches
 
 
 class InMemoryTodoRepository(TodoRepository):
@@ -16,9 +20,14 @@ class InMemoryTodoRepository(TodoRepository):
         """Initialize the in-memory todo repository.
 
         The todos are stored in a dictionary where keys are todo IDs and values
-        are Todo objects.
+        are Todo objects. A sorted index of the IDs is built on the first
+        `list_page` call and maintained from then on. Writes hold a lock, so
+        concurrent writers, and transactions validated and applied against
+        them, do not interleave.
         """
         self.todos: Dict[str, Todo] = {}
+        self._index: Optional[SortedIdIndex] = None
+        self._lock = threading.RLock()
 
     def create(self, todo: Todo) -> Todo:
         """Create a new todo item in memory.
@@ -33,9 +42,32 @@ class InMemoryTodoRepository(TodoRepository):
         Todo
             The created todo item.
         """
-        self.todos[todo.id] = todo
+        with self._lock:
+            self.todos[todo.id] = todo
+            if self._index is not None:
+                self._index.add(todo.id)
         return todo
 
+    def create_many(self, todos: Iterable[Todo]) -> List[Todo]:
+        """Create many todo items in memory at once.
+
+        Parameters
+        ----------
+        todos : Iterable[Todo]
+            The todo items to be created.
+
+        Returns
+        -------
+        List[Todo]
+            The created todo items.
+        """
+        created = list(todos)
+        with self._lock:
+            self.todos.update((todo.id, todo) for todo in created)
+            if self._index is not None:
+                self._index.add_many(todo.id for todo in created)
+        return created
+
     def get_all(self) -> List[Todo]:
         """Retrieve all todo items from memory.
 
@@ -61,6 +93,28 @@ class InMemoryTodoRepository(TodoRepository):
         """
         return self.todos.get(todo_id)
 
+    def list_page(self, after: Optional[str] = None, limit: int = 100) -> List[Todo]:
+        """Retrieve a page of todo items in ID order from the sorted ID index.
+
+        Parameters
+        ----------
+        after : Optional[str], optional
+            Return items with IDs greater than this one, by default from the
+            first item.
+        limit : int, optional
+            The maximum number of items to return, by default 100.
+
+        Returns
+        -------
+        List[Todo]
+            The todo items, in ascending ID order.
+        """
+        # Under the write lock, every indexed ID is also in the dictionary.
+        with self._lock:
+            if self._index is None:
+                self._index = SortedIdIndex(self.todos)
+            return [self.todos[todo_id] for todo_id in self._index.after(after, limit)]
+
     def update(self, todo: Todo) -> Todo:
         """Update an existing todo item in memory.
 
@@ -79,9 +133,40 @@ class InMemoryTodoRepository(TodoRepository):
         ValueError
             If the todo item with the given ID is not found.
         """
-        if todo.id not in self.todos:
-            raise ValueError(f"Todo with ID {todo.id} not found.")
-        self.todos[todo.id] = todo
+        with self._lock:
+            if todo.id not in self.todos:
+                raise ValueError(f"Todo with ID {todo.id} not found.")
+            self.todos[todo.id] = todo
+        return todo
+
+    def patch(self, todo_id: str, fields: Mapping[str, Any]) -> Todo:
+        """Change selected fields of a todo item in place.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to change.
+        fields : Mapping[str, Any]
+            The new values, keyed by field name.
+
+        Returns
+        -------
+        Todo
+            The changed todo item.
+
+        Raises
+        ------
+        ValueError
+            If the todo item is not found or a field cannot be patched.
+        """
+        check_patch_fields(fields)
+        with self._lock:
+            todo = self.todos.get(todo_id)
+            if todo is None:
+                raise ValueError(f"Todo with ID {todo_id} not found.")
+            # Items are replaced rather than changed in place, so transactions can
+            # keep the versions they read.
+            todo = self.todos[todo_id] = replace(todo, **fields)
         return todo
 
     def delete(self, todo_id: str) -> None:
@@ -101,6 +186,54 @@ class InMemoryTodoRepository(TodoRepository):
         ValueError
             If the todo item with the given ID is not found.
         """
-        if todo_id not in self.todos:
-            raise ValueError(f"Todo with ID {todo_id} not found.")
-        del self.todos[todo_id]
+        with self._lock:
+            if todo_id not in self.todos:
+                raise ValueError(f"Todo with ID {todo_id} not found.")
+            del self.todos[todo_id]
+            if self._index is not None:
+                self._index.discard(todo_id)
+
+    def purge_completed(
+        self, older_than: datetime, limit: Optional[int] = None, deadline: Optional[float] = None
+    ) -> List[str]:
+        """Delete completed todo items created before a point in time from memory.
+
+        The items are selected with a single scan, and the ID index is rebuilt
+        once at the end.
+
+        Parameters
+        ----------
+        older_than : datetime
+            Completed todo items created before this moment are deleted.
+        limit : Optional[int], optional
+            The maximum number of items to delete in this call, by default no
+            limit.
+        deadline : Optional[float], optional
+            A `time.monotonic` value after which no further batch is started, by
+            default no deadline.
+
+        Returns
+        -------
+        List[str]
+            The IDs of the deleted todo items.
+        """
+        purged: List[str] = []
+        with self._lock:
+            for batch in purge_batches(self.todos.values(), older_than, limit, deadline):
+                for todo_id in batch:
+                    del self.todos[todo_id]
+                purged.extend(batch)
+            if purged and self._index is not None:
+                self._index = SortedIdIndex(self.todos)
+        return purged
+
+    def _commit_transaction(self, transaction: TodoTransaction) -> None:
+        # Validating and applying under the write lock makes the first committer win.
+        with self._lock:
+            transaction.apply_to(self.todos)
+            if self._index is not None:
+                for todo_id, todo in transaction.writes.items():
+                    if todo is None:
+                        self._index.discard(todo_id)
+                    else:
+                        self._index.add(todo_id)
@@ -0,0 +1,179 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class JobMetrics:
+    """Run statistics of a scheduled job.
+
+    Attributes
+    ----------
+    runs : int
+        The number of completed runs, successful or not.
+    failures : int
+        The number of runs that raised an exception.
+    overruns : int
+        The number of runs that took longer than the job's time budget.
+    last_duration : Optional[float]
+        The duration of the last run in seconds, or None before the first run.
+    total_duration : float
+        The summed duration of all runs in seconds.
+    last_result : Any
+        The value returned by the last successful run.
+    last_error : Optional[str]
+        The error message of the last failed run, if any.
+    """
+
+    runs: int = 0
+    failures: int = 0
+    overruns: int = 0
+    last_duration: Optional[float] = None
+    total_duration: float = 0.0
+    last_result: Any = None
+    last_error: Optional[str] = None
+
+
+@dataclass
+class Job:
+    """A periodic job run by the `Scheduler`.
+
+    Attributes
+    ----------
+    name : str
+        A unique, human readable name.
+    func : Callable[[Optional[float]], Any]
+        The work to run. It receives a `time.monotonic` deadline derived from
+        `time_budget` (or None) and should stop starting new work after it.
+    interval : float
+        The average number of seconds between runs.
+    jitter : float, optional
+        The fraction of `interval` by which each delay is randomly shortened or
+        lengthened, by default 0.1. Jitter keeps jobs of many processes from
+        running in lockstep.
+    time_budget : Optional[float], optional
+        The number of seconds a run should take at most, by default no budget.
+    metrics : JobMetrics
+        The run statistics, updated after every run.
+    """
+
+    name: str
+    func: Callable[[Optional[float]], Any]
+    interval: float
+    jitter: float = 0.1
+    time_budget: Optional[float] = None
+    metrics: JobMetrics = field(default_factory=JobMetrics)
+
+
+class Scheduler:
+    """A small in-process scheduler running periodic jobs on a background thread.
+
+    Jobs run one at a time, so a slow job delays the others instead of
+    competing with them (and with request handling) for the same resources.
+    """
+
+    def __init__(
+        self,
+        jobs: List[Job],
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        """Initialize the scheduler.
+
+        Parameters
+        ----------
+        jobs : List[Job]
+            The jobs to run.
+        clock : Callable[[], float], optional
+            A monotonic clock, by default `time.monotonic`.
+        rng : Optional[random.Random], optional
+            The random source for jitter, by default a new `random.Random`.
+        """
+        self.jobs = jobs
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._next_run: Dict[str, float] = {}
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _delay(self, job: Job) -> float:
+        return job.interval * (1 + self._rng.uniform(-job.jitter, job.jitter))
+
+    def run_job(self, job: Job) -> None:
+        """Run a single job once and record its metrics.
+
+        Parameters
+        ----------
+        job : Job
+            The job to run.
+        """
+        started = self._clock()
+        deadline = started + job.time_budget if job.time_budget is not None else None
+        try:
+            job.metrics.last_result = job.func(deadline)
+            job.metrics.last_error = None
+        except Exception as e:
+            job.metrics.failures += 1
+            job.metrics.last_error = str(e)
+            logger.exception("Scheduled job %s failed", job.name)
+        duration = self._clock() - started
+        job.metrics.runs += 1
+        job.metrics.last_duration = duration
+        job.metrics.total_duration += duration
+        if job.time_budget is not None and duration > job.time_budget:
+            job.metrics.overruns += 1
+            logger.warning("Scheduled job %s took %.3fs, over its %.3fs budget", job.name, duration, job.time_budget)
+
+    def run_all(self) -> None:
+        """Run every job once, in order, in the calling thread."""
+        for job in self.jobs:
+            self.run_job(job)
+
+    def run_pending(self) -> Optional[float]:
+        """Run the jobs that are due and reschedule them.
+
+        Returns
+        -------
+        Optional[float]
+            The number of seconds until the next job is due, or None without jobs.
+        """
+        now = self._clock()
+        for job in self.jobs:
+            next_run = self._next_run.setdefault(job.name, now + self._delay(job))
+            if next_run <= now:
+                self.run_job(job)
+                self._next_run[job.name] = self._clock() + self._delay(job)
+        if not self._next_run:
+            return None
+        return max(0.0, min(self._next_run.values()) - self._clock())
+
+    def _loop(self) -> None:
+        while not self._stopping.is_set():
+            delay = self.run_pending()
+            self._stopping.wait(delay)
+
+    def start(self) -> None:
+        """Start running jobs on a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name="todo-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread, waiting for a running job to finish.
+
+        Parameters
+        ----------
+        timeout : Optional[float], optional
+            The maximum number of seconds to wait, by default no limit.
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,401 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from core.codec import TodoCodec, todo_to_dict
+from core.entities import Todo
+from core.interfaces import TodoTransaction
+from core.json_repository import JsonTodoRepository
+from core.replication import ChangeLog
+
+_COUNTER = struct.Struct("<Q")
+
+
+class ChangeCounter:
+    """A change counter shared by all processes through a memory-mapped file.
+
+    Reading the counter is a memory access, so processes can poll it on every
+    request to find out cheaply whether another process changed the store.
+    Increments must be serialized by the caller, e.g. with an `InterProcessLock`.
+    """
+
+    def __init__(self, path: str):
+        """Open or create the counter file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the counter file.
+        """
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < _COUNTER.size:
+                os.ftruncate(fd, _COUNTER.size)
+            self._map = mmap.mmap(fd, _COUNTER.size)
+        finally:
+            os.close(fd)
+
+    @property
+    def value(self) -> int:
+        """Return the current value of the counter."""
+        return _COUNTER.unpack_from(self._map)[0]
+
+    def increment(self) -> int:
+        """Increment the counter.
+
+        Returns
+        -------
+        int
+            The new value.
+        """
+        value = self.value + 1
+        _COUNTER.pack_into(self._map, 0, value)
+        return value
+
+    def close(self) -> None:
+        """Unmap the counter file."""
+        self._map.close()
+
+
+class InterProcessLock:
+    """A reader-writer lock shared by all processes, based on `fcntl.flock`.
+
+    The lock is reentrant within a process: nested acquisitions by the thread
+    that holds it are no-ops, and other threads of the process wait for it.
+    """
+
+    def __init__(self, path: str):
+        """Open or create the lock file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the lock file.
+        """
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+
+    @contextmanager
+    def _acquire(self, operation: int) -> Iterator[None]:
+        with self._thread_lock:
+            if self._depth == 0:
+                fcntl.flock(self._fd, operation)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def shared(self):
+        """Hold the lock for reading; other readers may hold it at the same time."""
+        return self._acquire(fcntl.LOCK_SH)
+
+    def exclusive(self):
+        """Hold the lock for writing."""
+        return self._acquire(fcntl.LOCK_EX)
+
+    def close(self) -> None:
+        """Close the lock file."""
+        os.close(self._fd)
+
+
+class SharedJsonTodoRepository(JsonTodoRepository):
+    """A JSON todo repository that several processes can use at the same time.
+
+    Every mutation runs under an exclusive `InterProcessLock`, after reloading
+    the file if another process changed it, and increments a shared
+    `ChangeCounter`. Reads reload the file first if the counter shows a change
+    by another process. An optional `ChangeLog` receives every change while
+    the lock is held, so the log has the same order as the file and replicas
+    in any process can follow it.
+
+    The lock and counter live next to the JSON file, in "<file>.lock" and
+    "<file>.version".
+    """
+
+    def __init__(
+        self,
+        file_path: str = "todos.json",
+        change_log: Optional[ChangeLog] = None,
+        max_log_entries: int = 10_000,
+        codec: Optional[TodoCodec] = None,
+    ):
+        """Initialize the shared JSON todo repository.
+
+        Parameters
+        ----------
+        file_path : str, optional
+            The path to the JSON file where todos are stored, by default
+            "todos.json".
+        change_log : Optional[ChangeLog], optional
+            The log to record changes in, by default None. It is reset with
+            the current contents when the repository is opened, unless it is
+            already at the current version.
+        max_log_entries : int, optional
+            The number of entries this process appends before it compacts the
+            log, by default 10,000.
+        codec : Optional[TodoCodec], optional
+            The codec that reads and writes the file, by default the fastest
+            one installed.
+        """
+        self.lock = InterProcessLock(f"{file_path}.lock")
+        self.counter = ChangeCounter(f"{file_path}.version")
+        self.change_log = change_log
+        self.max_log_entries = max_log_entries
+        with self.lock.exclusive():
+            super().__init__(file_path, codec)
+            self._seen = self.counter.value
+            self._compacted: Optional[int] = None
+            # Other processes keep the log current, so usually only the first
+            # one to open the store writes it.
+            if change_log is not None and change_log.last_version() != self._seen:
+                change_log.reset(self.todos.values(), self._seen)
+
+    def _refresh(self) -> None:
+        if self.counter.value == self._seen:
+            return
+        with self.lock.shared():
+            # Another process may have written between the check and the lock.
+            self._seen = self.counter.value
+            todos = self._load_todos()
+            with self._lock:
+                self.todos = todos
+                self._index = None
+
+    @contextmanager
+    def _write(self) -> Iterator[List[Dict[str, Any]]]:
+        """Run a mutation exclusively on the latest data and log its changes."""
+        with self.lock.exclusive():
+            self._refresh()
+            if self.change_log is not None and self.change_log.entries >= self.max_log_entries:
+                # Compacted before the change, at the version that replicas
+                # which are caught up already have, so they skip the reset.
+                self.change_log.reset(self.todos.values(), self._seen)
+            entries: List[Dict[str, Any]] = []
+            yield entries
+            # Mutations that changed nothing do not make other processes reload.
+            if not entries:
+                return
+            version = self.counter.increment()
+            self._seen = version
+            if self.change_log is None:
+                return
+            for entry in entries:
+                entry["version"] = version
+            self.change_log.append(entries)
+
+    def create(self, todo: Todo) -> Todo:
+        """Create a new todo item in the shared file.
+
+        Parameters
+        ----------
+        todo : Todo
+            The todo item to be created.
+
+        Returns
+        -------
+        Todo
+            The created todo item.
+        """
+        with self._write() as entries:
+            created = super().create(todo)
+            entries.append({"op": "save", "todo": todo_to_dict(created)})
+        return created
+
+    def create_many(self, todos: Iterable[Todo]) -> List[Todo]:
+        """Create many todo items in the shared file with a single write.
+
+        Parameters
+        ----------
+        todos : Iterable[Todo]
+            The todo items to be created.
+
+        Returns
+        -------
+        List[Todo]
+            The created todo items.
+        """
+        with self._write() as entries:
+            created = super().create_many(todos)
+            entries.extend({"op": "save", "todo": todo_to_dict(todo)} for todo in created)
+        return created
+
+    def get_all(self) -> List[Todo]:
+        """Retrieve all todo items, including changes made by other processes.
+
+        Returns
+        -------
+        List[Todo]
+            A list of all todo items.
+        """
+        self._refresh()
+        return super().get_all()
+
+    def get_by_id(self, todo_id: str) -> Optional[Todo]:
+        """Retrieve a specific todo item, including changes made by other processes.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to retrieve.
+
+        Returns
+        -------
+        Optional[Todo]
+            The retrieved todo item, or None if not found.
+        """
+        self._refresh()
+        return super().get_by_id(todo_id)
+
+    def list_page(self, after: Optional[str] = None, limit: int = 100) -> List[Todo]:
+        """Retrieve a page of todo items in ID order, including changes made by other processes.
+
+        Parameters
+        ----------
+        after : Optional[str], optional
+            Return items with IDs greater than this one, by default from the
+            first item.
+        limit : int, optional
+            The maximum number of items to return, by default 100.
+
+        Returns
+        -------
+        List[Todo]
+            The todo items, in ascending ID order.
+        """
+        self._refresh()
+        return super().list_page(after, limit)
+
+    def update(self, todo: Todo) -> Todo:
+        """Update an existing todo item in the shared file.
+
+        Parameters
+        ----------
+        todo : Todo
+            The todo item with updated information.
+
+        Returns
+        -------
+        Todo
+            The updated todo item.
+
+        Raises
+        ------
+        ValueError
+            If the todo item with the given ID is not found.
+        """
+        with self._write() as entries:
+            updated = super().update(todo)
+            entries.append({"op": "save", "todo": todo_to_dict(updated)})
+        return updated
+
+    def patch(self, todo_id: str, fields: Mapping[str, Any]) -> Todo:
+        """Change selected fields of a todo item in the shared file.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to change.
+        fields : Mapping[str, Any]
+            The new values, keyed by field name.
+
+        Returns
+        -------
+        Todo
+            The changed todo item.
+
+        Raises
+        ------
+        ValueError
+            If the todo item is not found or a field cannot be patched.
+        """
+        with self._write() as entries:
+            patched = super().patch(todo_id, fields)
+            entries.append({"op": "save", "todo": todo_to_dict(patched)})
+        return patched
+
+    def delete(self, todo_id: str) -> None:
+        """Delete a todo item from the shared file.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to delete.
+
+        Raises
+        ------
+        ValueError
+            If the todo item with the given ID is not found.
+        """
+        with self._write() as entries:
+            super().delete(todo_id)
+            entries.append({"op": "delete", "id": todo_id})
+
+    def purge_completed(
+        self, older_than: datetime, limit: Optional[int] = None, deadline: Optional[float] = None
+    ) -> List[str]:
+        """Delete completed todo items created before a given moment from the shared file.
+
+        Parameters
+        ----------
+        older_than : datetime
+            Completed todo items created before this moment are deleted.
+        limit : Optional[int], optional
+            The maximum number of items to delete in this call, by default no
+            limit.
+        deadline : Optional[float], optional
+            A `time.monotonic` value after which no further batch is started, by
+            default no deadline.
+
+        Returns
+        -------
+        List[str]
+            The IDs of the deleted todo items.
+        """
+        with self._write() as entries:
+            purged = super().purge_completed(older_than, limit, deadline)
+            entries.extend({"op": "delete", "id": todo_id} for todo_id in purged)
+        return purged
+
+    def compact(self) -> None:
+        """Rewrite the shared file if it differs from what the codec would write.
+
+        No item changes, so other processes are not told to reload. The file
+        is not checked again until another write happens.
+        """
+        with self._write():
+            if self._compacted == self._seen:
+                return
+            with self._lock:
+                data = self.codec.encode_todos(self.todos.values())
+                try:
+                    with open(self.file_path, "rb") as f:
+                        unchanged = f.read() == data
+                except FileNotFoundError:
+                    unchanged = False
+                if not unchanged:
+                    self._write_file(data)
+            self._compacted = self._seen
+
+    def _commit_transaction(self, transaction: TodoTransaction) -> None:
+        with self._write() as entries:
+            super()._commit_transaction(transaction)
+            entries.extend(
+                {"op": "save", "todo": todo_to_dict(todo)} if todo is not None else {"op": "delete", "id": todo_id}
+                for todo_id, todo in transaction.writes.items()
+            )
+
+    def close(self) -> None:
+        """Release the lock and counter files."""
+        self.lock.close()
+        self.counter.close()
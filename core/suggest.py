@@ -0,0 +1,293 @@
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+from core.entities import Todo
+from core.observable import TodoRepositoryListener
+
+MAX_SUGGESTIONS = 20
+
+# (-created_at timestamp, id): ascending order is most recent first.
+_Entry = Tuple[float, str]
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a title for prefix matching.
+
+    Titles are NFKC-normalized and case-folded, and runs of whitespace are
+    collapsed into single spaces. A trailing space is kept, so that a query
+    for "buy " only matches whole words.
+
+    Parameters
+    ----------
+    title : str
+        The title or query prefix.
+
+    Returns
+    -------
+    str
+        The normalized text.
+    """
+    normalized = " ".join(unicodedata.normalize("NFKC", title).casefold().split())
+    if normalized and title[-1:].isspace():
+        normalized += " "
+    return normalized
+
+
+class _Node:
+    __slots__ = ("label", "children", "items", "top")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.children: Optional[Dict[str, "_Node"]] = None
+        # The entries of the items whose key ends at this node, most recent first.
+        self.items: Optional[List[_Entry]] = None
+        # The most recent entries in this node's subtree, most recent first.
+        self.top: List[_Entry] = []
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    length = min(len(a), len(b))
+    for i in range(length):
+        if a[i] != b[i]:
+            return i
+    return length
+
+
+class TitleTrie(TodoRepositoryListener):
+    """A compressed prefix trie over the normalized titles of a repository.
+
+    Every node caches the `capacity` most recently created items of its
+    subtree, so the most recent matches of a prefix are found by walking down
+    the prefix, independent of the number of items. Creating an item updates
+    the caches along its key's path; deleting one only recomputes the caches
+    that contained it, from the caches of their children.
+    """
+
+    def __init__(self, capacity: int = MAX_SUGGESTIONS):
+        """Initialize an empty trie.
+
+        Parameters
+        ----------
+        capacity : int, optional
+            The number of most recent items cached per node, which bounds the
+            number of suggestions per query, by default `MAX_SUGGESTIONS`.
+        """
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._root = _Node("")
+        # The key and entry of every indexed item, by ID.
+        self._keys: Dict[str, Tuple[str, _Entry]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed todo items."""
+        return len(self._keys)
+
+    def _offer(self, node: _Node, entry: _Entry) -> None:
+        top = node.top
+        if len(top) < self.capacity:
+            insort(top, entry)
+        elif entry < top[-1]:
+            insort(top, entry)
+            top.pop()
+
+    def _recompute(self, node: _Node) -> None:
+        own = node.items[: self.capacity] if node.items else ()
+        tops = (child.top for child in node.children.values()) if node.children else ()
+        node.top = heapq.nsmallest(self.capacity, chain(own, *tops))
+
+    def _fill(self, root: _Node, keys: List[str], entries: List[_Entry]) -> None:
+        # Attach the sorted keys below the root. Titles can nest deeper than
+        # the recursion limit, so the inner nodes are filled from a stack.
+        inner = []
+        stack = [(root, 0, len(keys), 0)]
+        while stack:
+            # Attach keys[lo:hi], which all start with the node's key keys[lo][:end].
+            node, lo, hi, end = stack.pop()
+            inner.append(node)
+            i = lo
+            while i < hi and len(keys[i]) == end:
+                i += 1
+            if i > lo:
+                node.items = entries[lo:i]
+            if i < hi:
+                node.children = {}
+            while i < hi:
+                char = keys[i][end]
+                upper = chr(ord(char) + 1) if char < "\U0010ffff" else None
+                j = hi if upper is None else bisect_left(keys, keys[i][:end] + upper, i, hi)
+                if j == i + 1:
+                    # Most nodes are leaves holding a single item.
+                    child = node.children[char] = _Node(keys[i][end:])
+                    child.items, child.top = [entries[i]], [entries[i]]
+                else:
+                    # Sorted keys share the longest prefix of the first and last one.
+                    length = _common_prefix_length(keys[i], keys[j - 1])
+                    child = node.children[char] = _Node(keys[i][end:length])
+                    stack.append((child, i, j, length))
+                i = j
+        # Children were filled after their parents, so their caches are computed first.
+        for node in reversed(inner):
+            self._recompute(node)
+
+    def _insert(self, key: str, entry: _Entry) -> None:
+        node, rest = self._root, key
+        self._offer(node, entry)
+        while rest:
+            if node.children is None:
+                node.children = {}
+            child = node.children.get(rest[0])
+            if child is None:
+                child = node.children[rest[0]] = _Node(rest)
+            else:
+                common = _common_prefix_length(child.label, rest)
+                if common < len(child.label):
+                    # Split the edge; the new inner node has the same subtree.
+                    inner = node.children[rest[0]] = _Node(child.label[:common])
+                    child.label = child.label[common:]
+                    inner.children = {child.label[0]: child}
+                    inner.top = list(child.top)
+                    child = inner
+            self._offer(child, entry)
+            node, rest = child, rest[len(child.label) :]
+        if node.items is None:
+            node.items = []
+        insort(node.items, entry)
+
+    def _remove(self, key: str, entry: _Entry) -> None:
+        path = [self._root]
+        rest = key
+        while rest:
+            child = path[-1].children[rest[0]]
+            path.append(child)
+            rest = rest[len(child.label) :]
+        node = path[-1]
+        del node.items[bisect_left(node.items, entry)]
+        if not node.items:
+            node.items = None
+        if len(path) > 1 and node.items is None:
+            parent = path[-2]
+            if node.children is None:
+                # Drop the empty leaf, which may leave its parent with a single child.
+                del parent.children[node.label[0]]
+                path.pop()
+                node, parent = parent, path[-2] if len(path) > 1 else None
+                if not node.children:
+                    node.children = None
+            if parent is not None and node.items is None and node.children and len(node.children) == 1:
+                # Merge a pass-through node into its only child, whose cache
+                # never held the removed entry.
+                (child,) = node.children.values()
+                child.label = node.label + child.label
+                parent.children[node.label[0]] = child
+                path.pop()
+        for node in reversed(path):
+            position = bisect_left(node.top, entry)
+            if position < len(node.top) and node.top[position] == entry:
+                self._recompute(node)
+
+    def rebuild(self, todos: List[Todo]) -> None:
+        """Rebuild the trie from the given todo items.
+
+        Parameters
+        ----------
+        todos : List[Todo]
+            Every todo item currently held by the repository.
+        """
+        indexed = sorted((normalize_title(todo.title), (-todo.created_at.timestamp(), str(todo.id))) for todo in todos)
+        self._build(indexed)
+
+    def _build(self, indexed: List[Tuple[str, _Entry]]) -> None:
+        keys = [key for key, _ in indexed]
+        entries = [entry for _, entry in indexed]
+        # Building from sorted keys creates every node once, with its final label.
+        root = _Node("")
+        self._fill(root, keys, entries)
+        with self._lock:
+            self._root = root
+            self._keys = {entry[1]: (key, entry) for key, entry in indexed}
+
+    def todo_saved(self, todo: Todo) -> None:
+        """Index a created todo item, or re-index an updated one.
+
+        Parameters
+        ----------
+        todo : Todo
+            The todo item as stored after the change.
+        """
+        todo_id = str(todo.id)
+        key, entry = normalize_title(todo.title), (-todo.created_at.timestamp(), todo_id)
+        with self._lock:
+            previous = self._keys.get(todo_id)
+            if previous == (key, entry):
+                return
+            if previous is not None:
+                self._remove(*previous)
+            self._keys[todo_id] = (key, entry)
+            self._insert(key, entry)
+
+    def todo_deleted(self, todo_id: str) -> None:
+        """Remove a deleted todo item from the trie.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the deleted todo item.
+        """
+        with self._lock:
+            previous = self._keys.pop(todo_id, None)
+            if previous is not None:
+                self._remove(*previous)
+
+    def todos_deleted(self, todo_ids: List[str]) -> None:
+        """Remove many deleted todo items from the trie.
+
+        When a large share of the items is deleted, the trie is rebuilt from
+        the remaining keys, which is much faster than removing them one by one.
+
+        Parameters
+        ----------
+        todo_ids : List[str]
+            The IDs of the deleted todo items.
+        """
+        if len(todo_ids) * 4 < len(self._keys):
+            super().todos_deleted(todo_ids)
+            return
+        deleted = set(todo_ids)
+        # Changes are notified one at a time, so none can arrive while rebuilding.
+        self._build(sorted(indexed for todo_id, indexed in self._keys.items() if todo_id not in deleted))
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """Return the most recently created items whose titles start with a prefix.
+
+        Parameters
+        ----------
+        prefix : str
+            The prefix, matched against normalized titles.
+        limit : int, optional
+            The maximum number of results, by default 10. At most `capacity`
+            results are returned.
+
+        Returns
+        -------
+        List[str]
+            The IDs of the matching todo items, most recently created first.
+        """
+        rest = normalize_title(prefix)
+        with self._lock:
+            node = self._root
+            while rest:
+                child = node.children.get(rest[0]) if node.children else None
+                if child is None:
+                    return []
+                if rest.startswith(child.label):
+                    rest = rest[len(child.label) :]
+                elif child.label.startswith(rest):
+                    rest = ""
+                else:
+                    return []
+                node = child
+            return [todo_id for _, todo_id in node.top[:limit]]
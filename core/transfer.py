@@ -0,0 +1,334 @@
+import csv
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, TextIO, Tuple, TypeVar
+
+from core.entities import DEFAULT_LIST_ID, Todo
+from core.ids import new_todo_id
+
+FORMATS = ("csv", "tsv", "ndjson", "json")
+CSV_FIELDS = ["id", "title", "description", "completed", "created_at"]
+DEFAULT_CHUNK_SIZE = 10_000
+
+_EXTENSIONS = {".csv": "csv", ".tsv": "tsv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "json"}
+_DELIMITERS = {"csv": ",", "tsv": "\t"}
+_TRUE_VALUES = {"true", "1", "yes", "y"}
+_FALSE_VALUES = {"false", "0", "no", "n", ""}
+
+# Field values in the positional order of the `Todo` dataclass, so a row can be
+# turned back into an entity with `Todo(*row)`. Plain tuples are much cheaper
+# to pickle between processes than dataclass instances.
+TodoRow = Tuple[str, str, Optional[str], bool, datetime]
+RawChunk = Tuple[int, List[Any]]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def detect_format(path: str) -> str:
+    """Guess the transfer format of a file from its extension.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    Returns
+    -------
+    str
+        One of the supported `FORMATS`.
+
+    Raises
+    ------
+    ValueError
+        If the extension does not map to a supported format.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in _EXTENSIONS:
+        raise ValueError(f"Cannot infer format from '{path}'. Use one of: {', '.join(FORMATS)}.")
+    return _EXTENSIONS[extension]
+
+
+def todo_to_row(todo: Todo) -> TodoRow:
+    """Convert a todo item into a picklable row tuple.
+
+    Parameters
+    ----------
+    todo : Todo
+        The todo item to convert.
+
+    Returns
+    -------
+    TodoRow
+        The todo fields in dataclass order.
+    """
+    return (todo.title, str(todo.id), todo.description, todo.completed, todo.created_at)
+
+
+def _parse_completed(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in _TRUE_VALUES:
+        return True
+    if isinstance(value, str) and value.strip().lower() in _FALSE_VALUES:
+        return False
+    raise ValueError(f"invalid completed flag {value!r}")
+
+
+def _record_to_row(record: Any) -> TodoRow:
+    if not isinstance(record, dict):
+        raise ValueError("expected an object")
+    title = record.get("title")
+    if not isinstance(title, str) or not title:
+        raise ValueError("missing title")
+    todo_id = record.get("id") or new_todo_id()
+    description = record.get("description") or None
+    if description is not None and not isinstance(description, str):
+        raise ValueError(f"invalid description {description!r}")
+    completed = _parse_completed(record.get("completed", False))
+    created_at = record.get("created_at")
+    created_at = datetime.fromisoformat(created_at) if created_at else datetime.now()
+    if created_at.tzinfo is not None:
+        # Stored times are naive local times, which cannot be compared with aware ones.
+        created_at = created_at.astimezone().replace(tzinfo=None)
+    return (title, str(todo_id), description, completed, created_at)
+
+
+def parse_chunk(fmt: str, chunk: RawChunk) -> List[TodoRow]:
+    """Parse and validate one chunk of raw records.
+
+    This function runs inside worker processes, so it only takes and returns
+    picklable values.
+
+    Parameters
+    ----------
+    fmt : str
+        The transfer format the chunk was read from.
+    chunk : RawChunk
+        The index of the first record in the chunk and the raw records: text
+        lines for NDJSON, dictionaries for CSV, TSV and JSON.
+
+    Returns
+    -------
+    List[TodoRow]
+        The validated rows, in input order.
+
+    Raises
+    ------
+    ValueError
+        If a record cannot be decoded or fails validation.
+    """
+    start, records = chunk
+    rows = []
+    for offset, record in enumerate(records):
+        try:
+            if fmt == "ndjson":
+                if not record.strip():
+                    continue
+                record = json.loads(record)
+            rows.append(_record_to_row(record))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid todo record #{start + offset + 1}: {e}") from None
+    return rows
+
+
+def serialize_chunk(fmt: str, rows: List[TodoRow]) -> str:
+    """Serialize one chunk of rows to text.
+
+    Parameters
+    ----------
+    fmt : str
+        The transfer format to produce.
+    rows : List[TodoRow]
+        The rows to serialize.
+
+    Returns
+    -------
+    str
+        The serialized rows, without any per-file header or framing.
+    """
+    if fmt in _DELIMITERS:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=_DELIMITERS[fmt], lineterminator="\n")
+        writer.writerows(
+            (todo_id, title, description or "", "true" if completed else "false", created_at.isoformat())
+            for title, todo_id, description, completed, created_at in rows
+        )
+        return buffer.getvalue()
+
+    records = (
+        json.dumps(
+            {
+                "id": todo_id,
+                "title": title,
+                "description": description,
+                "completed": completed,
+                "created_at": created_at.isoformat(),
+            },
+            ensure_ascii=False,
+        )
+        for title, todo_id, description, completed, created_at in rows
+    )
+    if fmt == "json":
+        return ",\n".join(records)
+    return "".join(f"{record}\n" for record in records)
+
+
+def read_chunks(stream: TextIO, fmt: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[RawChunk]:
+    """Read raw records from a stream in chunks.
+
+    NDJSON, CSV and TSV are streamed. JSON documents are a single array and have to
+    be decoded whole before they can be split.
+
+    Parameters
+    ----------
+    stream : TextIO
+        The stream to read from.
+    fmt : str
+        The transfer format of the stream.
+    chunk_size : int, optional
+        The number of records per chunk, by default `DEFAULT_CHUNK_SIZE`.
+
+    Yields
+    ------
+    RawChunk
+        The index of the first record in the chunk and the raw records.
+
+    Raises
+    ------
+    ValueError
+        If the format is unknown or a JSON document is not an array.
+    """
+    if fmt == "ndjson":
+        records: Iterator[Any] = iter(stream)
+    elif fmt in _DELIMITERS:
+        records = iter(csv.DictReader(stream, delimiter=_DELIMITERS[fmt]))
+    elif fmt == "json":
+        data = json.load(stream)
+        if not isinstance(data, list):
+            raise ValueError("JSON import expects an array of todo records.")
+        records = iter(data)
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+
+    start = 0
+    while chunk := list(islice(records, chunk_size)):
+        yield start, chunk
+        start += len(chunk)
+
+
+def write_chunks(stream: TextIO, fmt: str, chunks: Iterable[str]) -> None:
+    """Write serialized chunks to a stream, adding the per-format framing.
+
+    Parameters
+    ----------
+    stream : TextIO
+        The stream to write to.
+    fmt : str
+        The transfer format of the chunks.
+    chunks : Iterable[str]
+        The chunks produced by `serialize_chunk`, in order.
+
+    Raises
+    ------
+    ValueError
+        If the format is unknown.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+    if fmt in _DELIMITERS:
+        stream.write(_DELIMITERS[fmt].join(CSV_FIELDS) + "\n")
+    if fmt != "json":
+        for chunk in chunks:
+            stream.write(chunk)
+        return
+
+    stream.write("[")
+    separator = "\n"
+    for chunk in chunks:
+        stream.write(separator + chunk)
+        separator = ",\n"
+    stream.write("\n]\n")
+
+
+def parallel_map(func: Callable[[T], R], items: Iterable[T], workers: Optional[int] = None) -> Iterator[R]:
+    """Apply a function to items in a process pool, yielding results in order.
+
+    At most two tasks per worker are in flight, so arbitrarily long inputs are
+    processed in bounded memory.
+
+    Parameters
+    ----------
+    func : Callable[[T], R]
+        A picklable, module-level function.
+    items : Iterable[T]
+        The items to process.
+    workers : Optional[int], optional
+        The number of worker processes, by default one per CPU. With a single
+        worker the items are processed in the calling process.
+
+    Yields
+    ------
+    R
+        The result for each item, in input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(func, items)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending: Deque[Future] = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def rows_to_todos(chunks: Iterable[List[TodoRow]], list_id: str = DEFAULT_LIST_ID) -> Iterator[Todo]:
+    """Flatten parsed chunks into todo items.
+
+    Parameters
+    ----------
+    chunks : Iterable[List[TodoRow]]
+        The chunks returned by `parse_chunk`.
+    list_id : str, optional
+        The list the todo items are imported into, by default `DEFAULT_LIST_ID`.
+
+    Yields
+    ------
+    Todo
+        One todo item per row.
+    """
+    for rows in chunks:
+        for row in rows:
+            yield Todo(*row, list_id=list_id)
+
+
+def todos_to_chunks(todos: List[Todo], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[TodoRow]]:
+    """Split todo items into chunks of rows ready for `serialize_chunk`.
+
+    Parameters
+    ----------
+    todos : List[Todo]
+        The todo items to split.
+    chunk_size : int, optional
+        The number of rows per chunk, by default `DEFAULT_CHUNK_SIZE`.
+
+    Yields
+    ------
+    List[TodoRow]
+        The next chunk of rows.
+    """
+    for start in range(0, len(todos), chunk_size):
+        yield [todo_to_row(todo) for todo in todos[start : start + chunk_size]]
@@ -1,7 +1,26 @@
-from typing import List, Optional
+from dataclasses import replace
+from datetime import datetime, timedelta
+from functools import partial
+from typing import TYPE_CHECKING, Any, Iterable, List, Mapping, Optional, TextIO, Tuple
 
-from core.entities import Todo
+from core.entities import DEFAULT_LIST_ID, Todo
 from core.interfaces import TodoRepository
+from core.suggest import TitleTrie
+from core.transfer import (
+    DEFAULT_CHUNK_SIZE,
+    parallel_map,
+    parse_chunk,
+    read_chunks,
+    rows_to_todos,
+    serialize_chunk,
+    todos_to_chunks,
+    write_chunks,
+)
+
+# The statistics need NumPy; importing it only for type checking keeps it out
+# of commands such as `todo list --format json`.
+if TYPE_CHECKING:
+    from core.stats import TodoColumns, TodoStatistics
 
 
 class CreateTodo:
@@ -10,15 +29,18 @@ class CreateTodo:
     This class encapsulates the logic for adding a new todo item to the repository.
     """
 
-    def __init__(self, todo_repo: TodoRepository):
+    def __init__(self, todo_repo: TodoRepository, list_id: str = DEFAULT_LIST_ID):
         """Initialize the CreateTodo use case.
 
         Parameters
         ----------
         todo_repo : TodoRepository
             The repository interface for interacting with todo items.
+        list_id : str, optional
+            The list new todo items belong to, by default `DEFAULT_LIST_ID`.
         """
         self.todo_repo = todo_repo
+        self.list_id = list_id
 
     def execute(self, title: str, description: Optional[str] = None) -> Todo:
         """Execute the create todo operation.
@@ -35,10 +57,48 @@ class CreateTodo:
         Todo
             The newly created todo item.
         """
-        todo = Todo(title=title, description=description)
+        todo = Todo(title=title, description=description, list_id=self.list_id)
         return self.todo_repo.create(todo)
 
 
+class CreateTodos:
+    """Use case for creating many todo items at once.
+
+    This class hands all new todo items to the repository's bulk `create_many`
+    path instead of creating them one by one.
+    """
+
+    def __init__(self, todo_repo: TodoRepository, list_id: str = DEFAULT_LIST_ID):
+        """Initialize the CreateTodos use case.
+
+        Parameters
+        ----------
+        todo_repo : TodoRepository
+            The repository interface for interacting with todo items.
+        list_id : str, optional
+            The list new todo items belong to, by default `DEFAULT_LIST_ID`.
+        """
+        self.todo_repo = todo_repo
+        self.list_id = list_id
+
+    def execute(self, items: Iterable[Tuple[str, Optional[str]]]) -> List[Todo]:
+        """Execute the create todos operation.
+
+        Parameters
+        ----------
+        items : Iterable[Tuple[str, Optional[str]]]
+            The title and optional description of each new todo item.
+
+        Returns
+        -------
+        List[Todo]
+            The newly created todo items, in input order.
+        """
+        return self.todo_repo.create_many(
+            Todo(title=title, description=description, list_id=self.list_id) for title, description in items
+        )
+
+
 class GetAllTodos:
     """Use case for retrieving all todo items.
 
@@ -66,6 +126,82 @@ class GetAllTodos:
         return self.todo_repo.get_all()
 
 
+class GetTodosPage:
+    """Use case for retrieving todo items page by page, in creation order.
+
+    Pages are addressed by cursor: the ID of the last item of the previous
+    page. Unlike offsets, cursors stay valid while items are created or
+    deleted.
+    """
+
+    def __init__(self, todo_repo: TodoRepository):
+        """Initialize the GetTodosPage use case.
+
+        Parameters
+        ----------
+        todo_repo : TodoRepository
+            The repository interface for interacting with todo items.
+        """
+        self.todo_repo = todo_repo
+
+    def execute(self, after: Optional[str] = None, limit: int = 100) -> List[Todo]:
+        """Execute the get todos page operation.
+
+        Parameters
+        ----------
+        after : Optional[str], optional
+            The ID of the last item of the previous page, by default None for
+            the first page.
+        limit : int, optional
+            The maximum number of items to return, by default 100.
+
+        Returns
+        -------
+        List[Todo]
+            The todo items of the page, in ascending ID order.
+        """
+        return self.todo_repo.list_page(after, limit)
+
+
+class SuggestTodos:
+    """Use case for suggesting todo items as the user types a title.
+
+    Matches are looked up in a `TitleTrie` that follows the repository, so
+    the cost of a suggestion does not depend on the number of todo items.
+    """
+
+    def __init__(self, todo_repo: TodoRepository, title_trie: TitleTrie):
+        """Initialize the SuggestTodos use case.
+
+        Parameters
+        ----------
+        todo_repo : TodoRepository
+            The repository interface for interacting with todo items.
+        title_trie : TitleTrie
+            The prefix index of the repository's titles.
+        """
+        self.todo_repo = todo_repo
+        self.title_trie = title_trie
+
+    def execute(self, prefix: str, limit: int = 10) -> List[Todo]:
+        """Execute the suggest todos operation.
+
+        Parameters
+        ----------
+        prefix : str
+            The beginning of the title, matched case-insensitively.
+        limit : int, optional
+            The maximum number of suggestions, by default 10.
+
+        Returns
+        -------
+        List[Todo]
+            The matching todo items, most recently created first.
+        """
+        todos = (self.todo_repo.get_by_id(todo_id) for todo_id in self.title_trie.suggest(prefix, limit))
+        return [todo for todo in todos if todo is not None]
+
+
 class GetTodoById:
     """Use case for retrieving a single todo item by ID.
 
@@ -146,18 +282,58 @@ class UpdateTodo:
         ValueError
             If the todo item with the given ID is not found.
         """
-        todo = self.todo_repo.get_by_id(todo_id)
-        if not todo:
-            raise ValueError(f"Todo with ID {todo_id} not found.")
+        changes = {
+            name: value
+            for name, value in (("title", title), ("description", description), ("completed", completed))
+            if value is not None
+        }
+        # Read and write in one transaction, so a concurrent change between the
+        # two is detected instead of silently overwritten.
+        with self.todo_repo.transaction() as transaction:
+            todo = transaction.get_by_id(todo_id)
+            if not todo:
+                raise ValueError(f"Todo with ID {todo_id} not found.")
+            return transaction.update(replace(todo, **changes))
+
+
+class PatchTodo:
+    """Use case for changing selected fields of a todo item.
+
+    Unlike `UpdateTodo`, this class does not fetch the todo item first; the
+    repository applies the changed fields directly.
+    """
 
-        if title is not None:
-            todo.title = title
-        if description is not None:
-            todo.description = description
-        if completed is not None:
-            todo.completed = completed
+    def __init__(self, todo_repo: TodoRepository):
+        """Initialize the PatchTodo use case.
 
-        return self.todo_repo.update(todo)
+        Parameters
+        ----------
+        todo_repo : TodoRepository
+            The repository interface for interacting with todo items.
+        """
+        self.todo_repo = todo_repo
+
+    def execute(self, todo_id: str, fields: Mapping[str, Any]) -> Todo:
+        """Execute the patch todo operation.
+
+        Parameters
+        ----------
+        todo_id : str
+            The ID of the todo item to change.
+        fields : Mapping[str, Any]
+            The new values of the fields to change, keyed by field name.
+
+        Returns
+        -------
+        Todo
+            The changed todo item.
+
+        Raises
+        ------
+        ValueError
+            If the todo item is not found or a field cannot be patched.
+        """
+        return self.todo_repo.patch(todo_id, fields)
 
 
 class DeleteTodo:
@@ -194,3 +370,225 @@ class DeleteTodo:
             If the todo item with the given ID is not found.
         """
         self.todo_repo.delete(todo_id)
+
+
+class ImportTodos:
+    """Use case for bulk importing todo items from a CSV, TSV, NDJSON or JSON stream.
+
+    Records are read in chunks and parsed and validated in a process pool. The
+    resulting todo items are handed to the repository's bulk `create_many` path.
+    """
+
+    def __init__(self, todo_repo: TodoRepository, list_id: str = DEFAULT_LIST_ID):
+        """Initialize the ImportTodos use case.
+
+        Parameters
+        ----------
+        todo_repo : TodoRepository
+            The repository interface for interacting with todo items.
+        list_id : str, optional
+            The list imported todo items belong to, by default `DEFAULT_LIST_ID`.
+        """
+        self.todo_repo = todo_repo
+        self.list_id = list_id
+
+    def execute(
+        self,
+        stream: TextIO,
+        fmt: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        workers: Optional[int] = None,
+    ) -> int:
+        """Execute the import todos operation.
+
+        Parameters
+        ----------
+        stream : TextIO
+            The stream to read the records from.
+        fmt : str
+            The format of the stream: "csv", "tsv", "ndjson" or "json".
+        chunk_size : int, optional
+            The number of records handed to a worker at once, by default
+            `DEFAULT_CHUNK_SIZE`.
+        workers : Optional[int], optional
+            The number of worker processes, by default one per CPU.
+
+        Returns
+        -------
+        int
+            The number of imported todo items.
+
+        Raises
+        ------
+        ValueError
+            If the format is unknown or a record is invalid.
+        """
+        chunks = parallel_map(partial(parse_chunk, fmt), read_chunks(stream, fmt, chunk_size), workers)
+        return len(self.todo_repo.create_many(rows_to_todos(chunks, self.list_id)))
+
+
+class ExportTodos:
+    """Use case for bulk exporting todo items to a CSV, TSV, NDJSON or JSON stream.
+
+    Todo items are serialized in chunks in a process pool and written in order.
+    """
+
+    def __init__(self, todo_repo: TodoRepository):
+        """Initialize the ExportTodos use case.
+
+        Parameters
+        ----------
+        todo_repo : TodoRepository
+            The repository interface for interacting with todo items.
+        """
+        self.todo_repo = todo_repo
+
+    def execute(
+        self,
+        stream: TextIO,
+        fmt: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        workers: Optional[int] = None,
+    ) -> int:
+        """Execute the export todos operation.
+
+        Parameters
+        ----------
+        stream : TextIO
+            The stream to write the records to.
+        fmt : str
+            The format to write: "csv", "tsv", "ndjson" or "json".
+        chunk_size : int, optional
+            The number of todo items handed to a worker at once, by default
+            `DEFAULT_CHUNK_SIZE`.
+        workers : Optional[int], optional
+            The number of worker processes, by default one per CPU.
+
+        Returns
+        -------
+        int
+            The number of exported todo items.
+        """
+        todos = self.todo_repo.get_all()
+        chunks = parallel_map(partial(serialize_chunk, fmt), todos_to_chunks(todos, chunk_size), workers)
+        write_chunks(stream, fmt, chunks)
+        return len(todos)
+
+
+class TodoStats:
+    """Use case for computing aggregate statistics about todo items.
+
+    The statistics are computed from a columnar mirror of the repository that is
+    maintained incrementally, so no todo items are loaded or iterated over.
+    """
+
+    def __init__(self, todo_columns: "TodoColumns"):
+        """Initialize the TodoStats use case.
+
+        Parameters
+        ----------
+        todo_columns : TodoColumns
+            The columnar mirror of the repository's todo items.
+        """
+        self.todo_columns = todo_columns
+
+    def execute(self, now: Optional[datetime] = None) -> "TodoStatistics":
+        """Execute the todo statistics operation.
+
+        Parameters
+        ----------
+        now : Optional[datetime], optional
+            The reference time for ages of open todo items, by default the
+            current time.
+
+        Returns
+        -------
+        TodoStatistics
+            The aggregated statistics.
+        """
+        return self.todo_columns.statistics(now or datetime.now())
+
+
+class PurgeCompletedTodos:
+    """Use case for deleting completed todo items older than a number of days.
+
+    The repository selects the items once and deletes them in batches, so that
+    the operation can stop when its time budget is used up and continue on the
+    next run.
+    """
+
+    def __init__(self, todo_repo: TodoRepository):
+        """Initialize the PurgeCompletedTodos use case.
+
+        Parameters
+        ----------
+        todo_repo : TodoRepository
+            The repository interface for interacting with todo items.
+        """
+        self.todo_repo = todo_repo
+
+    def execute(self, older_than_days: float, deadline: Optional[float] = None) -> int:
+        """Execute the purge completed todos operation.
+
+        Parameters
+        ----------
+        older_than_days : float
+            Completed todo items created more than this many days ago are deleted.
+        deadline : Optional[float], optional
+            A `time.monotonic` value after which no further batch is started, by
+            default no deadline.
+
+        Returns
+        -------
+        int
+            The number of deleted todo items.
+        """
+        older_than = datetime.now() - timedelta(days=older_than_days)
+        return len(self.todo_repo.purge_completed(older_than, deadline=deadline))
+
+
+class CompactTodoStore:
+    """Use case for compacting the storage behind the repository."""
+
+    def __init__(self, todo_repo: TodoRepository):
+        """Initialize the CompactTodoStore use case.
+
+        Parameters
+        ----------
+        todo_repo : TodoRepository
+            The repository interface for interacting with todo items.
+        """
+        self.todo_repo = todo_repo
+
+    def execute(self) -> None:
+        """Execute the compact operation."""
+        self.todo_repo.compact()
+
+
+class SnapshotTodos:
+    """Use case for writing a point-in-time copy of all todo items to a file."""
+
+    def __init__(self, todo_repo: TodoRepository):
+        """Initialize the SnapshotTodos use case.
+
+        Parameters
+        ----------
+        todo_repo : TodoRepository
+            The repository interface for interacting with todo items.
+        """
+        self.todo_repo = todo_repo
+
+    def execute(self, path: str) -> int:
+        """Execute the snapshot operation.
+
+        Parameters
+        ----------
+        path : str
+            The path of the snapshot file. Its extension selects the format.
+
+        Returns
+        -------
+        int
+            The number of todo items written.
+        """
+        return self.todo_repo.snapshot(path)
@@ -0,0 +1,123 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from cli.main import cli
+from core.entities import Todo
+from core.remote_repository import connect_remote_repository
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    # The CLI keeps its store (and looks for a daemon socket) in the working directory.
+    monkeypatch.chdir(tmp_path)
+    return CliRunner()
+
+
+@pytest.fixture
+def titles(runner):
+    titles = ["First", "Second", "Third"]
+    for title in titles:
+        assert runner.invoke(cli, ["add", title]).exit_code == 0
+    return titles
+
+
+@pytest.mark.parametrize("command", ["import", "export"])
+def test_chunk_size_must_be_positive(runner, command):
+    result = runner.invoke(cli, [command, "todos.csv", "--chunk-size", "0"])
+    assert result.exit_code == 2
+    assert "--chunk-size" in result.output
+
+
+def test_import_export_round_trip(runner):
+    with open("in.csv", "w", encoding="utf-8") as f:
+        f.write("title,completed\nFirst,false\nSecond,true\n")
+    assert runner.invoke(cli, ["import", "in.csv", "--chunk-size", "1", "--workers", "1"]).exit_code == 0
+    assert runner.invoke(cli, ["export", "out.ndjson", "--chunk-size", "1", "--workers", "1"]).exit_code == 0
+    with open("out.ndjson", encoding="utf-8") as f:
+        assert sorted(json.loads(line)["title"] for line in f) == ["First", "Second"]
+
+
+def test_list_json(runner, titles):
+    result = runner.invoke(cli, ["list", "--format", "json"])
+    assert result.exit_code == 0
+    assert [todo["title"] for todo in json.loads(result.output)] == titles
+
+
+def test_list_ndjson(runner, titles):
+    result = runner.invoke(cli, ["list", "--format", "ndjson", "--page-size", "2"])
+    assert [json.loads(line)["title"] for line in result.output.splitlines()] == titles
+
+
+def test_list_tsv(runner, titles):
+    header, *rows = runner.invoke(cli, ["list", "-f", "tsv"]).output.splitlines()
+    assert header.split("\t") == ["id", "title", "description", "completed", "created_at"]
+    assert [row.split("\t")[1] for row in rows] == titles
+
+
+@pytest.mark.parametrize(
+    "options, expected",
+    [
+        (["--offset", "1"], ["Second", "Third"]),
+        (["--limit", "2"], ["First", "Second"]),
+        (["--offset", "1", "-n", "1"], ["Second"]),
+        (["--offset", "5"], []),
+    ],
+)
+@pytest.mark.filterwarnings("error::DeprecationWarning:cli.commands.list")
+def test_list_offset_and_limit(runner, titles, options, expected):
+    result = runner.invoke(cli, ["list", "-f", "json", *options])
+    assert [todo["title"] for todo in json.loads(result.output)] == expected
+
+
+def test_list_table_is_rendered_in_pages(runner, titles):
+    result = runner.invoke(cli, ["list", "--page-size", "2"], env={"COLUMNS": "160"})
+    assert result.exit_code == 0
+    # Only the first page has the title and the header.
+    assert result.output.count("Todo List") == 1
+    assert result.output.count("Created At") == 1
+    assert all(title in result.output for title in titles)
+
+
+def test_list_table_reports_an_empty_list(runner):
+    assert "No todo items found." in runner.invoke(cli, ["list"]).output
+
+
+def test_machine_readable_list_does_not_import_numpy_or_rich(runner):
+    script = (
+        "import sys; from click.testing import CliRunner; from cli.main import cli; "
+        "assert CliRunner().invoke(cli, ['list', '-f', 'ndjson']).exit_code == 0; "
+        "print(sorted({'numpy', 'rich'} & set(sys.modules)))"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env)
+    assert result.stdout.strip() == "[]"
+
+
+def test_daemon_flushes_and_removes_its_socket_on_sigterm(tmp_path):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    daemon = subprocess.Popen(
+        [sys.executable, "-m", "cli.main", "daemon", "run"], cwd=tmp_path, env=env, stdout=subprocess.DEVNULL
+    )
+    try:
+        socket_path = str(tmp_path / "todos.sock")
+        deadline = time.monotonic() + 10
+        while (repo := connect_remote_repository(socket_path)) is None:
+            assert time.monotonic() < deadline, "the daemon did not start"
+            time.sleep(0.05)
+        # The daemon defers this write to the store file.
+        repo.create(Todo(title="Pending"))
+        repo.close()
+        daemon.send_signal(signal.SIGTERM)
+        assert daemon.wait(timeout=10) == 0
+    finally:
+        daemon.kill()
+    assert not os.path.exists(socket_path)
+    with open(tmp_path / "todos.json", encoding="utf-8") as f:
+        assert [todo["title"] for todo in json.load(f)] == ["Pending"]
@@ -1,11 +1,47 @@
-from datetime import datetime
+import io
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional
 
+import numpy as np
 import pytest
 
-from core.entities import Todo
+from core.codec import CODECS, get_todo_codec, todo_to_dict
+from core.entities import DEFAULT_LIST_ID, Todo
+from core.ids import SortedIdIndex, TimeOrderedIdGenerator
+from core.interfaces import TodoRepository, TodoTransaction, TransactionConflictError
+from core.json_repository import JsonTodoRepository
+from core.maintenance import MaintenanceSettings, maintenance_jobs
+from core.observable import ObservableTodoRepository
+from core.partitioning import PartitionLimitError, PartitionRegistry, list_file_path
+from core.remote_repository import RemoteTodoRepository, TodoRepositoryServer, connect_remote_repository
+from core.replication import ChangeLog, ChangeLogWriter, TodoReplica
 from core.repository import InMemoryTodoRepository
-from core.use_cases import CreateTodo, DeleteTodo, GetAllTodos, GetTodoById, UpdateTodo
+from core.scheduler import Job, Scheduler
+from core.shared_store import SharedJsonTodoRepository
+from core.stats import TodoColumns, _SortedValues
+from core.suggest import TitleTrie, normalize_title
+from core.transfer import detect_format
+from core.use_cases import (
+    CreateTodo,
+    CreateTodos,
+    DeleteTodo,
+    ExportTodos,
+    GetAllTodos,
+    GetTodoById,
+    GetTodosPage,
+    ImportTodos,
+    PatchTodo,
+    PurgeCompletedTodos,
+    SuggestTodos,
+    TodoStats,
+    UpdateTodo,
+)
 
 
 # Tests for core/entities.py
@@ -84,9 +120,32 @@ def test_delete_todo_not_found(in_memory_repo):
         in_memory_repo.delete("non-existent-id")
 
 
+def test_create_many_todos(in_memory_repo):
+    todos = [Todo(title=f"Task {i}") for i in range(3)]
+    created = in_memory_repo.create_many(iter(todos))
+    assert created == todos
+    assert in_memory_repo.get_all() == todos
+
+
+def test_patch_todo(in_memory_repo):
+    todo = in_memory_repo.create(Todo(title="Patch me", description="Keep"))
+    patched = in_memory_repo.patch(todo.id, {"completed": True})
+    assert in_memory_repo.get_by_id(todo.id) is patched
+    assert patched.completed and patched.description == "Keep"
+    assert not todo.completed
+
+
+def test_patch_todo_not_found_or_invalid_field(in_memory_repo):
+    with pytest.raises(ValueError, match="Todo with ID non-existent-id not found."):
+        in_memory_repo.patch("non-existent-id", {"completed": True})
+    todo = in_memory_repo.create(Todo(title="Patch me"))
+    with pytest.raises(ValueError, match="Cannot patch fields: id"):
+        in_memory_repo.patch(todo.id, {"id": "other"})
+
+
 # Tests for core/use_cases.py
 # Using a simple mock for TodoRepository for use case tests
-class MockTodoRepository:
+class MockTodoRepository(TodoRepository):
     def __init__(self):
         self.todos = {}
 
@@ -124,6 +183,12 @@ def test_create_todo_use_case(mock_repo):
     assert mock_repo.get_by_id(todo.id) == todo
 
 
+def test_create_todos_use_case(in_memory_repo):
+    todos = CreateTodos(todo_repo=in_memory_repo).execute([("First", None), ("Second", "Details")])
+    assert [todo.title for todo in todos] == ["First", "Second"]
+    assert in_memory_repo.get_all() == todos
+
+
 def test_get_all_todos_use_case(mock_repo):
     mock_repo.create(Todo(title="Task 1"))
     mock_repo.create(Todo(title="Task 2"))
@@ -160,6 +225,17 @@ def test_update_todo_use_case_not_found(mock_repo):
         update_todo.execute("non-existent-id", title="Test")
 
 
+def test_patch_todo_use_case_falls_back_to_read_modify_write():
+    class ReadModifyWriteRepository(InMemoryTodoRepository):
+        patch = TodoRepository.patch
+
+    repo = ReadModifyWriteRepository()
+    todo = repo.create(Todo(title="Original"))
+    patched = PatchTodo(todo_repo=repo).execute(todo.id, {"title": "Patched", "description": None})
+    assert patched.title == "Patched"
+    assert repo.get_by_id(todo.id).title == "Patched"
+
+
 def test_delete_todo_use_case(mock_repo):
     todo = mock_repo.create(Todo(title="Delete Me"))
     delete_todo = DeleteTodo(todo_repo=mock_repo)
@@ -171,3 +247,948 @@ def test_delete_todo_use_case_not_found(mock_repo):
     delete_todo = DeleteTodo(todo_repo=mock_repo)
     with pytest.raises(ValueError, match="Todo not found"):
         delete_todo.execute("non-existent-id")
+
+
+# Tests for core/transfer.py
+@pytest.mark.parametrize("fmt", ["csv", "tsv", "ndjson", "json"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_import_round_trip(in_memory_repo, fmt, workers):
+    in_memory_repo.create(Todo(title="Plain"))
+    in_memory_repo.create(Todo(title='Quoted, "comma"', description="Line\nbreak", completed=True))
+    in_memory_repo.create(Todo(title="Zażółć", description="unicode"))
+    stream = io.StringIO()
+
+    exported = ExportTodos(todo_repo=in_memory_repo).execute(stream, fmt, chunk_size=2, workers=workers)
+
+    target = InMemoryTodoRepository()
+    stream.seek(0)
+    imported = ImportTodos(todo_repo=target).execute(stream, fmt, chunk_size=2, workers=workers)
+    assert exported == imported == 3
+    assert target.get_all() == in_memory_repo.get_all()
+
+
+def test_import_fills_in_defaults(in_memory_repo):
+    stream = io.StringIO('{"title": "Minimal"}\n\n{"title": "Done", "completed": true}\n')
+    assert ImportTodos(todo_repo=in_memory_repo).execute(stream, "ndjson", workers=1) == 2
+    minimal, done = in_memory_repo.get_all()
+    assert minimal.title == "Minimal" and not minimal.completed and minimal.id
+    assert done.completed
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_converts_aware_times_to_local_time(in_memory_repo, workers):
+    stream = io.StringIO("title,completed,created_at\nOld,true,2020-01-01T00:00:00+00:00\nNew,false,\n")
+    assert ImportTodos(todo_repo=in_memory_repo).execute(stream, "csv", workers=workers) == 2
+    old = next(todo for todo in in_memory_repo.get_all() if todo.title == "Old")
+    assert old.created_at == datetime(2020, 1, 1, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    exported = io.StringIO()
+    ExportTodos(todo_repo=in_memory_repo).execute(exported, "csv", workers=workers)
+    exported.seek(0)
+    target = InMemoryTodoRepository()
+    ImportTodos(todo_repo=target).execute(exported, "csv", workers=workers)
+    assert target.get_all() == in_memory_repo.get_all()
+    # Purging compares the imported times with naive local ones.
+    assert PurgeCompletedTodos(todo_repo=target).execute(30) == 1
+    assert [todo.title for todo in target.get_all()] == ["New"]
+
+
+def test_import_rejects_invalid_record(in_memory_repo):
+    stream = io.StringIO('{"title": "Valid"}\n{"description": "no title"}\n')
+    with pytest.raises(ValueError, match="Invalid todo record #2: missing title"):
+        ImportTodos(todo_repo=in_memory_repo).execute(stream, "ndjson", workers=1)
+    assert in_memory_repo.get_all() == []
+
+
+def test_detect_format():
+    assert detect_format("todos.JSONL") == "ndjson"
+    assert detect_format("dump.csv") == "csv"
+    with pytest.raises(ValueError, match="Cannot infer format"):
+        detect_format("todos.txt")
+
+
+# Tests for core/observable.py and core/stats.py
+def test_observable_repository_tracks_version_and_columns(in_memory_repo):
+    in_memory_repo.create(Todo(title="Existing"))
+    columns = TodoColumns(capacity=1)
+    repo = ObservableTodoRepository(in_memory_repo, listeners=[columns])
+    assert len(columns) == 1
+
+    todo = repo.create(Todo(title="New"))
+    repo.create_many([Todo(title="Bulk 1"), Todo(title="Bulk 2")])
+    todo.completed = True
+    repo.update(todo)
+    repo.delete(in_memory_repo.get_all()[0].id)
+
+    assert repo.version == 4
+    assert len(columns) == 3
+    assert columns.completed[: len(columns)].sum() == 1
+
+
+def test_todo_stats_use_case():
+    now = datetime(2024, 1, 10, 12, 0)
+    repo = ObservableTodoRepository(InMemoryTodoRepository())
+    columns = TodoColumns()
+    repo.subscribe(columns)
+    repo.create(Todo(title="a" * 5, created_at=datetime(2024, 1, 1, 12, 0)))
+    repo.create(Todo(title="b" * 15, created_at=datetime(2024, 1, 1, 18, 0), completed=True))
+    repo.create(Todo(title="c" * 500, created_at=datetime(2024, 1, 9, 12, 0)))
+    doomed = repo.create(Todo(title="gone", created_at=datetime(2023, 1, 1)))
+    repo.delete(doomed.id)
+
+    stats = TodoStats(todo_columns=columns).execute(now=now)
+
+    assert (stats.total, stats.completed, stats.open) == (3, 1, 2)
+    assert stats.median_open_age_seconds == 5 * 86_400
+    assert [(d.day, d.completed, d.open) for d in stats.daily] == [
+        (date(2024, 1, 1), 1, 1),
+        (date(2024, 1, 9), 0, 1),
+    ]
+    assert stats.title_length_histogram == [1, 1, 0, 0, 0, 0, 0, 0, 0, 1]
+
+
+def test_todo_stats_follow_random_changes():
+    rng = random.Random(3)
+    now = datetime(2024, 3, 1)
+    repo = ObservableTodoRepository(InMemoryTodoRepository())
+    columns = TodoColumns()
+    _SortedValues.BLOCK_SIZE, block_size = 4, _SortedValues.BLOCK_SIZE
+    try:
+        repo.create_many(
+            Todo(title="x" * rng.randrange(120), created_at=now - timedelta(hours=rng.randrange(500)))
+            for _ in range(50)
+        )
+        repo.subscribe(columns)
+        for _ in range(400):
+            todos = repo.get_all()
+            action = rng.random()
+            if action < 0.4 or not todos:
+                hours = rng.choice([rng.randrange(500), 7])
+                repo.create(Todo(title="y" * rng.randrange(120), created_at=now - timedelta(hours=hours)))
+            elif action < 0.7:
+                repo.patch(rng.choice(todos).id, {"completed": rng.random() < 0.5})
+            else:
+                repo.delete(rng.choice(todos).id)
+            todos = repo.get_all()
+            stats = columns.statistics(now)
+            open_ages = [(now - todo.created_at).total_seconds() for todo in todos if not todo.completed]
+            days = sorted({todo.created_at.date() for todo in todos})
+            assert (stats.total, stats.open) == (len(todos), len(open_ages))
+            assert stats.median_open_age_seconds == (float(np.median(open_ages)) if open_ages else None)
+            assert [d.day for d in stats.daily] == days
+            assert sum(d.completed for d in stats.daily) == stats.completed
+            assert sum(stats.title_length_histogram) == len(todos)
+    finally:
+        _SortedValues.BLOCK_SIZE = block_size
+
+
+def test_todo_stats_use_case_empty():
+    stats = TodoStats(todo_columns=TodoColumns()).execute()
+    assert stats.total == 0
+    assert stats.median_open_age_seconds is None
+    assert stats.daily == []
+
+
+# Tests for core/scheduler.py and core/maintenance.py
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_scheduler_runs_due_jobs_with_jitter_and_metrics():
+    clock = FakeClock()
+    calls = []
+    job = Job(name="tick", func=lambda deadline: calls.append(deadline) or len(calls), interval=10, jitter=0.1)
+    scheduler = Scheduler([job], clock=clock, rng=random.Random(0))
+
+    assert 9 <= scheduler.run_pending() <= 11
+    assert calls == []
+    clock.now = 11
+    scheduler.run_pending()
+    assert calls == [None]
+    assert job.metrics.runs == 1 and job.metrics.last_result == 1
+
+
+def test_scheduler_records_failures_and_overruns():
+    clock = FakeClock()
+
+    def slow(deadline):
+        assert deadline == 1.0
+        clock.now += 2
+
+    def broken(deadline):
+        raise RuntimeError("boom")
+
+    slow_job = Job(name="slow", func=slow, interval=60, time_budget=1.0)
+    broken_job = Job(name="broken", func=broken, interval=60)
+    Scheduler([slow_job, broken_job], clock=clock).run_all()
+
+    assert slow_job.metrics.overruns == 1 and slow_job.metrics.last_duration == 2
+    assert broken_job.metrics.failures == 1 and broken_job.metrics.last_error == "boom"
+
+
+def test_purge_completed_todos_use_case(in_memory_repo):
+    old = datetime.now() - timedelta(days=40)
+    in_memory_repo.create_many(
+        [
+            Todo(title="Old done", completed=True, created_at=old),
+            Todo(title="Old open", created_at=old),
+            Todo(title="New done", completed=True),
+        ]
+        + [Todo(title=f"Batch {i}", completed=True, created_at=old) for i in range(5)]
+    )
+    assert PurgeCompletedTodos(todo_repo=in_memory_repo).execute(30) == 6
+    assert sorted(todo.title for todo in in_memory_repo.get_all()) == ["New done", "Old open"]
+
+
+@pytest.mark.parametrize("backend", ["memory", "json", "observable"])
+def test_purge_selects_once_and_stops_at_the_deadline(backend, tmp_path, monkeypatch):
+    if backend == "json":
+        repo = JsonTodoRepository(file_path=str(tmp_path / "todos.json"))
+    elif backend == "observable":
+        repo = ObservableTodoRepository(InMemoryTodoRepository(), listeners=[TodoColumns()])
+    else:
+        repo = InMemoryTodoRepository()
+    old = datetime.now() - timedelta(days=40)
+    repo.create_many(Todo(title=f"Done {i}", completed=True, created_at=old) for i in range(5))
+    monkeypatch.setattr("core.interfaces.PURGE_BATCH_SIZE", 2)
+    saves = []
+    if backend == "json":
+        save = repo._save_todos
+        monkeypatch.setattr(repo, "_save_todos", lambda: (saves.append(1), save()))
+
+    # No batch is started once the deadline has passed.
+    assert PurgeCompletedTodos(todo_repo=repo).execute(30, deadline=time.monotonic() - 1) == 0
+    # Otherwise every batch is deleted, and the file is written once.
+    assert PurgeCompletedTodos(todo_repo=repo).execute(30, deadline=time.monotonic() + 60) == 5
+    assert repo.get_all() == []
+    assert len(saves) == (1 if backend == "json" else 0)
+
+
+@pytest.mark.parametrize("backend", ["memory", "json"])
+def test_compact_does_not_lose_concurrent_writes(backend, tmp_path):
+    if backend == "json":
+        repo = JsonTodoRepository(file_path=str(tmp_path / "todos.json"))
+    else:
+        repo = InMemoryTodoRepository()
+    writers = [
+        threading.Thread(target=lambda: [repo.create(Todo(title="Concurrent")) for _ in range(200)]) for _ in range(4)
+    ]
+    for writer in writers:
+        writer.start()
+    while any(writer.is_alive() for writer in writers):
+        repo.compact()
+    assert len(repo.get_all()) == 800
+    if backend == "json":
+        assert len(JsonTodoRepository(file_path=repo.file_path).get_all()) == 800
+
+
+def test_maintenance_jobs_on_json_repository(tmp_path):
+    repo = JsonTodoRepository(file_path=str(tmp_path / "todos.json"))
+    repo.create(Todo(title="Ancient", completed=True, created_at=datetime(2000, 1, 1)))
+    repo.create(Todo(title="Keep"))
+    settings = MaintenanceSettings(purge_completed_after_days=30, snapshot_path=str(tmp_path / "snapshot.ndjson"))
+
+    jobs = maintenance_jobs(lambda: {DEFAULT_LIST_ID: repo}, settings)
+    Scheduler(jobs).run_all()
+
+    assert [job.name for job in jobs] == ["purge-completed", "compact", "snapshot"]
+    assert all(job.metrics.failures == 0 for job in jobs)
+    assert [todo.title for todo in JsonTodoRepository(file_path=str(tmp_path / "todos.json")).get_all()] == ["Keep"]
+    snapshot = (tmp_path / "snapshot.ndjson").read_text().splitlines()
+    assert [json.loads(line)["title"] for line in snapshot] == ["Keep"]
+
+
+def test_list_file_path():
+    assert list_file_path("data/todos.json", DEFAULT_LIST_ID) == "data/todos.json"
+    assert list_file_path("data/todos.json", "work") == "data/todos.work.json"
+    with pytest.raises(ValueError):
+        list_file_path("data/todos.json", "../etc")
+
+
+def test_partition_registry_loads_lazily_and_evicts_idle_lists():
+    clock = FakeClock()
+    evicted = []
+    registry = PartitionRegistry(
+        lambda list_id: InMemoryTodoRepository(),
+        idle_timeout=60,
+        on_evict=lambda list_id, repo: evicted.append(list_id),
+        clock=clock,
+    )
+    work = registry.get("work")
+    assert registry.get("work") is work
+    clock.now += 30
+    registry.get("home")
+    clock.now += 45
+
+    assert registry.evict_idle() == ["work"]
+    assert evicted == ["work"]
+    assert "work" not in registry and "home" in registry
+    assert registry.get("work") is not work
+
+
+def test_partition_registry_only_creates_lists_on_request():
+    clock = FakeClock()
+    evicted = []
+    registry = PartitionRegistry(
+        lambda list_id: InMemoryTodoRepository(),
+        idle_timeout=60,
+        on_evict=lambda list_id, repo: evicted.append(list_id),
+        clock=clock,
+        exists=lambda list_id: list_id == "stored",
+        max_partitions=2,
+    )
+    with pytest.raises(KeyError):
+        registry.get("unknown", create=False)
+    assert len(registry) == 0
+    registry.get("stored", create=False)
+    clock.now += 1
+    registry.get("work")
+    clock.now += 1
+    registry.get("stored")
+    registry.get("home")
+    assert evicted == ["work"]
+    assert sorted(registry.loaded()) == ["home", "stored"]
+
+    in_memory = PartitionRegistry(lambda list_id: InMemoryTodoRepository(), idle_timeout=None, max_partitions=1)
+    in_memory.get("work")
+    with pytest.raises(PartitionLimitError):
+        in_memory.get("home")
+    assert in_memory.get("work", create=False) is in_memory.get("work")
+
+
+def test_partition_registry_loads_lists_outside_its_lock():
+    release = threading.Event()
+    loads = []
+
+    def load(list_id):
+        loads.append(list_id)
+        if list_id == "large":
+            release.wait(5)
+        return InMemoryTodoRepository()
+
+    registry = PartitionRegistry(load, idle_timeout=None)
+    large = []
+    readers = [threading.Thread(target=lambda: large.append(registry.get("large"))) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    # Other lists are served while the large one is still loading.
+    registry.get("small")
+    assert "large" not in registry
+    release.set()
+    for reader in readers:
+        reader.join()
+    assert large[0] is large[1] is registry.get("large")
+    assert sorted(loads) == ["large", "small"]
+
+
+def test_create_todo_is_stamped_with_its_list(in_memory_repo):
+    todo = CreateTodo(todo_repo=in_memory_repo, list_id="work").execute(title="Ship it")
+    assert in_memory_repo.get_by_id(todo.id).list_id == "work"
+    assert CreateTodo(todo_repo=in_memory_repo).execute(title="Default").list_id == DEFAULT_LIST_ID
+
+
+def test_replica_follows_change_log(tmp_path):
+    source = ObservableTodoRepository(JsonTodoRepository(file_path=str(tmp_path / "todos.json")))
+    existing = source.create(Todo(title="Existing"))
+    log = ChangeLog(str(tmp_path / "changes.ndjson"))
+    source.subscribe(ChangeLogWriter(log, source, max_entries=3))
+    clock = FakeClock()
+    replica = TodoReplica(log.path, clock=clock)
+    assert [todo.title for todo in replica.repo.get_all()] == ["Existing"]
+
+    added = source.create(Todo(title="Added"))
+    source.patch(existing.id, {"completed": True})
+    clock.now += 2
+    assert replica.staleness() == 2
+    assert replica.refresh(max_staleness=5) == 2
+    assert replica.repo.get_by_id(added.id) is None
+
+    assert replica.refresh() == 0
+    assert replica.repo.get_by_id(added.id).title == "Added"
+    assert replica.repo.get_by_id(existing.id).completed is True
+
+    # The third change compacts the log into a new file, which the replica reloads.
+    source.delete(added.id)
+    source.create(Todo(title="After reset"))
+    assert log.entries == 2
+    replica.sync()
+    assert sorted(todo.title for todo in replica.repo.get_all()) == ["After reset", "Existing"]
+    replica.close()
+
+
+class RecordingListener(TodoColumns):
+    def __init__(self):
+        super().__init__()
+        self.changes = []
+
+    def todo_saved(self, todo):
+        self.changes.append(("saved", todo.title))
+        super().todo_saved(todo)
+
+    def todo_deleted(self, todo_id):
+        self.changes.append(("deleted", todo_id))
+        super().todo_deleted(todo_id)
+
+
+def test_shared_store_keeps_a_current_change_log(tmp_path):
+    path, log = str(tmp_path / "todos.json"), ChangeLog(str(tmp_path / "changes.ndjson"))
+    first = SharedJsonTodoRepository(file_path=path, change_log=log, max_log_entries=4)
+    first.create(Todo(title="First"))
+    assert log.last_version() == first.counter.value == 1
+    inode = os.stat(log.path).st_ino
+    # Opening the store in another worker does not rewrite the log.
+    second = SharedJsonTodoRepository(file_path=path, change_log=ChangeLog(log.path))
+    assert os.stat(log.path).st_ino == inode
+    replica = TodoReplica(log.path)
+    recorder = RecordingListener()
+    replica.repo.subscribe(recorder)
+    kept = first.create(Todo(title="Kept"))
+    changed = first.create(Todo(title="Changed"))
+    assert replica.sync() == 2
+    # The next write compacts the log at the version the replica already has.
+    first.create(Todo(title="After compaction"))
+    assert os.stat(log.path).st_ino != inode
+    recorder.changes.clear()
+    assert replica.sync() == 2
+    assert recorder.changes == [("saved", "After compaction")]
+    assert replica.version == log.last_version() == first.counter.value
+
+    # A replica that missed changes before a compaction only applies the difference.
+    lagging = TodoReplica(log.path)
+    lagging_recorder = RecordingListener()
+    lagging.repo.subscribe(lagging_recorder)
+    first.patch(changed.id, {"title": "Changed again"})
+    first.delete(kept.id)
+    first.create(Todo(title="Compacts"))
+    first.create(Todo(title="Appended"))
+    assert lagging.sync() > 0
+    assert sorted(lagging_recorder.changes) == [
+        ("deleted", kept.id),
+        ("saved", "Appended"),
+        ("saved", "Changed again"),
+        ("saved", "Compacts"),
+    ]
+    assert lagging.repo.get_all() == second.get_all()
+    for closing in (replica, lagging, first, second):
+        closing.close()
+
+
+def test_shared_store_skips_maintenance_that_changes_nothing(tmp_path):
+    path = str(tmp_path / "todos.json")
+    repo = SharedJsonTodoRepository(file_path=path)
+    repo.create(Todo(title="Open"))
+    version, inode = repo.counter.value, os.stat(path).st_ino
+    assert repo.purge_completed(datetime.now() + timedelta(days=1)) == []
+    repo.compact()
+    with repo.transaction():
+        pass
+    # The file is already compact, and other processes have nothing to reload.
+    assert repo.counter.value == version and os.stat(path).st_ino == inode
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps([todo_to_dict(todo) for todo in repo.get_all()], indent=4))
+    other = SharedJsonTodoRepository(file_path=path)
+    other.compact()
+    assert os.stat(path).st_ino != inode and other.counter.value == version
+    inode = os.stat(path).st_ino
+    other.compact()
+    assert os.stat(path).st_ino == inode
+    repo.close()
+    other.close()
+
+
+def test_replica_reads_a_compacted_log_in_the_background(tmp_path):
+    log = ChangeLog(str(tmp_path / "changes.ndjson"))
+    repo = SharedJsonTodoRepository(file_path=str(tmp_path / "todos.json"), change_log=log, max_log_entries=1)
+    clock = FakeClock()
+    replica = TodoReplica(log.path, clock=clock)
+    read = threading.Event()
+    original_read = replica._read
+
+    def slow_read(started):
+        read.wait(5)
+        return original_read(started)
+
+    replica._read = slow_read
+    repo.create(Todo(title="Logged"))
+    repo.create(Todo(title="After compaction"))
+    clock.now += 1
+    # The request path does not wait for the log to be read again.
+    assert replica.refresh() == 1
+    assert replica.repo.get_all() == []
+    read.set()
+    replica.sync()
+    assert sorted(todo.title for todo in replica.repo.get_all()) == ["After compaction", "Logged"]
+    assert replica.refresh() == 0
+    replica.close()
+    repo.close()
+
+
+def test_remote_repository_forwards_to_server(tmp_path):
+    socket_path = str(tmp_path / "todos.sock")
+    assert connect_remote_repository(socket_path) is None
+    lists = PartitionRegistry(lambda list_id: InMemoryTodoRepository(), idle_timeout=None)
+    server = TodoRepositoryServer(socket_path, lists.get)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        repo = connect_remote_repository(socket_path, "work")
+        assert isinstance(repo, RemoteTodoRepository)
+        todo = CreateTodo(todo_repo=repo, list_id="work").execute(title="Remote", description="Over the socket")
+        assert lists.get("work").get_by_id(todo.id).title == "Remote"
+        assert PatchTodo(todo_repo=repo).execute(todo.id, {"completed": True}).completed is True
+        assert repo.get_by_id(todo.id) == lists.get("work").get_by_id(todo.id)
+        assert repo.get_by_id("missing") is None
+        with pytest.raises(ValueError, match="not found"):
+            repo.delete("missing")
+        assert repo.purge_completed(datetime.now() + timedelta(days=1)) == [todo.id]
+        assert repo.get_all() == [] and lists.get(DEFAULT_LIST_ID).get_all() == []
+        repo.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not (tmp_path / "todos.sock").exists()
+
+
+def test_remote_server_reports_unexpected_errors(tmp_path):
+    server = TodoRepositoryServer(str(tmp_path / "todos.sock"), lambda list_id: InMemoryTodoRepository())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        repo = RemoteTodoRepository(server.socket_path)
+        with pytest.raises(ValueError, match="KeyError"):
+            repo.call("get_by_id")
+        with pytest.raises(ValueError, match="No such file or directory"):
+            repo.snapshot(str(tmp_path / "missing" / "snapshot.ndjson"))
+        # The connection survives both errors.
+        assert repo.get_all() == []
+        repo.close()
+        assert server.dispatch(["not", "an", "object"]) == {"error": "Malformed request: expected a JSON object."}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_remote_transactions_commit_on_the_server(tmp_path):
+    served = InMemoryTodoRepository()
+    server = TodoRepositoryServer(str(tmp_path / "todos.sock"), lambda list_id: served)
+    methods = []
+    dispatch = server.dispatch
+    server.dispatch = lambda request: methods.append(request["method"]) or dispatch(request)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        repo = RemoteTodoRepository(server.socket_path)
+        other = RemoteTodoRepository(server.socket_path)
+        todo = repo.create(Todo(title="Shared"))
+        with repo.transaction() as transaction:
+            transaction.patch(todo.id, {"completed": True})
+            added = transaction.create(Todo(title="Added"))
+            methods.clear()
+        # The writes are validated and applied by the server in one request.
+        assert methods == ["commit"]
+        assert served.get_by_id(todo.id).completed is True
+        assert served.get_by_id(added.id).title == "Added"
+        with pytest.raises(TransactionConflictError):
+            with repo.transaction() as transaction:
+                transaction.delete(added.id)
+                transaction.patch(todo.id, {"title": "Mine"})
+                other.patch(todo.id, {"title": "Theirs"})
+        # Nothing of the conflicting transaction was applied.
+        assert served.get_by_id(todo.id).title == "Theirs"
+        assert served.get_by_id(added.id) is not None
+        repo.close()
+        other.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_json_repository_defers_and_batches_saves(tmp_path):
+    path = str(tmp_path / "todos.json")
+    repo = JsonTodoRepository(file_path=path, save_delay=60)
+    repo.create_many([Todo(title="First"), Todo(title="Second")])
+    repo.delete(repo.create(Todo(title="Gone")).id)
+    assert JsonTodoRepository(file_path=path).get_all() == []
+    repo.flush()
+    assert [todo.title for todo in JsonTodoRepository(file_path=path).get_all()] == ["First", "Second"]
+
+    quick = JsonTodoRepository(file_path=path, save_delay=0.01)
+    quick.create(Todo(title="Third"))
+    time.sleep(0.2)
+    assert len(JsonTodoRepository(file_path=path).get_all()) == 3
+
+
+@pytest.mark.parametrize("backend", ["memory", "json"])
+def test_transaction_commits_once_or_not_at_all(backend, tmp_path, monkeypatch):
+    if backend == "memory":
+        repo = InMemoryTodoRepository()
+    else:
+        repo = JsonTodoRepository(file_path=str(tmp_path / "todos.json"))
+    keep, drop = repo.create(Todo(title="Keep")), repo.create(Todo(title="Drop"))
+    saves = []
+    monkeypatch.setattr(repo, "_save_todos", lambda: saves.append(1), raising=False)
+
+    with repo.transaction() as transaction:
+        transaction.patch(keep.id, {"completed": True})
+        transaction.delete(drop.id)
+        added = transaction.create(Todo(title="Added"))
+        assert sorted(todo.title for todo in transaction.get_all()) == ["Added", "Keep"]
+        # Nothing is visible outside the transaction before it commits.
+        assert repo.get_by_id(drop.id) is not None and repo.get_by_id(added.id) is None
+    assert sorted(todo.title for todo in repo.get_all()) == ["Added", "Keep"]
+    assert repo.get_by_id(keep.id).completed
+    assert len(saves) == (1 if backend == "json" else 0)
+
+    with pytest.raises(RuntimeError):
+        with repo.transaction() as transaction:
+            transaction.delete(keep.id)
+            raise RuntimeError("abort")
+    assert repo.get_by_id(keep.id) is not None
+
+
+def test_transaction_reads_are_stable_and_conflicts_are_detected(in_memory_repo):
+    todo = in_memory_repo.create(Todo(title="Shared"))
+    with pytest.raises(TransactionConflictError):
+        with in_memory_repo.transaction() as transaction:
+            assert transaction.get_by_id(todo.id).title == "Shared"
+            in_memory_repo.patch(todo.id, {"title": "Changed elsewhere"})
+            assert transaction.get_by_id(todo.id).title == "Shared"
+            transaction.patch(todo.id, {"completed": True})
+    assert in_memory_repo.get_by_id(todo.id).title == "Changed elsewhere"
+    assert not in_memory_repo.get_by_id(todo.id).completed
+
+
+@pytest.mark.parametrize("backend", ["memory", "json"])
+def test_concurrent_transactions_first_committer_wins(backend, tmp_path, monkeypatch):
+    if backend == "memory":
+        repo = InMemoryTodoRepository()
+    else:
+        repo = JsonTodoRepository(file_path=str(tmp_path / "todos.json"))
+    todo = repo.create(Todo(title="Shared"))
+    validate = TodoTransaction.validate
+
+    def slow_validate(transaction, current):
+        # Leave time for the other commit to validate before this one applies.
+        validate(transaction, current)
+        time.sleep(0.05)
+
+    monkeypatch.setattr(TodoTransaction, "validate", slow_validate)
+    both_read = threading.Barrier(2)
+    outcomes = []
+
+    def commit(title):
+        try:
+            with repo.transaction() as transaction:
+                transaction.patch(todo.id, {"title": title})
+                both_read.wait()
+            outcomes.append("committed")
+        except TransactionConflictError:
+            outcomes.append("conflict")
+
+    threads = [threading.Thread(target=commit, args=(title,)) for title in ("First", "Second")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(outcomes) == ["committed", "conflict"]
+
+
+def test_observable_transaction_notifies_listeners_after_commit():
+    columns = TodoColumns()
+    repo = ObservableTodoRepository(InMemoryTodoRepository(), listeners=[columns])
+    todo = repo.create(Todo(title="Done soon"))
+    with repo.transaction() as transaction:
+        transaction.patch(todo.id, {"completed": True})
+        transaction.create(Todo(title="New"))
+        assert columns.statistics(datetime.now()).completed == 0
+    stats = columns.statistics(datetime.now())
+    assert repo.version == 2
+    assert (stats.total, stats.completed) == (2, 1)
+
+
+def test_time_ordered_ids_are_uuid7_and_strictly_increasing():
+    times = iter([5_000_000] * 4200 + [4_000_000, 9_000_000])
+    generate = TimeOrderedIdGenerator(clock=lambda: next(times))
+    # The counter overflows within one millisecond and the clock steps back.
+    ids = [generate() for _ in range(4202)]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    parsed = uuid.UUID(ids[0])
+    assert (parsed.version, parsed.variant) == (7, uuid.RFC_4122)
+    assert parsed.int >> 80 == 5
+    assert uuid.UUID(ids[-1]).int >> 80 == 9
+    assert uuid.UUID(Todo(title="New").id).version == 7
+
+
+def test_sorted_id_index():
+    index = SortedIdIndex(["c", "a"])
+    index.add("d")
+    index.add("b")
+    index.add("b")
+    index.add_many(["e", "f"])
+    index.add_many(["a", *"xyz"[::-1], *(f"m{i:03d}" for i in range(100))])
+    index.discard("c")
+    index.discard("missing")
+    assert index.after(None, 5) == ["a", "b", "d", "e", "f"]
+    assert index.after("f", 3) == ["m000", "m001", "m002"]
+    assert index.after("m099", 10) == ["x", "y", "z"]
+    assert len(index) == 108
+
+
+@pytest.mark.parametrize("backend", ["memory", "json", "observable"])
+def test_list_page_follows_creation_order(backend, tmp_path):
+    if backend == "json":
+        repo = JsonTodoRepository(file_path=str(tmp_path / "todos.json"))
+    elif backend == "observable":
+        repo = ObservableTodoRepository(InMemoryTodoRepository())
+    else:
+        repo = InMemoryTodoRepository()
+    todos = repo.create_many(Todo(title=f"Todo {i}") for i in range(5))
+    assert GetTodosPage(repo).execute(limit=2) == todos[:2]
+
+    # The index is kept current once built, including imported random IDs.
+    repo.delete(todos[2].id)
+    imported = repo.create(Todo(title="Imported", id=str(uuid.uuid4())))
+    latest = repo.create(Todo(title="Latest"))
+    with repo.transaction() as transaction:
+        transaction.delete(todos[3].id)
+    pages, cursor = [], None
+    while page := repo.list_page(after=cursor, limit=2):
+        pages.extend(page)
+        cursor = page[-1].id
+    assert pages == sorted([todos[0], todos[1], todos[4], imported, latest], key=lambda todo: todo.id)
+    assert [todo for todo in pages if todo is not imported] == [todos[0], todos[1], todos[4], latest]
+
+
+@pytest.mark.parametrize("backend", ["memory", "json"])
+def test_list_page_is_consistent_with_concurrent_deletes(backend, tmp_path):
+    if backend == "json":
+        repo = JsonTodoRepository(file_path=str(tmp_path / "todos.json"))
+    else:
+        repo = InMemoryTodoRepository()
+    todos = repo.create_many(Todo(title=f"Todo {i}") for i in range(3))
+    repo.list_page()
+    # Pause the delete after the item has left the dictionary but not the index.
+    resume = threading.Event()
+    discard = repo._index.discard
+    repo._index.discard = lambda todo_id: (resume.wait(5), discard(todo_id))
+    deleter = threading.Thread(target=repo.delete, args=(todos[1].id,))
+    deleter.start()
+    pages = []
+    reader = threading.Thread(target=lambda: pages.append(repo.list_page()))
+    reader.start()
+    time.sleep(0.05)
+    resume.set()
+    deleter.join()
+    reader.join()
+    assert pages == [[todos[0], todos[2]]]
+
+
+@pytest.mark.parametrize("writer", list(CODECS))
+@pytest.mark.parametrize("reader", list(CODECS))
+def test_json_codecs_are_interchangeable(writer, reader, tmp_path):
+    for name in {writer, reader}:
+        if not CODECS[name].available:
+            pytest.skip(f"{name} is not installed")
+    path = str(tmp_path / "todos.json")
+    todos = [
+        Todo(title="Plain", created_at=datetime(2024, 5, 1, 12, 30)),
+        Todo(title="Ünïcode ✔", description="Details", completed=True, list_id="work"),
+    ]
+    JsonTodoRepository(file_path=path, codec=get_todo_codec(writer)).create_many(todos)
+    assert JsonTodoRepository(file_path=path, codec=get_todo_codec(reader)).get_all() == todos
+
+
+@pytest.mark.parametrize("name", list(CODECS))
+def test_json_codec_reads_legacy_files(name, tmp_path):
+    if not CODECS[name].available:
+        pytest.skip(f"{name} is not installed")
+    path = tmp_path / "todos.json"
+    legacy = {"id": "1", "title": "Old", "description": None, "completed": False, "created_at": "2024-05-01T12:30:00"}
+    path.write_text(json.dumps([legacy], indent=4), encoding="utf-8")
+    (todo,) = JsonTodoRepository(file_path=str(path), codec=get_todo_codec(name)).get_all()
+    assert (todo.id, todo.created_at, todo.list_id) == ("1", datetime(2024, 5, 1, 12, 30), DEFAULT_LIST_ID)
+    path.write_text(" \n", encoding="utf-8")
+    assert JsonTodoRepository(file_path=str(path), codec=get_todo_codec(name)).get_all() == []
+    with pytest.raises(ValueError):
+        get_todo_codec("yaml")
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+@pytest.mark.parametrize(
+    "document",
+    [
+        "not json",
+        '[{"id": "1", "title": "Old", "description": null, "completed": "yes", "created_at": "2024-05-01T12:30:00"}]',
+        '[{"title": "Old", "description": null, "completed": false, "created_at": "2024-05-01T12:30:00"}]',
+        '[{"id": "1", "title": "Old", "description": null, "completed": false}]',
+        '[{"id": "1", "title": "Old", "description": null, "completed": false, "created_at": "2024-05-01"}]',
+        '[{"id": "1", "title": "Old", "description": null, "completed": false, "created_at": "yesterday"}]',
+        '[{"id": 1, "title": "Old", "description": null, "completed": false, "created_at": "2024-05-01T12:30:00"}]',
+        "[null]",
+        '{"id": "1"}',
+        "null",
+        "1",
+        '"todos"',
+    ],
+)
+def test_json_repository_refuses_to_load_and_overwrite_invalid_files(name, document, tmp_path):
+    if not CODECS[name].available:
+        pytest.skip(f"{name} is not installed")
+    path = tmp_path / "todos.json"
+    path.write_text(document, encoding="utf-8")
+    with pytest.raises(ValueError, match="Cannot load todo items"):
+        JsonTodoRepository(file_path=str(path), codec=get_todo_codec(name))
+    assert path.read_text(encoding="utf-8") == document
+
+
+def test_codecs_agree_on_creation_times():
+    fields = '"title": "A", "description": null, "completed": false'
+    document = (
+        f'[{{"id": "1", {fields}, "created_at": "2024-05-01T12:30:00.250000"}},'
+        f' {{"id": "2", {fields}, "created_at": "2024-05-01T12:30:00+00:00"}}]'
+    )
+    utc = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    expected = [datetime(2024, 5, 1, 12, 30, 0, 250000), utc]
+    for codec_type in CODECS.values():
+        if codec_type.available:
+            todos = codec_type().decode_todos(document.encode())
+            assert [todo.created_at for todo in todos] == expected, codec_type.name
+
+
+def test_json_repository_replaces_its_file_atomically(tmp_path):
+    path = tmp_path / "todos.json"
+    repo = JsonTodoRepository(file_path=str(path))
+    repo.create(Todo(title="First"))
+    assert [p.name for p in tmp_path.iterdir()] == ["todos.json"]
+    inode = path.stat().st_ino
+    repo.create(Todo(title="Second"))
+    # A new file is renamed over the store instead of truncating it in place.
+    assert path.stat().st_ino != inode
+    assert len(JsonTodoRepository(file_path=str(path)).get_all()) == 2
+
+
+def test_normalize_title():
+    assert normalize_title("  Buy\tＭＩＬＫ  now") == "buy milk now"
+    assert normalize_title("Buy ") == "buy "
+    assert normalize_title("   ") == ""
+
+
+def test_title_trie_matches_brute_force():
+    rng = random.Random(7)
+    words = ["buy", "bu", "b", "Buy  Milk", "milk", "milkshake", "call", "ca", "Ünï"]
+    trie = TitleTrie(capacity=5)
+    live = {}
+    for step in range(3000):
+        action = rng.random()
+        if action < 0.5 or not live:
+            title = " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+            todo = Todo(title=title, created_at=datetime(2024, 1, 1) + timedelta(seconds=rng.randrange(10**6)))
+            live[todo.id] = todo
+            trie.todo_saved(todo)
+        elif action < 0.75:
+            todo_id = rng.choice(list(live))
+            del live[todo_id]
+            trie.todo_deleted(todo_id)
+        else:
+            todo = live[rng.choice(list(live))]
+            live[todo.id] = Todo(id=todo.id, title=rng.choice(words), created_at=todo.created_at)
+            trie.todo_saved(live[todo.id])
+        if step % 100 == 0:
+            rebuilt = TitleTrie(capacity=5)
+            rebuilt.rebuild(list(live.values()))
+            for prefix in ["", "b", "buy", "buy ", "BUY M", "milks", "c", "ü", "x"]:
+                matches = [t for t in live.values() if normalize_title(t.title).startswith(normalize_title(prefix))]
+                matches.sort(key=lambda t: (-t.created_at.timestamp(), t.id))
+                expected = [t.id for t in matches[:5]]
+                assert trie.suggest(prefix, 5) == expected == rebuilt.suggest(prefix, 5)
+    assert len(trie) == len(live)
+
+
+@pytest.mark.parametrize("purged_share", [0.1, 0.9])
+def test_title_trie_follows_purges(purged_share):
+    repo = ObservableTodoRepository(InMemoryTodoRepository())
+    trie = TitleTrie(capacity=5)
+    repo.subscribe(trie)
+    start = datetime(2024, 1, 1)
+    todos = repo.create_many(
+        Todo(title=f"Task {n % 7}", completed=n % 10 < purged_share * 10, created_at=start + timedelta(hours=n))
+        for n in range(200)
+    )
+    purged = set(repo.purge_completed(datetime(2025, 1, 1)))
+    assert purged == {todo.id for todo in todos if todo.completed}
+    rebuilt = TitleTrie(capacity=5)
+    rebuilt.rebuild(repo.get_all())
+    for prefix in ["", "task", "task 3"]:
+        assert trie.suggest(prefix, 5) == rebuilt.suggest(prefix, 5)
+    assert len(trie) == len(rebuilt) == 200 - len(purged)
+    newest = repo.create(Todo(title="Task 3", created_at=start + timedelta(days=30)))
+    assert trie.suggest("task 3", 5)[0] == newest.id
+
+
+def test_title_trie_handles_deeply_nested_titles():
+    repo = ObservableTodoRepository(InMemoryTodoRepository())
+    start = datetime(2024, 1, 1)
+    todos = repo.create_many(
+        Todo(title="a" * k + suffix, created_at=start + timedelta(seconds=2 * k + len(suffix)))
+        for k in range(1, 3000)
+        for suffix in ("", "b")
+    )
+    trie = TitleTrie(capacity=3)
+    repo.subscribe(trie)
+    assert trie.suggest("a" * 2990, 3) == [todos[-1].id, todos[-2].id, todos[-3].id]
+    assert trie.suggest("a" * 10 + "b", 3) == [todos[19].id]
+    # Deleting most items rebuilds the trie from the remaining keys.
+    trie.todos_deleted([todo.id for todo in todos[2000:]])
+    assert trie.suggest("a" * 1000, 3) == [todos[1999].id, todos[1998].id]
+
+
+def test_failed_rebuild_unsubscribes_the_listener():
+    repo = ObservableTodoRepository(InMemoryTodoRepository())
+
+    class BrokenTrie(TitleTrie):
+        def rebuild(self, todos):
+            raise RuntimeError("broken")
+
+    with pytest.raises(RuntimeError):
+        repo.subscribe(BrokenTrie())
+    assert repo.listeners == []
+    repo.create(Todo(title="Not recorded"))
+
+
+def test_subscribe_replays_changes_made_during_the_rebuild():
+    repo = ObservableTodoRepository(InMemoryTodoRepository())
+    kept, deleted = repo.create(Todo(title="Call mom")), repo.create(Todo(title="Call dad"))
+    rebuilding, resume = threading.Event(), threading.Event()
+
+    class SlowTrie(TitleTrie):
+        def rebuild(self, todos):
+            rebuilding.set()
+            resume.wait(5)
+            super().rebuild(todos)
+
+    trie = SlowTrie()
+    subscriber = threading.Thread(target=repo.subscribe, args=(trie,))
+    subscriber.start()
+    assert rebuilding.wait(5)
+    # Writers are not held up by the rebuild, and their changes reach the trie.
+    added = repo.create(Todo(title="Call bob"))
+    repo.delete(deleted.id)
+    resume.set()
+    subscriber.join()
+    assert sorted(trie.suggest("call", 10)) == sorted([kept.id, added.id])
+    assert repo.listeners == [trie]
+    newest = repo.create(Todo(title="Call amy"))
+    assert newest.id in trie.suggest("call", 10)
+
+
+def test_suggest_todos_use_case():
+    repo = ObservableTodoRepository(InMemoryTodoRepository())
+    trie = TitleTrie()
+    repo.subscribe(trie)
+    start = datetime(2024, 1, 1)
+    older, newer = (repo.create(Todo(title=f"Call {n}", created_at=start + timedelta(days=n))) for n in (1, 2))
+    repo.create(Todo(title="Buy milk"))
+    assert SuggestTodos(repo, trie).execute("call") == [newer, older]
+    repo.patch(newer.id, {"title": "Email"})
+    assert SuggestTodos(repo, trie).execute("CALL ", limit=1) == [older]
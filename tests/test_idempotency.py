@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from web.idempotency import IdempotencyKeyMismatchError, IdempotencyStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_store_replays_until_ttl_expires():
+    clock = FakeClock()
+    store = IdempotencyStore(ttl_seconds=10, clock=clock)
+    calls = []
+
+    assert store.execute("key", "fp", lambda: calls.append(1) or "result") == ("result", False)
+    assert store.execute("key", "fp", lambda: calls.append(1) or "other") == ("result", True)
+    clock.now = 11
+    assert store.execute("key", "fp", lambda: calls.append(1) or "fresh") == ("fresh", False)
+    assert len(calls) == 2
+
+
+def test_store_is_bounded():
+    store = IdempotencyStore(max_entries=2)
+    for key in "abc":
+        store.execute(key, "fp", lambda: key)
+    assert len(store) == 2
+    assert store.execute("a", "fp", lambda: "recomputed") == ("recomputed", False)
+
+
+def test_store_rejects_different_payload():
+    store = IdempotencyStore()
+    store.execute("key", "fp", lambda: 1)
+    with pytest.raises(IdempotencyKeyMismatchError):
+        store.execute("key", "other-fp", lambda: 2)
+
+
+def test_store_deduplicates_concurrent_requests():
+    store = IdempotencyStore()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_action():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "done"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(store.execute("key", "fp", slow_action)))
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=lambda: results.append(store.execute("key", "fp", slow_action)))
+    follower.start()
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [("done", False), ("done", True)]
@@ -0,0 +1,344 @@
+import multiprocessing
+import os
+import resource
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import replace
+from datetime import datetime
+from typing import Callable, Dict, Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.datagen import DATASET_FORMATS, generate_todos, write_dataset
+from core.interfaces import TodoRepository
+from core.json_repository import JsonTodoRepository
+from core.maintenance import MaintenanceSettings, maintenance_jobs
+from core.observable import ObservableTodoRepository
+from core.partitioning import PartitionRegistry
+from core.remote_repository import RemoteTodoRepository, TodoRepositoryServer
+from core.replication import ChangeLog, TodoReplica
+from core.repository import InMemoryTodoRepository
+from core.scheduler import Scheduler
+from core.shared_store import SharedJsonTodoRepository
+from core.stats import TodoColumns
+from core.suggest import TitleTrie
+from core.use_cases import ImportTodos, PurgeCompletedTodos
+
+# Run with `pytest -m scale`. TODO_SCALE_ITEMS scales the tier down for quicker runs;
+# the budgets below are per item wherever the work is expected to grow with the store.
+pytestmark = pytest.mark.scale
+
+SCALE_ITEMS = int(os.environ.get("TODO_SCALE_ITEMS", "1000000"))
+
+# Budgets in microseconds per stored item. Work that is linear in the store
+# (bulk loads, full scans, every write of a JSON file) has to stay within them,
+# so quadratic behavior fails long before it gets noticeably slow.
+BULK_US_PER_ITEM = 100
+SCAN_US_PER_ITEM = 20
+# Budget in milliseconds for work that must not depend on the store size. It
+# leaves room for a full garbage collection pass over a million live items.
+POINT_MS = 250
+# Peak RSS budget of a scenario: the interpreter plus bytes per stored item,
+# about 1.5 times what each scenario needed at a million items.
+BASE_RSS_MB = 250
+RSS_BYTES_PER_ITEM = {
+    "memory": 800,
+    "json": 1_000,
+    "shared-json": 2_600,
+    "observable": 1_900,
+    # The server and the client, each with a decoded copy of `get_all`.
+    "remote": 4_000,
+    "dataset": 2_000,
+    "replica": 3_000,
+    "web": 2_000,
+    "durable-web": 4_000,
+}
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    yield
+    timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def _in_fresh_process(function: Callable, *args) -> Dict[str, float]:
+    # Peak RSS only ever grows, so every scenario runs in its own interpreter.
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(function, args)
+
+
+def _assert_within_budget(timings: Dict[str, float], linear: Dict[str, float], scenario: str) -> None:
+    for name, seconds in timings.items():
+        if name == "peak_rss_mb":
+            continue
+        budget = linear.get(name, 0) * SCALE_ITEMS / 1e6 + POINT_MS / 1000
+        assert seconds <= budget, f"{name} took {seconds:.3f}s, budget {budget:.3f}s"
+    rss_budget = BASE_RSS_MB + RSS_BYTES_PER_ITEM[scenario] * SCALE_ITEMS / 2**20
+    assert timings["peak_rss_mb"] <= rss_budget, f"peak RSS {timings['peak_rss_mb']:.0f} MB > {rss_budget:.0f} MB"
+
+
+@contextmanager
+def _open_repository(backend: str, directory: str) -> Iterator[TodoRepository]:
+    path = os.path.join(directory, "todos.json")
+    if backend == "memory":
+        yield InMemoryTodoRepository()
+    elif backend == "json":
+        yield JsonTodoRepository(file_path=path)
+    elif backend == "shared-json":
+        repo = SharedJsonTodoRepository(file_path=path, change_log=ChangeLog(os.path.join(directory, "changes.ndjson")))
+        yield repo
+        repo.close()
+    elif backend == "observable":
+        yield ObservableTodoRepository(InMemoryTodoRepository(), listeners=[TodoColumns(), TitleTrie()])
+    elif backend == "remote":
+        served = InMemoryTodoRepository()
+        server = TodoRepositoryServer(os.path.join(directory, "todos.sock"), lambda list_id: served)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        repo = RemoteTodoRepository(server.socket_path)
+        yield repo
+        repo.close()
+        server.shutdown()
+        server.server_close()
+
+
+def _exercise_repository(backend: str, count: int) -> Dict[str, float]:
+    todos = list(generate_todos(count))
+    sample = todos[:: max(1, count // 20)]
+    timings: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as directory, _open_repository(backend, directory) as repo:
+        with _timed(timings, "create_many"):
+            _create_many(repo, todos)
+        with _timed(timings, "get_all"):
+            assert len(repo.get_all()) == count
+        with _timed(timings, "list_page"):
+            page = repo.list_page(limit=100)
+            page = repo.list_page(after=page[-1].id, limit=100)
+        assert page == todos[100:200]
+        with _timed(timings, "get_by_id"):
+            for todo in sample:
+                assert repo.get_by_id(todo.id) == todo
+        with _timed(timings, "write"):
+            created = repo.create(replace(todos[0], id="scale-test", title="Created"))
+            repo.update(replace(created, title="Updated"))
+            repo.patch(created.id, {"completed": True})
+            repo.delete(created.id)
+        with _timed(timings, "transaction"):
+            with repo.transaction() as transaction:
+                transaction.patch(todos[1].id, {"title": "In a transaction"})
+                transaction.delete(todos[2].id)
+        with _timed(timings, "purge_completed"):
+            purged = repo.purge_completed(datetime(2024, 1, 2), limit=1000)
+        assert purged and len(purged) <= 1000
+        with _timed(timings, "compact"):
+            repo.compact()
+    timings["peak_rss_mb"] = _peak_rss_mb()
+    return timings
+
+
+def _create_many(repo: TodoRepository, todos: list) -> None:
+    # The socket protocol sends a request per line, so remote loads go in batches.
+    batch = 10_000 if isinstance(repo, RemoteTodoRepository) else len(todos)
+    for start in range(0, len(todos), batch):
+        repo.create_many(todos[start : start + batch])
+
+
+def _exercise_maintenance(backend: str, count: int) -> Dict[str, float]:
+    # Most items are completed, and all of them are old enough to be purged.
+    todos = list(generate_todos(count, completed_ratio=0.8))
+    completed = [todo for todo in todos if todo.completed]
+    timings: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as directory, _open_repository(backend, directory) as repo:
+        _create_many(repo, todos)
+        with _timed(timings, "purge_use_case"):
+            assert PurgeCompletedTodos(todo_repo=repo).execute(0) == len(completed)
+        assert len(repo.get_all()) == count - len(completed)
+        _create_many(repo, completed)
+        settings = MaintenanceSettings(
+            purge_completed_after_days=0,
+            purge_time_budget=None,
+            compact_interval=60,
+            snapshot_path=os.path.join(directory, "snapshot.json"),
+        )
+        jobs = maintenance_jobs(lambda: {"default": repo}, settings)
+        with _timed(timings, "maintenance_jobs"):
+            Scheduler(jobs).run_all()
+        assert [job.metrics.failures for job in jobs] == [0, 0, 0]
+        assert jobs[0].metrics.last_result == len(completed)
+        assert jobs[2].metrics.last_result == count - len(completed)
+    timings["peak_rss_mb"] = _peak_rss_mb()
+    return timings
+
+
+def _exercise_dataset(fmt: str, count: int) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"todos.{fmt}")
+        with _timed(timings, "write"):
+            assert write_dataset(path, fmt, generate_todos(count)) == count
+        with _timed(timings, "load"):
+            if fmt == "store":
+                loaded = len(JsonTodoRepository(file_path=path).get_all())
+            elif fmt == "changes":
+                loaded = len(TodoReplica(path).repo.get_all())
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    loaded = ImportTodos(InMemoryTodoRepository()).execute(f, fmt, workers=1)
+        assert loaded == count
+    timings["peak_rss_mb"] = _peak_rss_mb()
+    return timings
+
+
+def _exercise_replica(count: int) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        todos = list(generate_todos(count))
+        write_dataset(os.path.join(directory, "todos.json"), "store", todos)
+        log = ChangeLog(os.path.join(directory, "changes.ndjson"))
+        # Opening the store snapshots it into the log, which replicas then follow.
+        with _timed(timings, "open"):
+            source = SharedJsonTodoRepository(file_path=os.path.join(directory, "todos.json"), change_log=log)
+        with _timed(timings, "catch_up"):
+            replica = TodoReplica(log.path)
+        assert len(replica.repo.get_all()) == count
+        source.patch(todos[0].id, {"completed": True})
+        with _timed(timings, "sync"):
+            assert replica.sync() == 1
+        assert replica.repo.get_by_id(todos[0].id).completed
+        replica.close()
+        source.close()
+    timings["peak_rss_mb"] = _peak_rss_mb()
+    return timings
+
+
+def _exercise_web(durable: bool, count: int) -> Dict[str, float]:
+    from web.dependencies.dependencies import (
+        TodoListStore,
+        create_todo_list_store,
+        get_idempotency_store,
+        get_rate_limiter,
+        get_todo_lists,
+    )
+    from web.idempotency import IdempotencyStore
+    from web.main import app
+    from web.rate_limit import RateLimiter
+
+    timings: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        todos = list(generate_todos(count))
+        if durable:
+            write_dataset(os.path.join(directory, "todos.json"), "store", todos)
+
+        def open_list(list_id: str) -> TodoListStore:
+            if durable:
+                return create_todo_list_store(list_id, directory)
+            store = TodoListStore(repo=ObservableTodoRepository(InMemoryTodoRepository()))
+            if list_id == "default":
+                store.repo.create_many(todos)
+            return store
+
+        todo_lists = PartitionRegistry(open_list, idle_timeout=None)
+        app.dependency_overrides[get_todo_lists] = lambda: todo_lists
+        app.dependency_overrides[get_idempotency_store] = IdempotencyStore
+        app.dependency_overrides[get_rate_limiter] = lambda: RateLimiter(limits={})
+        with TestClient(app) as client:
+            with _timed(timings, "open_list"):
+                assert client.get(f"/todos/{todos[0].id}").status_code == 200
+            with _timed(timings, "list_all"):
+                listed = client.get("/todos/")
+            # Counting IDs in the body avoids parsing a million items in the test itself.
+            assert listed.status_code == 200 and listed.content.count(b'"id"') == count
+            etag = listed.headers["ETag"]
+            del listed
+            with _timed(timings, "list_not_modified"):
+                assert client.get("/todos/", headers={"If-None-Match": etag}).status_code == 304
+            with _timed(timings, "list_page"):
+                page = client.get("/todos/", params={"after": todos[99].id, "limit": 100}).json()
+            assert [todo["id"] for todo in page] == [todo.id for todo in todos[100:200]]
+            with _timed(timings, "stats"):
+                assert client.get("/todos/stats").json()["total"] == count
+            with _timed(timings, "suggest_first"):
+                assert client.get("/todos/suggest", params={"prefix": "rev"}).status_code == 200
+            with _timed(timings, "suggest"):
+                suggestions = client.get("/todos/suggest", params={"prefix": "Review s", "limit": 5}).json()
+            assert [todo["title"][:8] for todo in suggestions] == ["Review s"] * 5
+            with _timed(timings, "get"):
+                assert client.get(f"/todos/{todos[count // 2].id}").json()["id"] == todos[count // 2].id
+            with _timed(timings, "write"):
+                created = client.post("/todos/", json={"title": "Created"}).json()
+                assert client.put(f"/todos/{created['id']}", json={"title": "Updated"}).status_code == 200
+                assert client.patch(f"/todos/{created['id']}", json={"completed": True}).status_code == 200
+                assert client.delete(f"/todos/{created['id']}").status_code == 204
+            with _timed(timings, "bulk"):
+                bulk = client.post("/todos/bulk", json=[{"title": f"Bulk {i}"} for i in range(1000)])
+            assert bulk.status_code == 201
+            with _timed(timings, "other_list"):
+                assert client.post("/lists/other/todos/", json={"title": "Other"}).status_code == 201
+            with _timed(timings, "maintenance_jobs"):
+                assert client.get("/maintenance/jobs").status_code == 200
+        app.dependency_overrides.clear()
+        for store in todo_lists.loaded().values():
+            store.close()
+    timings["peak_rss_mb"] = _peak_rss_mb()
+    return timings
+
+
+@pytest.mark.parametrize("backend", ["memory", "json", "shared-json", "observable", "remote"])
+def test_repository_at_scale(backend):
+    timings = _in_fresh_process(_exercise_repository, backend, SCALE_ITEMS)
+    # Each write of a JSON file rewrites the whole store.
+    writes = {"json": 4, "shared-json": 4}.get(backend, 0)
+    linear = {
+        "create_many": BULK_US_PER_ITEM,
+        "get_all": SCAN_US_PER_ITEM,
+        "list_page": SCAN_US_PER_ITEM,
+        "write": writes * BULK_US_PER_ITEM / 4,
+        "transaction": (1 if writes else 0) * BULK_US_PER_ITEM / 4 + SCAN_US_PER_ITEM,
+        "purge_completed": BULK_US_PER_ITEM / 4,
+        "compact": BULK_US_PER_ITEM / 4,
+    }
+    if backend == "remote":
+        linear["get_all"] = BULK_US_PER_ITEM
+    _assert_within_budget(timings, linear, backend)
+
+
+@pytest.mark.parametrize("backend", ["memory", "json", "shared-json", "observable", "remote"])
+def test_maintenance_at_scale(backend):
+    timings = _in_fresh_process(_exercise_maintenance, backend, SCALE_ITEMS)
+    # Purging deletes most of the store, which has to stay linear in the number
+    # of purged items; the jobs also write the store and a snapshot of it.
+    linear = {"purge_use_case": BULK_US_PER_ITEM / 4, "maintenance_jobs": BULK_US_PER_ITEM}
+    _assert_within_budget(timings, linear, backend)
+
+
+@pytest.mark.parametrize("fmt", DATASET_FORMATS)
+def test_dataset_formats_at_scale(fmt):
+    timings = _in_fresh_process(_exercise_dataset, fmt, SCALE_ITEMS)
+    _assert_within_budget(timings, {"write": BULK_US_PER_ITEM, "load": BULK_US_PER_ITEM}, "dataset")
+
+
+def test_replica_at_scale():
+    timings = _in_fresh_process(_exercise_replica, SCALE_ITEMS)
+    _assert_within_budget(timings, {"open": BULK_US_PER_ITEM, "catch_up": BULK_US_PER_ITEM}, "replica")
+
+
+@pytest.mark.parametrize("durable", [False, True], ids=["memory", "durable"])
+def test_endpoints_at_scale(durable):
+    timings = _in_fresh_process(_exercise_web, durable, SCALE_ITEMS)
+    linear = {
+        "open_list": BULK_US_PER_ITEM * (2 if durable else 1),
+        "list_all": BULK_US_PER_ITEM,
+        "list_page": SCAN_US_PER_ITEM,
+        "suggest_first": BULK_US_PER_ITEM,
+    }
+    if durable:
+        # Every write rewrites the JSON file of the store.
+        linear.update(write=BULK_US_PER_ITEM, bulk=BULK_US_PER_ITEM / 4)
+    _assert_within_budget(timings, linear, "durable-web" if durable else "web")
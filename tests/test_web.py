@@ -0,0 +1,357 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core.observable import ObservableTodoRepository
+from core.partitioning import PartitionRegistry
+from core.repository import InMemoryTodoRepository
+from core.suggest import TitleTrie
+from web.compression import negotiate_encoding
+from web.dependencies.dependencies import (
+    TodoListStore,
+    create_todo_list_store,
+    get_idempotency_store,
+    get_rate_limiter,
+    get_todo_lists,
+    todo_list_exists,
+)
+from web.idempotency import IdempotencyStore
+from web.main import app
+from web.rate_limit import AdmissionControlMiddleware, RateLimit, RateLimiter
+
+
+@pytest.fixture
+def client():
+    todo_lists = PartitionRegistry(
+        lambda list_id: TodoListStore(repo=ObservableTodoRepository(InMemoryTodoRepository())), idle_timeout=None
+    )
+    app.dependency_overrides[get_todo_lists] = lambda: todo_lists
+    idempotency_store = IdempotencyStore()
+    app.dependency_overrides[get_idempotency_store] = lambda: idempotency_store
+    app.dependency_overrides[get_rate_limiter] = lambda: RateLimiter(limits={})
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+def test_crud_round_trip(client):
+    created = client.post("/todos/", json={"title": "Write tests"})
+    assert created.status_code == 201
+    todo_id = created.json()["id"]
+
+    assert client.get(f"/todos/{todo_id}").json()["title"] == "Write tests"
+    assert client.put(f"/todos/{todo_id}", json={"completed": True}).json()["completed"] is True
+    assert [todo["id"] for todo in client.get("/todos/").json()] == [todo_id]
+    assert client.delete(f"/todos/{todo_id}").status_code == 204
+    assert client.get(f"/todos/{todo_id}").status_code == 404
+
+
+def test_list_pages_in_creation_order(client):
+    ids = [todo["id"] for todo in client.post("/todos/bulk", json=[{"title": f"Todo {i}"} for i in range(5)]).json()]
+    first = client.get("/todos/", params={"limit": 2}).json()
+    assert [todo["id"] for todo in first] == ids[:2]
+    rest = client.get("/todos/", params={"after": first[-1]["id"], "limit": 10}).json()
+    assert [todo["id"] for todo in rest] == ids[2:]
+    # The full list is encoded by the JSON codec, pages by pydantic; both agree.
+    assert client.get("/todos/").json() == first + rest
+    assert client.get("/todos/", params={"limit": 0}).status_code == 422
+
+
+def test_suggest_todos(client):
+    first = client.post("/todos/", json={"title": "Review slides"}).json()
+    client.post("/todos/", json={"title": "Buy milk"})
+    second = client.post("/todos/", json={"title": "review   PR"}).json()
+    response = client.get("/todos/suggest", params={"prefix": "Rev"})
+    assert [todo["id"] for todo in response.json()] == [second["id"], first["id"]]
+    assert client.get("/todos/suggest", params={"prefix": "rev", "limit": 1}).json() == [second]
+    assert client.get("/todos/suggest", params={"prefix": "x"}).json() == []
+    assert client.get("/todos/suggest", params={"prefix": "r", "limit": 50}).status_code == 422
+
+
+def test_patch_changes_only_given_fields(client):
+    todo_id = client.post("/todos/", json={"title": "Patch", "description": "Keep me"}).json()["id"]
+
+    patched = client.patch(f"/todos/{todo_id}", json={"completed": True})
+    assert patched.status_code == 200
+    assert patched.json()["completed"] is True
+    assert patched.json()["description"] == "Keep me"
+
+    cleared = client.patch(f"/todos/{todo_id}", json={"description": None})
+    assert cleared.json()["description"] is None
+    assert client.patch(f"/todos/{todo_id}", json={"title": None}).status_code == 422
+    assert client.patch(f"/todos/{todo_id}", json={"id": "other"}).status_code == 422
+    assert client.patch("/todos/missing", json={"completed": True}).status_code == 404
+
+
+class _RacingRepository(InMemoryTodoRepository):
+    # Another writer changes every item right after a transaction reads it.
+    def get_by_id(self, todo_id):
+        todo = super().get_by_id(todo_id)
+        if todo is not None:
+            self.patch(todo_id, {"description": "Changed elsewhere"})
+        return todo
+
+
+def test_conflicting_update_is_rejected(client):
+    racing = TodoListStore(repo=ObservableTodoRepository(_RacingRepository()))
+    app.dependency_overrides[get_todo_lists] = lambda: PartitionRegistry(lambda list_id: racing, idle_timeout=None)
+    created = client.post("/todos/", json={"title": "Contended"}).json()
+    response = client.put(f"/todos/{created['id']}", json={"title": "Mine"})
+    assert response.status_code == 409
+    assert "changed by another writer" in response.json()["detail"]
+    assert client.put("/todos/missing", json={"title": "Mine"}).status_code == 404
+
+
+def test_lists_are_isolated(client):
+    work = client.post("/lists/work/todos/", json={"title": "Report"}).json()
+    client.post("/todos/", json={"title": "Groceries"})
+
+    assert work["list_id"] == "work"
+    assert [todo["title"] for todo in client.get("/lists/work/todos/").json()] == ["Report"]
+    assert [todo["title"] for todo in client.get("/todos/").json()] == ["Groceries"]
+    assert client.get("/lists/default/todos/").json() == client.get("/todos/").json()
+    assert client.get(f"/todos/{work['id']}").status_code == 404
+    assert client.get("/lists/not%20valid/todos/").status_code == 404
+
+
+def test_reads_do_not_create_lists(client):
+    todo_lists = app.dependency_overrides[get_todo_lists]()
+    for path in ["/lists/home/todos/", "/lists/home/todos/stats", "/lists/home/todos/missing"]:
+        response = client.get(path)
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Todo list 'home' not found"
+    assert client.delete("/lists/home/todos/missing").status_code == 404
+    assert "home" not in todo_lists
+    assert client.get("/todos/").json() == []
+    client.post("/lists/home/todos/", json={"title": "First"})
+    assert client.get("/lists/home/todos/stats").json()["total"] == 1
+
+
+def test_in_memory_lists_are_capped(client):
+    todo_lists = PartitionRegistry(
+        lambda list_id: TodoListStore(repo=ObservableTodoRepository(InMemoryTodoRepository())),
+        idle_timeout=None,
+        max_partitions=2,
+    )
+    app.dependency_overrides[get_todo_lists] = lambda: todo_lists
+    assert client.post("/lists/a/todos/", json={"title": "A"}).status_code == 201
+    assert client.post("/lists/b/todos/", json={"title": "B"}).status_code == 201
+    assert client.post("/lists/c/todos/", json={"title": "C"}).status_code == 507
+    assert client.post("/lists/a/todos/", json={"title": "Again"}).status_code == 201
+
+
+def test_durable_lists_read_from_replica(client, tmp_path):
+    todo_lists = PartitionRegistry(lambda list_id: create_todo_list_store(list_id, str(tmp_path)), idle_timeout=None)
+    app.dependency_overrides[get_todo_lists] = lambda: todo_lists
+    todo = client.post("/lists/work/todos/", json={"title": "Durable"}).json()
+
+    listed = client.get("/lists/work/todos/")
+    assert [item["id"] for item in listed.json()] == [todo["id"]]
+    assert float(listed.headers["Replica-Staleness"]) >= 0
+    fetched = client.get(f"/lists/work/todos/{todo['id']}")
+    assert fetched.json()["title"] == "Durable"
+    assert "Replica-Staleness" in fetched.headers
+    assert client.get("/lists/work/todos/stats").json()["total"] == 1
+    assert (tmp_path / "todos.work.json").exists()
+
+
+def test_durable_lists_are_not_created_by_reads(client, tmp_path):
+    todo_lists = PartitionRegistry(
+        lambda list_id: create_todo_list_store(list_id, str(tmp_path)),
+        idle_timeout=60,
+        on_evict=lambda list_id, store: store.close(),
+        exists=lambda list_id: todo_list_exists(list_id, str(tmp_path)),
+        max_partitions=1,
+    )
+    app.dependency_overrides[get_todo_lists] = lambda: todo_lists
+    assert client.get("/lists/probe/todos/").status_code == 404
+    assert not any("probe" in path.name for path in tmp_path.iterdir())
+    client.post("/lists/work/todos/", json={"title": "Durable"})
+    client.post("/lists/home/todos/", json={"title": "Evicts work"})
+    assert list(todo_lists.loaded()) == ["home"]
+    # Evicted and restarted lists exist as long as their files do.
+    assert [todo["title"] for todo in client.get("/lists/work/todos/").json()] == ["Durable"]
+    for store in todo_lists.loaded().values():
+        store.close()
+
+
+def test_todo_stats(client):
+    client.post("/todos/", json={"title": "Open"})
+    done_id = client.post("/todos/", json={"title": "Done"}).json()["id"]
+    client.put(f"/todos/{done_id}", json={"completed": True})
+
+    stats = client.get("/todos/stats").json()
+
+    assert (stats["total"], stats["completed"], stats["open"]) == (2, 1, 1)
+    assert sum(day["completed"] + day["open"] for day in stats["daily"]) == 2
+    assert stats["title_length_histogram"][0] == 2
+
+
+def test_list_is_compressed_and_cached_per_version(client):
+    for i in range(50):
+        client.post("/todos/", json={"title": f"Todo number {i}", "description": "Repetitive payload"})
+
+    first = client.get("/todos/", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip"
+    assert len(first.json()) == 50
+    etag = first.headers["etag"]
+
+    assert client.get("/todos/", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/todos/", json={"title": "One more"})
+    second = client.get("/todos/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["etag"] != etag
+    assert len(second.json()) == 51
+
+
+def test_list_store_indexes_titles_once_when_loaded():
+    store = create_todo_list_store("titles", data_dir=None)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        tries = set(pool.map(lambda _: id(store.title_trie()), range(8)))
+    assert tries == {id(store.titles)}
+    assert [listener for listener in store.reads.listeners if isinstance(listener, TitleTrie)] == [store.titles]
+
+
+def test_failed_title_index_is_reported():
+    class BrokenTrie(TitleTrie):
+        def rebuild(self, todos):
+            raise ValueError("broken")
+
+    store = TodoListStore(repo=ObservableTodoRepository(InMemoryTodoRepository()), titles=BrokenTrie())
+    with pytest.raises(RuntimeError, match="could not be built"):
+        store.title_trie()
+    assert store.reads.listeners == [store.columns]
+
+
+def test_list_etag_is_unique_to_the_loaded_store(client):
+    # Both lists are at the same local version, as a list is again after a restart.
+    client.post("/lists/a/todos/", json={"title": "In a"})
+    client.post("/lists/b/todos/", json={"title": "In b"})
+    etag = client.get("/lists/a/todos/").headers["etag"]
+    assert client.get("/lists/a/todos/", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/lists/b/todos/", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_small_list_is_not_compressed(client):
+    client.post("/todos/", json={"title": "Tiny"})
+    response = client.get("/todos/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json()[0]["title"] == "Tiny"
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip;q=0.5, identity") == "gzip"
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("") is None
+
+
+def test_idempotent_create_is_replayed(client):
+    headers = {"Idempotency-Key": "retry-1"}
+    first = client.post("/todos/", json={"title": "Once"}, headers=headers)
+    retry = client.post("/todos/", json={"title": "Once"}, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert len(client.get("/todos/").json()) == 1
+
+    conflict = client.post("/todos/", json={"title": "Different"}, headers=headers)
+    assert conflict.status_code == 422
+
+
+def test_idempotent_bulk_create(client):
+    payload = [{"title": "First"}, {"title": "Second", "description": "Bulk"}]
+    headers = {"Idempotency-Key": "bulk-1"}
+    first = client.post("/todos/bulk", json=payload, headers=headers)
+    retry = client.post("/todos/bulk", json=payload, headers=headers)
+
+    assert first.status_code == 201
+    assert [todo["title"] for todo in first.json()] == ["First", "Second"]
+    assert retry.json() == first.json()
+    assert len(client.get("/todos/").json()) == 2
+
+
+def test_listing_is_rate_limited_per_route_class(client):
+    limiter = RateLimiter(limits={"list": RateLimit(capacity=2, per_second=0.1)})
+    app.dependency_overrides[get_rate_limiter] = lambda: limiter
+
+    assert client.get("/todos/").status_code == 200
+    assert client.get("/todos/").status_code == 200
+    limited = client.get("/todos/")
+    assert limited.status_code == 429
+    assert limited.headers["retry-after"] == "10"
+    assert client.get("/todos/stats").status_code == 200
+
+
+def test_pages_are_charged_by_size(client):
+    limiter = RateLimiter(
+        limits={"list": RateLimit(capacity=1, per_second=0.1), "page": RateLimit(capacity=10, per_second=0.1)}
+    )
+    app.dependency_overrides[get_rate_limiter] = lambda: limiter
+
+    assert client.get("/todos/").status_code == 200
+    assert client.get("/todos/").status_code == 429
+    # Paging is not charged to the budget of full listings.
+    assert client.get("/todos/", params={"limit": 100}).status_code == 200
+    assert client.get("/todos/", params={"after": "0"}).status_code == 200
+    # A page of 1000 items costs ten default pages.
+    limited = client.get("/todos/", params={"limit": 1000})
+    assert limited.status_code == 429
+    assert limited.headers["retry-after"] == "20"
+    assert client.get("/todos/", params={"limit": 800}).status_code == 200
+    assert client.get("/todos/", params={"limit": 5000}).status_code == 422
+
+
+def test_admission_control_sheds_load(client):
+    middleware = AdmissionControlMiddleware(app, max_in_flight=0)
+    with TestClient(middleware) as overloaded:
+        response = overloaded.get("/todos/")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_maintenance_jobs_are_reported(client):
+    jobs = client.get("/maintenance/jobs").json()
+    assert [job["name"] for job in jobs] == ["compact"]
+    assert jobs[0]["runs"] == 0
+
+
+def _shared_store_worker(data_dir, worker, count, barrier, results):
+    todo_lists = PartitionRegistry(lambda list_id: create_todo_list_store(list_id, data_dir), idle_timeout=None)
+    app.dependency_overrides[get_todo_lists] = lambda: todo_lists
+    app.dependency_overrides[get_rate_limiter] = lambda: RateLimiter(limits={})
+    with TestClient(app) as client:
+        barrier.wait()
+        created = [client.post("/lists/shared/todos/", json={"title": f"{worker}-{i}"}).json() for i in range(count)]
+        client.patch(f"/lists/shared/todos/{created[0]['id']}", json={"completed": True})
+        client.delete(f"/lists/shared/todos/{created[1]['id']}")
+        barrier.wait()
+        listed = client.get("/lists/shared/todos/")
+        stats = client.get("/lists/shared/todos/stats").json()
+        stats = (stats["total"], stats["completed"])
+        results.put(
+            (sorted((todo["title"], todo["completed"]) for todo in listed.json()), listed.headers["ETag"], stats)
+        )
+
+
+def test_workers_share_a_consistent_store(tmp_path):
+    workers, count = 4, 10
+    context = multiprocessing.get_context("fork")
+    barrier, results = context.Barrier(workers), context.Queue()
+    processes = [
+        context.Process(target=_shared_store_worker, args=(str(tmp_path), worker, count, barrier, results))
+        for worker in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    views = [results.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join(timeout=10)
+
+    expected = sorted((f"{w}-{i}", i == 0) for w in range(workers) for i in range(count) if i != 1)
+    assert all(view == views[0] for view in views)
+    assert views[0][0] == expected
+    assert views[0][2] == (workers * (count - 1), workers)
@@ -1,33 +1,180 @@
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+import json
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
 
-from core.use_cases import CreateTodo, DeleteTodo, GetAllTodos, GetTodoById, UpdateTodo
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+
+from core.codec import get_todo_codec
+from core.interfaces import TransactionConflictError
+from core.scheduler import Scheduler
+from core.suggest import MAX_SUGGESTIONS
+from core.use_cases import (
+    CreateTodo,
+    CreateTodos,
+    DeleteTodo,
+    GetAllTodos,
+    GetTodoById,
+    GetTodosPage,
+    PatchTodo,
+    SuggestTodos,
+    TodoStats,
+    UpdateTodo,
+)
+from web.compression import CompressedResponseCache, CompressionSettings, negotiate_encoding
 from web.dependencies.dependencies import (
+    REPLICA_STALENESS_HEADER,
     get_create_todo_use_case,
+    get_create_todos_use_case,
     get_delete_todo_use_case,
     get_get_all_todos_use_case,
     get_get_todo_by_id_use_case,
+    get_get_todos_page_use_case,
+    get_idempotency_store,
+    get_list_etag,
+    get_list_id,
+    get_list_response_cache,
+    get_patch_todo_use_case,
+    get_read_version,
+    get_scheduler,
+    get_suggest_todos_use_case,
+    get_todo_stats_use_case,
     get_update_todo_use_case,
+    rate_limit,
+    rate_limit_listing,
 )
-from web.schemas.models import TodoCreate, TodoResponse, TodoUpdate
+from web.idempotency import MAX_KEY_LENGTH, IdempotencyKeyMismatchError, IdempotencyStore
+from web.schemas.models import JobMetricsResponse, TodoCreate, TodoPatch, TodoResponse, TodoStatsResponse, TodoUpdate
 
+# Todo routes are mounted both at the root, for the default list, and under
+# /lists/{list_id}; the dependencies resolve the list from the path.
 router = APIRouter()
+maintenance_router = APIRouter()
 
+LIST_COMPRESSION = CompressionSettings(minimum_size=1024, level=None)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+_todo_list_adapter = TypeAdapter(List[TodoResponse])
+# Encodes `Todo` objects directly into the `List[TodoResponse]` JSON shape.
+_todo_codec = get_todo_codec()
+
+T = TypeVar("T")
 
-@router.post("/todos/", response_model=TodoResponse, status_code=201)
-def create_todo_endpoint(todo_create: TodoCreate, create_todo: CreateTodo = Depends(get_create_todo_use_case)):
-    todo = create_todo.execute(title=todo_create.title, description=todo_create.description)
-    return TodoResponse.model_validate(todo)
 
+def _run_idempotently(
+    store: IdempotencyStore,
+    response: Response,
+    scope: Tuple[str, str],
+    key: Optional[str],
+    payload: Any,
+    action: Callable[[], T],
+) -> T:
+    if key is None:
+        return action()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters long")
+    fingerprint = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    try:
+        result, replayed = store.execute((*scope, key), fingerprint, action)
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+@router.post("/todos/", response_model=TodoResponse, status_code=201, dependencies=[Depends(rate_limit("write"))])
+def create_todo_endpoint(
+    todo_create: TodoCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    list_id: str = Depends(get_list_id),
+    create_todo: CreateTodo = Depends(get_create_todo_use_case),
+    idempotency_store: IdempotencyStore = Depends(get_idempotency_store),
+):
+    def create() -> TodoResponse:
+        todo = create_todo.execute(title=todo_create.title, description=todo_create.description)
+        return TodoResponse.model_validate(todo)
 
-@router.get("/todos/")
+    scope = (list_id, "create")
+    return _run_idempotently(idempotency_store, response, scope, idempotency_key, todo_create.model_dump(), create)
+
+
+@router.post(
+    "/todos/bulk", response_model=List[TodoResponse], status_code=201, dependencies=[Depends(rate_limit("write"))]
+)
+def create_todos_endpoint(
+    todos_create: List[TodoCreate],
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+    list_id: str = Depends(get_list_id),
+    create_todos: CreateTodos = Depends(get_create_todos_use_case),
+    idempotency_store: IdempotencyStore = Depends(get_idempotency_store),
+):
+    def create() -> List[TodoResponse]:
+        todos = create_todos.execute((todo.title, todo.description) for todo in todos_create)
+        return _todo_list_adapter.validate_python(todos)
+
+    payload = [todo.model_dump() for todo in todos_create]
+    return _run_idempotently(idempotency_store, response, (list_id, "create_bulk"), idempotency_key, payload, create)
+
+
+@router.get(
+    "/todos/",
+    response_model=List[TodoResponse],
+    dependencies=[Depends(rate_limit_listing(DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))],
+)
 def get_all_todos_endpoint(
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
     get_all_todos: GetAllTodos = Depends(get_get_all_todos_use_case),
+    get_todos_page: GetTodosPage = Depends(get_get_todos_page_use_case),
+    version: int = Depends(get_read_version),
+    etag: str = Depends(get_list_etag),
+    cache: CompressedResponseCache = Depends(get_list_response_cache),
 ):
-    todos = get_all_todos.execute()
-    return [TodoResponse.model_validate(todo) for todo in todos]
+    if after is not None or limit is not None:
+        # A page in creation order, starting after the cursor `after`.
+        todos = get_todos_page.execute(after=after, limit=limit or DEFAULT_PAGE_SIZE)
+        return _todo_list_adapter.validate_python(todos)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if REPLICA_STALENESS_HEADER in response.headers:
+        headers[REPLICA_STALENESS_HEADER] = response.headers[REPLICA_STALENESS_HEADER]
+    if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=headers)
 
+    # The serialized list, and each compressed variant of it, is built once per
+    # repository version and reused until the next mutation.
+    body, encoding = cache.get(
+        version,
+        negotiate_encoding(request.headers.get("accept-encoding", "")),
+        lambda: _todo_codec.encode_todos(get_all_todos.execute()),
+        LIST_COMPRESSION,
+    )
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
 
-@router.get("/todos/{todo_id}", response_model=TodoResponse)
+
+@router.get("/todos/stats", response_model=TodoStatsResponse, dependencies=[Depends(rate_limit("read"))])
+def get_todo_stats_endpoint(todo_stats: TodoStats = Depends(get_todo_stats_use_case)):
+    return TodoStatsResponse.model_validate(todo_stats.execute())
+
+
+@router.get("/todos/suggest", response_model=List[TodoResponse], dependencies=[Depends(rate_limit("read"))])
+def suggest_todos_endpoint(
+    prefix: str,
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+    suggest_todos: SuggestTodos = Depends(get_suggest_todos_use_case),
+):
+    return _todo_list_adapter.validate_python(suggest_todos.execute(prefix, limit))
+
+
+@router.get("/todos/{todo_id}", response_model=TodoResponse, dependencies=[Depends(rate_limit("read"))])
 def get_todo_by_id_endpoint(todo_id: str, get_todo_by_id: GetTodoById = Depends(get_get_todo_by_id_use_case)):
     todo = get_todo_by_id.execute(todo_id)
     if not todo:
@@ -35,7 +182,7 @@ def get_todo_by_id_endpoint(todo_id: str, get_todo_by_id: GetTodoById = Depends(
     return TodoResponse.model_validate(todo)
 
 
-@router.put("/todos/{todo_id}", response_model=TodoResponse)
+@router.put("/todos/{todo_id}", response_model=TodoResponse, dependencies=[Depends(rate_limit("write"))])
 def update_todo_endpoint(
     todo_id: str,
     todo_update: TodoUpdate,
@@ -49,14 +196,51 @@ def update_todo_endpoint(
             completed=todo_update.completed,
         )
         return TodoResponse.model_validate(todo)
+    except TransactionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.patch("/todos/{todo_id}", response_model=TodoResponse, dependencies=[Depends(rate_limit("write"))])
+def patch_todo_endpoint(
+    todo_id: str,
+    todo_patch: TodoPatch,
+    patch_todo: PatchTodo = Depends(get_patch_todo_use_case),
+):
+    try:
+        todo = patch_todo.execute(todo_id, todo_patch.model_dump(exclude_unset=True))
+        return TodoResponse.model_validate(todo)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
-@router.delete("/todos/{todo_id}", status_code=204)
+@router.delete("/todos/{todo_id}", status_code=204, dependencies=[Depends(rate_limit("write"))])
 def delete_todo_endpoint(todo_id: str, delete_todo: DeleteTodo = Depends(get_delete_todo_use_case)):
     try:
         delete_todo.execute(todo_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     return {"message": "Todo deleted successfully"}
+
+
+@maintenance_router.get(
+    "/maintenance/jobs",
+    response_model=List[JobMetricsResponse],
+    dependencies=[Depends(rate_limit("read"))],
+)
+def get_maintenance_jobs_endpoint(scheduler: Scheduler = Depends(get_scheduler)):
+    return [
+        JobMetricsResponse(
+            name=job.name,
+            interval=job.interval,
+            time_budget=job.time_budget,
+            runs=job.metrics.runs,
+            failures=job.metrics.failures,
+            overruns=job.metrics.overruns,
+            last_duration=job.metrics.last_duration,
+            total_duration=job.metrics.total_duration,
+            last_error=job.metrics.last_error,
+        )
+        for job in scheduler.jobs
+    ]
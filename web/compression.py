@@ -0,0 +1,163 @@
+import gzip
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+@dataclass(frozen=True)
+class CompressionSettings:
+    minimum_size: int = 1024
+    level: Optional[int] = None
+
+
+DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+
+_COMPRESSORS: Dict[str, Callable[[bytes, int], bytes]] = {
+    "gzip": lambda body, level: gzip.compress(body, compresslevel=level, mtime=0),
+}
+if brotli is not None:
+    _COMPRESSORS["br"] = lambda body, level: brotli.compress(body, quality=level)
+if zstandard is not None:
+    _COMPRESSORS["zstd"] = lambda body, level: zstandard.ZstdCompressor(level=level).compress(body)
+
+# Most preferred first; used to break ties between equally weighted encodings.
+AVAILABLE_ENCODINGS = tuple(encoding for encoding in ("zstd", "br", "gzip") if encoding in _COMPRESSORS)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in AVAILABLE_ENCODINGS:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, settings: CompressionSettings) -> bytes:
+    level = DEFAULT_LEVELS[encoding] if settings.level is None else settings.level
+    return _COMPRESSORS[encoding](body, level)
+
+
+class CompressedResponseCache:
+    """Keeps the rendered and compressed bodies of one response per repository version."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._bodies: Dict[Optional[str], bytes] = {}
+
+    def get(
+        self,
+        version: int,
+        encoding: Optional[str],
+        render: Callable[[], bytes],
+        settings: CompressionSettings,
+    ) -> Tuple[bytes, Optional[str]]:
+        with self._lock:
+            if version != self._version:
+                self._version, self._bodies = version, {}
+            raw = self._bodies.get(None)
+        if raw is None:
+            raw = render()
+            self._store(version, None, raw)
+        if encoding is None or len(raw) < settings.minimum_size:
+            return raw, None
+
+        with self._lock:
+            body = self._bodies.get(encoding)
+        if body is None:
+            body = compress(raw, encoding, settings)
+            self._store(version, encoding, body)
+        return body, encoding
+
+    def _store(self, version: int, encoding: Optional[str], body: bytes) -> None:
+        with self._lock:
+            if version == self._version:
+                self._bodies[encoding] = body
+
+
+class CompressionMiddleware:
+    """Compresses response bodies with the best encoding the client accepts.
+
+    Settings are looked up by request path, after mapping it through
+    `route_key` (e.g. to strip a tenant prefix), falling back to `default`. Responses
+    that already carry a Content-Encoding (such as cached, pre-compressed
+    bodies) are passed through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        default: CompressionSettings = CompressionSettings(),
+        routes: Optional[Mapping[str, CompressionSettings]] = None,
+        route_key: Callable[[str], str] = lambda path: path,
+    ):
+        self.app = app
+        self.default = default
+        self.routes = dict(routes or {})
+        self.route_key = route_key
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        settings = self.routes.get(self.route_key(scope["path"]), self.default)
+        start: Optional[Message] = None
+        chunks = []
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=list(start["headers"]))
+            if "content-encoding" not in headers and len(body) >= settings.minimum_size:
+                body = await anyio.to_thread.run_sync(compress, body, encoding, settings)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                start["headers"] = headers.raw
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
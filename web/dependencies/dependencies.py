@@ -1,30 +1,298 @@
-from fastapi import Depends
+import logging
+import math
+import os
+import secrets
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Optional
 
+from fastapi import Depends, HTTPException, Query, Request, Response
+
+from core.entities import DEFAULT_LIST_ID
 from core.interfaces import TodoRepository
+from core.observable import ObservableTodoRepository
+from core.partitioning import PartitionLimitError, PartitionRegistry, list_file_path
+from core.replication import ChangeLog, TodoReplica
 from core.repository import InMemoryTodoRepository
-from core.use_cases import CreateTodo, DeleteTodo, GetAllTodos, GetTodoById, UpdateTodo
+from core.scheduler import Scheduler
+from core.shared_store import SharedJsonTodoRepository
+from core.stats import TodoColumns
+from core.suggest import TitleTrie
+from core.use_cases import (
+    CreateTodo,
+    CreateTodos,
+    DeleteTodo,
+    GetAllTodos,
+    GetTodoById,
+    GetTodosPage,
+    PatchTodo,
+    SuggestTodos,
+    TodoStats,
+    UpdateTodo,
+)
+from web.compression import CompressedResponseCache
+from web.idempotency import IdempotencyStore
+from web.rate_limit import RateLimiter, retry_after_header
+
+logger = logging.getLogger(__name__)
+
+# When set, every todo list is persisted to its own JSON file in this directory,
+# which all worker processes of a deployment share, and lists that are not used
+# for a while are evicted from memory. Otherwise all lists are kept in the memory
+# of a single process for its lifetime.
+DATA_DIR = os.environ.get("TODO_DATA_DIR")
+LIST_IDLE_TIMEOUT = 15 * 60
+# Durable lists beyond this many are evicted, least recently used first; in
+# memory, where lists cannot be evicted, no further lists are created.
+MAX_LOADED_LISTS = int(os.environ.get("TODO_MAX_LISTS", "1000"))
+# Durable lists serve reads from an in-memory replica that tails the list's
+# change log. It is synced before a read once it may be older than this.
+REPLICA_MAX_STALENESS = float(os.environ.get("TODO_REPLICA_MAX_STALENESS", "0"))
+REPLICA_STALENESS_HEADER = "Replica-Staleness"
+
+
+@dataclass
+class TodoListStore:
+    repo: ObservableTodoRepository
+    replica: Optional[TodoReplica] = None
+    columns: TodoColumns = field(default_factory=TodoColumns)
+    list_cache: CompressedResponseCache = field(default_factory=CompressedResponseCache)
+    titles: TitleTrie = field(default_factory=TitleTrie)
+    titles_ready: threading.Event = field(default_factory=threading.Event)
+    titles_error: Optional[Exception] = None
+    # Local version counters restart at 0 with the process, so tags built from
+    # them are qualified with a token that is new for every loaded store.
+    epoch: str = field(default_factory=lambda: secrets.token_hex(8))
+
+    def __post_init__(self):
+        self.reads.subscribe(self.columns)
+        # Indexing the titles of a large list takes seconds, so it happens in
+        # the background from the moment the list is loaded.
+        threading.Thread(target=self._index_titles, name="title-index", daemon=True).start()
+
+    def _index_titles(self) -> None:
+        try:
+            self.reads.subscribe(self.titles)
+        except Exception as e:
+            self.titles_error = e
+            logger.exception("Indexing the titles of a todo list failed")
+        finally:
+            self.titles_ready.set()
+
+    @property
+    def reads(self) -> ObservableTodoRepository:
+        return self.replica.repo if self.replica is not None else self.repo
+
+    @property
+    def version(self) -> int:
+        # Shared stores version their change log, so every worker reports the
+        # same version for the same data; local counters differ per process.
+        if self.replica is not None and self.replica.version is not None:
+            return self.replica.version
+        return self.reads.version
+
+    def etag(self, version: int) -> str:
+        # Shared stores version their change log durably, so the version alone
+        # identifies the same data in every worker and across restarts.
+        if self.replica is not None and self.replica.version is not None:
+            return f'W/"{version}"'
+        return f'W/"{self.epoch}-{version}"'
+
+    def title_trie(self) -> TitleTrie:
+        # Only suggestions that arrive right after the list was loaded wait.
+        self.titles_ready.wait()
+        if self.titles_error is not None:
+            raise RuntimeError("The title index of this list could not be built.") from self.titles_error
+        return self.titles
+
+    def close(self) -> None:
+        if self.replica is not None:
+            self.replica.close()
+        if isinstance(self.repo.repo, SharedJsonTodoRepository):
+            self.repo.repo.close()
+
+
+def create_todo_list_store(list_id: str, data_dir: Optional[str] = DATA_DIR) -> TodoListStore:
+    if data_dir is None:
+        return TodoListStore(repo=ObservableTodoRepository(InMemoryTodoRepository()))
+    log = ChangeLog(list_file_path(os.path.join(data_dir, "changes.ndjson"), list_id))
+    repo = SharedJsonTodoRepository(
+        file_path=list_file_path(os.path.join(data_dir, "todos.json"), list_id), change_log=log
+    )
+    return TodoListStore(repo=ObservableTodoRepository(repo), replica=TodoReplica(log.path))
+
+
+def todo_list_exists(list_id: str, data_dir: Optional[str] = DATA_DIR) -> bool:
+    # In memory, lists only exist while they are loaded.
+    return data_dir is not None and os.path.exists(list_file_path(os.path.join(data_dir, "todos.json"), list_id))
+
+
+todo_lists_instance: PartitionRegistry[TodoListStore] = PartitionRegistry(
+    create_todo_list_store,
+    idle_timeout=LIST_IDLE_TIMEOUT if DATA_DIR is not None else None,
+    on_evict=lambda list_id, store: store.close(),
+    exists=todo_list_exists,
+    max_partitions=MAX_LOADED_LISTS,
+)
+idempotency_store_instance = IdempotencyStore()
+rate_limiter_instance = RateLimiter()
+
+
+def get_todo_lists() -> PartitionRegistry[TodoListStore]:
+    return todo_lists_instance
+
+
+def get_list_id(request: Request) -> str:
+    return request.path_params.get("list_id", DEFAULT_LIST_ID)
+
+
+def _load_todo_list_store(todo_lists: PartitionRegistry[TodoListStore], list_id: str, create: bool) -> TodoListStore:
+    try:
+        return todo_lists.get(list_id, create=create)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Todo list '{list_id}' not found")
+    except PartitionLimitError as e:
+        raise HTTPException(status_code=507, detail=str(e))
+
+
+def get_todo_list_store(
+    list_id: str = Depends(get_list_id),
+    todo_lists: PartitionRegistry[TodoListStore] = Depends(get_todo_lists),
+) -> TodoListStore:
+    # Only creating todos creates a list; the default list always exists.
+    return _load_todo_list_store(todo_lists, list_id, create=list_id == DEFAULT_LIST_ID)
+
+
+def get_or_create_todo_list_store(
+    list_id: str = Depends(get_list_id),
+    todo_lists: PartitionRegistry[TodoListStore] = Depends(get_todo_lists),
+) -> TodoListStore:
+    return _load_todo_list_store(todo_lists, list_id, create=True)
+
+
+def get_todo_repository(store: TodoListStore = Depends(get_todo_list_store)) -> ObservableTodoRepository:
+    return store.repo
+
+
+def get_read_repository(
+    response: Response, store: TodoListStore = Depends(get_todo_list_store)
+) -> ObservableTodoRepository:
+    if store.replica is not None:
+        staleness = store.replica.refresh(REPLICA_MAX_STALENESS)
+        response.headers[REPLICA_STALENESS_HEADER] = f"{staleness:.3f}"
+    return store.reads
+
+
+def get_read_version(
+    store: TodoListStore = Depends(get_todo_list_store),
+    reads: ObservableTodoRepository = Depends(get_read_repository),
+) -> int:
+    return store.version
 
-in_memory_repo_instance = InMemoryTodoRepository()
 
+def get_list_etag(store: TodoListStore = Depends(get_todo_list_store), version: int = Depends(get_read_version)) -> str:
+    return store.etag(version)
 
-def get_todo_repository() -> TodoRepository:
-    return in_memory_repo_instance
+
+def get_list_response_cache(store: TodoListStore = Depends(get_todo_list_store)) -> CompressedResponseCache:
+    return store.list_cache
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    return idempotency_store_instance
+
+
+def get_rate_limiter() -> RateLimiter:
+    return rate_limiter_instance
+
+
+def _check_rate_limit(request: Request, limiter: RateLimiter, route_class: str, cost: float = 1.0) -> None:
+    client = request.client.host if request.client else "anonymous"
+    retry_after = limiter.check(client, route_class, cost)
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded", headers=retry_after_header(retry_after))
+
+
+def rate_limit(route_class: str) -> Callable[..., None]:
+    def check_rate_limit(request: Request, limiter: RateLimiter = Depends(get_rate_limiter)) -> None:
+        _check_rate_limit(request, limiter, route_class)
+
+    return check_rate_limit
+
+
+def rate_limit_listing(default_page_size: int, max_page_size: int) -> Callable[..., None]:
+    # Full listings are charged to the "list" class. Cursor pages are charged
+    # to the "page" class, one token per `default_page_size` items requested.
+    def check_listing_rate_limit(
+        request: Request,
+        after: Optional[str] = None,
+        limit: Optional[int] = Query(None, ge=1, le=max_page_size),
+        limiter: RateLimiter = Depends(get_rate_limiter),
+    ) -> None:
+        if after is None and limit is None:
+            _check_rate_limit(request, limiter, "list")
+        else:
+            _check_rate_limit(request, limiter, "page", math.ceil((limit or default_page_size) / default_page_size))
+
+    return check_listing_rate_limit
+
+
+def get_scheduler(request: Request) -> Scheduler:
+    return request.app.state.scheduler
+
+
+def get_todo_columns(
+    store: TodoListStore = Depends(get_todo_list_store),
+    reads: ObservableTodoRepository = Depends(get_read_repository),
+) -> TodoColumns:
+    # Depending on the read repository syncs the replica the columns follow.
+    return store.columns
+
+
+def get_title_trie(
+    store: TodoListStore = Depends(get_todo_list_store),
+    reads: ObservableTodoRepository = Depends(get_read_repository),
+) -> TitleTrie:
+    return store.title_trie()
 
 
 def get_create_todo_use_case(
-    repo: TodoRepository = Depends(get_todo_repository),
+    store: TodoListStore = Depends(get_or_create_todo_list_store),
+    list_id: str = Depends(get_list_id),
 ) -> CreateTodo:
-    return CreateTodo(todo_repo=repo)
+    return CreateTodo(todo_repo=store.repo, list_id=list_id)
+
+
+def get_create_todos_use_case(
+    store: TodoListStore = Depends(get_or_create_todo_list_store),
+    list_id: str = Depends(get_list_id),
+) -> CreateTodos:
+    return CreateTodos(todo_repo=store.repo, list_id=list_id)
 
 
 def get_get_all_todos_use_case(
-    repo: TodoRepository = Depends(get_todo_repository),
+    repo: TodoRepository = Depends(get_read_repository),
 ) -> GetAllTodos:
     return GetAllTodos(todo_repo=repo)
 
 
+def get_get_todos_page_use_case(
+    repo: TodoRepository = Depends(get_read_repository),
+) -> GetTodosPage:
+    return GetTodosPage(todo_repo=repo)
+
+
+def get_suggest_todos_use_case(
+    repo: TodoRepository = Depends(get_read_repository),
+    title_trie: TitleTrie = Depends(get_title_trie),
+) -> SuggestTodos:
+    return SuggestTodos(todo_repo=repo, title_trie=title_trie)
+
+
 def get_get_todo_by_id_use_case(
-    repo: TodoRepository = Depends(get_todo_repository),
+    repo: TodoRepository = Depends(get_read_repository),
 ) -> GetTodoById:
     return GetTodoById(todo_repo=repo)
 
@@ -35,7 +303,19 @@ def get_update_todo_use_case(
     return UpdateTodo(todo_repo=repo)
 
 
+def get_patch_todo_use_case(
+    repo: TodoRepository = Depends(get_todo_repository),
+) -> PatchTodo:
+    return PatchTodo(todo_repo=repo)
+
+
 def get_delete_todo_use_case(
     repo: TodoRepository = Depends(get_todo_repository),
 ) -> DeleteTodo:
     return DeleteTodo(todo_repo=repo)
+
+
+def get_todo_stats_use_case(
+    columns: TodoColumns = Depends(get_todo_columns),
+) -> TodoStats:
+    return TodoStats(todo_columns=columns)
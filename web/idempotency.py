@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyMismatchError(Exception):
+    """Raised when an idempotency key is reused with a different request payload."""
+
+
+class IdempotencyStore:
+    """A bounded, TTL-evicting map of idempotency keys to the results they produced.
+
+    Concurrent requests with the same key are deduplicated: the first one runs
+    the action while the others wait for, and then replay, its result.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 24 * 60 * 60,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Entries are kept in insertion order, which with a fixed TTL is also
+        # expiry order, so eviction only ever looks at the head.
+        self._entries: "OrderedDict[Hashable, Tuple[float, str, Any]]" = OrderedDict()
+        self._pending: Dict[Hashable, threading.Event] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float) -> None:
+        while self._entries:
+            key, (expires_at, _, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    def execute(self, key: Hashable, fingerprint: str, action: Callable[[], T]) -> Tuple[T, bool]:
+        """Run `action` once per key and return its result and whether it was replayed."""
+        while True:
+            with self._lock:
+                self._evict(self._clock())
+                entry = self._entries.get(key)
+                if entry is not None:
+                    _, stored_fingerprint, result = entry
+                    if stored_fingerprint != fingerprint:
+                        raise IdempotencyKeyMismatchError("Idempotency key was already used with a different request.")
+                    return result, True
+                in_flight = self._pending.get(key)
+                if in_flight is None:
+                    in_flight = self._pending[key] = threading.Event()
+                    break
+            in_flight.wait()
+
+        try:
+            result = action()
+            with self._lock:
+                self._entries[key] = (self._clock() + self.ttl_seconds, fingerprint, result)
+                self._evict(self._clock())
+            return result, False
+        finally:
+            with self._lock:
+                del self._pending[key]
+            in_flight.set()
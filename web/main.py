@@ -1,7 +1,49 @@
+import re
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from web.api.routes import router
+from core.maintenance import MaintenanceSettings, maintenance_jobs
+from core.scheduler import Job, Scheduler
+from web.api.routes import LIST_COMPRESSION, maintenance_router, router
+from web.compression import CompressionMiddleware, CompressionSettings
+from web.dependencies.dependencies import get_todo_lists
+from web.rate_limit import AdmissionControlMiddleware
+
+MAINTENANCE = MaintenanceSettings(compact_interval=6 * 60 * 60)
+
+_LIST_PREFIX = re.compile(r"^/lists/[^/]+")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Maintenance runs on a background thread so it never adds latency to requests.
+    todo_lists = get_todo_lists()
+    jobs = maintenance_jobs(
+        lambda: {list_id: store.repo for list_id, store in todo_lists.loaded().items()}, MAINTENANCE
+    )
+    if todo_lists.idle_timeout is not None:
+        jobs.append(Job(name="evict-idle-lists", func=lambda deadline: len(todo_lists.evict_idle()), interval=60))
+    scheduler = Scheduler(jobs)
+    app.state.scheduler = scheduler
+    scheduler.start()
+    try:
+        yield
+    finally:
+        scheduler.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+app.add_middleware(
+    CompressionMiddleware,
+    default=CompressionSettings(minimum_size=1024),
+    routes={"/todos/": LIST_COMPRESSION, "/todos/stats": CompressionSettings(minimum_size=4096, level=1)},
+    route_key=lambda path: _LIST_PREFIX.sub("", path),
+)
+# Added last so it is the outermost middleware and sheds load before any work is done.
+app.add_middleware(AdmissionControlMiddleware, max_in_flight=64)
 
 app.include_router(router)
+app.include_router(router, prefix="/lists/{list_id}")
+app.include_router(maintenance_router)
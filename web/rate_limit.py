@@ -0,0 +1,114 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    capacity: float
+    per_second: float
+
+
+# Full listings are O(N) to build and serialize, so they get a much smaller
+# budget than single-item reads. Cursor pages are charged by their size, one
+# token per default page of 100 items.
+DEFAULT_LIMITS = {
+    "read": RateLimit(capacity=200, per_second=100),
+    "list": RateLimit(capacity=10, per_second=2),
+    "page": RateLimit(capacity=100, per_second=50),
+    "write": RateLimit(capacity=50, per_second=20),
+}
+
+
+class TokenBucket:
+    __slots__ = ("limit", "tokens", "updated_at")
+
+    def __init__(self, limit: RateLimit, now: float):
+        self.limit = limit
+        self.tokens = limit.capacity
+        self.updated_at = now
+
+    def take(self, now: float, cost: float = 1.0) -> float:
+        """Take `cost` tokens, returning 0 on success or the seconds until enough tokens are available."""
+        self.tokens = min(self.limit.capacity, self.tokens + (now - self.updated_at) * self.limit.per_second)
+        self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.limit.per_second
+
+
+class RateLimiter:
+    """Token-bucket rate limiting per client and route class.
+
+    Buckets for the least recently seen clients are dropped once `max_clients`
+    is exceeded; a dropped client simply starts again with a full bucket.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, RateLimit]] = None,
+        max_clients: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limits: Dict[str, RateLimit] = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.max_clients = max_clients
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+
+    def check(self, client: str, route_class: str, cost: float = 1.0) -> float:
+        limit = self.limits.get(route_class)
+        if limit is None:
+            return 0.0
+        key = (client, route_class)
+        with self._lock:
+            now = self._clock()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(limit, now)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take(now, cost)
+
+
+def retry_after_header(seconds: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+class AdmissionControlMiddleware:
+    """Sheds load with 503 once more than `max_in_flight` HTTP requests are being handled."""
+
+    def __init__(self, app: ASGIApp, max_in_flight: int = 64, retry_after: float = 1.0):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.max_in_flight:
+            response = JSONResponse(
+                {"detail": "Server is overloaded, retry later"},
+                status_code=503,
+                headers=retry_after_header(self.retry_after),
+            )
+            await response(scope, receive, send)
+            return
+
+        # Everything here runs on the event loop, so the counter needs no lock.
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -1,7 +1,7 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 
 class TodoBase(BaseModel):
@@ -19,10 +19,60 @@ class TodoUpdate(BaseModel):
     completed: Optional[bool] = None
 
 
+class TodoPatch(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    completed: Optional[bool] = None
+
+    class Config:
+        extra = "forbid"
+
+    @field_validator("title", "completed")
+    @classmethod
+    def reject_null(cls, value):
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+
 class TodoResponse(TodoBase):
     id: str
     completed: bool
     created_at: datetime
+    list_id: str
+
+    class Config:
+        from_attributes = True
+
+
+class DailyTodoCountsResponse(BaseModel):
+    day: date
+    completed: int
+    open: int
+
+    class Config:
+        from_attributes = True
+
+
+class TodoStatsResponse(BaseModel):
+    total: int
+    completed: int
+    open: int
+    median_open_age_seconds: Optional[float] = None
+    daily: List[DailyTodoCountsResponse]
+    title_length_histogram: List[int]
 
     class Config:
         from_attributes = True
+
+
+class JobMetricsResponse(BaseModel):
+    name: str
+    interval: float
+    time_budget: Optional[float] = None
+    runs: int
+    failures: int
+    overruns: int
+    last_duration: Optional[float] = None
+    total_duration: float
+    last_error: Optional[str] = None
@@ -0,0 +1,30 @@
+import os
+from typing import Optional
+
+import click
+import uvicorn
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Interface to listen on.")
+@click.option("--port", default=8000, show_default=True, help="Port to listen on.")
+@click.option("--workers", "-w", type=click.IntRange(min=1), default=1, show_default=True, help="Worker processes.")
+@click.option(
+    "--data-dir",
+    type=click.Path(file_okay=False),
+    envvar="TODO_DATA_DIR",
+    help="Directory of the todo store shared by all workers (required for more than one worker).",
+)
+def main(host: str, port: int, workers: int, data_dir: Optional[str]):
+    """Serve the todo web API with one or more worker processes."""
+    if workers > 1 and data_dir is None:
+        raise click.UsageError("Several workers need a shared --data-dir, otherwise each would keep its own todos.")
+    if data_dir is not None:
+        os.makedirs(data_dir, exist_ok=True)
+        # Workers are separate processes that import web.main themselves and configure their store from the environment.
+        os.environ["TODO_DATA_DIR"] = os.path.abspath(data_dir)
+    uvicorn.run("web.main:app", host=host, port=port, workers=workers)
+
+
+if __name__ == "__main__":
+    main()